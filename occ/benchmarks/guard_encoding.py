@@ -0,0 +1,63 @@
+"""Compare the 'disjunction' and 'offset' guard encodings of is_neighbour and are_both_neighbours.
+
+Reports candl size and generation time for lattices and a random graph and,
+if Spike is installed, the time Spike takes to unfold and simulate briefly.
+
+    python benchmarks/guard_encoding.py [--spike]
+"""
+import argparse
+import tempfile
+import time
+
+import networkx as nx
+
+import pyspike.exe
+from occ.model import Unit, UnitModel, u, n1, n2, follow1, follow2, SimArgs
+
+GRAPHS = {
+    'grid 50x50': lambda: nx.convert_node_labels_to_integers(nx.grid_2d_graph(50, 50)),
+    'grid 100x100': lambda: nx.convert_node_labels_to_integers(nx.grid_2d_graph(100, 100)),
+    'grid 150x150': lambda: nx.convert_node_labels_to_integers(nx.grid_2d_graph(150, 150)),
+    'random 4-regular 5000': lambda: nx.random_regular_graph(4, 5000, seed=0),
+}
+
+
+def unit_model(guard_encoding):
+    a = Unit.place('a', '1`0')
+    b = Unit.place('b', '1`all')
+    m = UnitModel(name='guard_encoding', colors=[Unit], variables=[u, n1, n2])
+    m.add_transitions_from([
+        follow1(b, a, rate='1', guard_encoding=guard_encoding),
+        follow2(a, b, rate='0.1', guard_encoding=guard_encoding),
+    ])
+    return m
+
+
+def time_spike(candl_string):
+    with tempfile.TemporaryDirectory() as run_dir:
+        start = time.perf_counter()
+        pyspike.exe.run_in_dir(candl_string, SimArgs(start=0, step=0.1, stop=0.2), run_dir)
+        return time.perf_counter() - start
+
+
+def main(call_spike):
+    if call_spike and not pyspike.exe.spike_available():
+        print(f"Spike not found at '{pyspike.exe.SPIKE_COMMAND}'. Skipping Spike timings.")
+        call_spike = False
+    print(f"{'graph':<24}{'edges':>8}{'encoding':>13}{'candl bytes':>14}{'candl s':>10}{'spike s':>10}")
+    for graph_name, make_graph in GRAPHS.items():
+        g = make_graph()
+        for guard_encoding in ('disjunction', 'offset'):
+            m = unit_model(guard_encoding)
+            start = time.perf_counter()
+            candl_string = m.to_candl_string(g, graph_name)
+            candl_seconds = time.perf_counter() - start
+            spike_seconds = f"{time_spike(candl_string):10.2f}" if call_spike else f"{'-':>10}"
+            print(f"{graph_name:<24}{g.number_of_edges():>8}{guard_encoding:>13}"
+                  f"{len(candl_string):>14}{candl_seconds:>10.3f}{spike_seconds}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--spike', action='store_true', help='also time Spike')
+    main(parser.parse_args().spike)
@@ -0,0 +1,92 @@
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+import pyspike.exe
+from occ.model import SystemModel
+from occ.model.ir import bindings, column_names, transition_arity
+from occ.model.network import Adjacency
+
+# 'all' exports a place's (or transition's) sum over units and its coloured column for each unit (or binding).
+# 'coloured' exports only the coloured columns and 'sums' only the sums.
+EXPORT_KINDS = ('all', 'coloured', 'sums')
+
+
+@dataclass(frozen=True)
+class Export:
+    """Which columns a run writes to places.csv and transitions.csv.
+
+    place_names and transition_names restrict the export to those places and
+    transition families, and must not be empty. The default exports every
+    column, as Spike does.
+    """
+    places: str = 'all'
+    transitions: str = 'all'
+    place_names: Optional[Sequence[str]] = None
+    transition_names: Optional[Sequence[str]] = None
+
+    def __post_init__(self):
+        for kind in (self.places, self.transitions):
+            if kind not in EXPORT_KINDS:
+                raise ValueError(f"Unknown export kind '{kind}'. Expected one of: {EXPORT_KINDS}")
+        for kind, names in (('place', self.place_names), ('transition', self.transition_names)):
+            if names is not None and len(names) == 0:
+                # Spike would export every column for an empty list, the native backend none
+                raise ValueError(f"Empty {kind}_names. Use None to export every {kind}")
+
+    def is_everything(self):
+        return self == Export()
+
+    def to_dict(self):
+        return {
+            'places': self.places,
+            'transitions': self.transitions,
+            'place_names': None if self.place_names is None else list(self.place_names),
+            'transition_names': None if self.transition_names is None else list(self.transition_names),
+        }
+
+
+def export_lists(model: SystemModel, export: Export):
+    """Return (place columns, transition columns) to export from a run of model. None exports every column.
+
+    Columns are named as in Spike's csv files: 'a' and 'a_3' for place a, and
+    'f1ab', 'f1ab_2_3' and 'f2ab_1_2_3' for transitions. Only names and the
+    medium graph are used, so rates and markings need not be supported by the
+    native backend.
+    """
+    if export.is_everything():
+        return None, None
+    adjacency = Adjacency.from_graph(model.network)
+
+    place_columns = None
+    if export.places != 'all' or export.place_names is not None:
+        place_columns = []
+        place_names = [p.name for p in model.unit.places]
+        for name in _check_names(place_names, export.place_names, 'place'):
+            if export.places != 'coloured':
+                place_columns.append(name)
+            if export.places != 'sums':
+                place_columns.extend(f"{name}_{unit}" for unit in range(adjacency.number_units))
+
+    transition_columns = None
+    if export.transitions != 'all' or export.transition_names is not None:
+        transition_columns = []
+        transitions = {t.name: t for t in model.unit.transitions}
+        for name in _check_names(list(transitions), export.transition_names, 'transition'):
+            if export.transitions != 'coloured':
+                transition_columns.append(name)
+            t = transitions[name]
+            if export.transitions != 'sums' and t.is_stochastic():  # External transitions have no coloured columns
+                arity = transition_arity(t)
+                transition_columns.extend(column_names(name, arity, *bindings(arity, adjacency)))
+
+    pyspike.exe.check_export_columns(place_columns, transition_columns)
+    return place_columns, transition_columns
+
+
+def _check_names(all_names, names, kind):
+    if names is None:
+        return all_names
+    unknown = [name for name in names if name not in all_names]
+    if unknown:
+        raise ValueError(f"Unknown {kind} names {unknown}. Expected some of: {all_names}")
+    return [name for name in all_names if name in names]
@@ -1,43 +1,96 @@
+from collections import defaultdict
+
 from pyspike.model import ColorFunction, u, n1, n2
 
+# 'disjunction' lists the neighbours of each unit, so grows with the number of edges.
+# 'offset' groups edges by the difference n1 - u and lists the units with each offset as ranges. This is far
+# shorter for graphs numbered with a regular structure, such as lattices numbered row by row.
+GUARD_ENCODINGS = ('disjunction', 'offset')
+
+
+def _check_guard_encoding(encoding):
+    if encoding not in GUARD_ENCODINGS:
+        raise ValueError(f"Unknown guard encoding '{encoding}'. Expected one of: {GUARD_ENCODINGS}")
+
 
 class IsNeighbour(ColorFunction):
 
-    def __init__(self):
+    def __init__(self, encoding='disjunction'):
         super().__init__('is_neighbour', [u, n1])
+        _check_guard_encoding(encoding)
+        self.encoding = encoding
+
+    def __eq__(self, other):
+        return super().__eq__(other) and self.encoding == other.encoding
+
+    def _cache_key(self):
+        return super()._cache_key() + (self.encoding,)
 
     def _graph_to_func(self, medium_graph):
+        if self.encoding == 'offset':
+            return graph_to_is_neighbour_offset_func(
+                medium_graph, unit_string=u.name, neighbour_string=n1.name)
         return graph_to_is_neighbour_func(
             medium_graph, unit_string=u.name, neighbour_sring=n1.name)
 
+    def _iter_graph_to_func(self, medium_graph):
+        if self.encoding == 'offset':
+            yield self._graph_to_func(medium_graph)
+        else:
+            yield from iter_is_neighbour_func(medium_graph, unit_string=u.name, neighbour_string=n1.name)
+
 
 class AreBothNeighbours(ColorFunction):
 
-    def __init__(self):
+    def __init__(self, encoding='disjunction'):
         super().__init__('are_both_neighbours', [u, n1, n2])
+        _check_guard_encoding(encoding)
+        self.encoding = encoding
+
+    def __eq__(self, other):
+        return super().__eq__(other) and self.encoding == other.encoding
+
+    def _cache_key(self):
+        return super()._cache_key() + (self.encoding,)
 
     def _graph_to_func(self, medium_graph):
+        if self.encoding == 'offset':
+            return graph_to_are_both_neighbours_offset_func(medium_graph)
         return graph_to_are_both_neighbours_func(medium_graph)
 
+    def _iter_graph_to_func(self, medium_graph):
+        if self.encoding == 'offset':
+            yield self._graph_to_func(medium_graph)
+        else:
+            yield from iter_are_both_neighbours_func(medium_graph)
+
 
 def graph_to_is_neighbour_func(g, unit_string='x', neighbour_sring='y'):
+    return ''.join(iter_is_neighbour_func(g, unit_string, neighbour_sring))
 
-    x_list = []
 
+def iter_is_neighbour_func(g, unit_string='x', neighbour_string='y'):
+    """Yield graph_to_is_neighbour_func a unit at a time."""
+
+    separator = ''
     for x in sorted(g.adj.keys()):
         y_list = []
         for y in sorted(g.adj[x].keys()):
-            y_list.append(f'{neighbour_sring}={y}')
+            y_list.append(f'{neighbour_string}={y}')
         if y_list:
-            x_list.append(f"({unit_string}={x} & ({'|'.join(y_list)}))")
-
-    return ' | '.join(x_list)
+            yield f"{separator}({unit_string}={x} & ({'|'.join(y_list)}))"
+            separator = ' | '
 
 
 def graph_to_are_both_neighbours_func(g):
+    return ''.join(iter_are_both_neighbours_func(g))
 
-    u_list = []
 
+def iter_are_both_neighbours_func(g):
+    """Yield graph_to_are_both_neighbours_func a unit at a time."""
+
+    yield '(n1!=n2) & ('
+    separator = ''
     for u in sorted(g.adj.keys()):
         n1_list = []
         n2_list = []
@@ -45,6 +98,41 @@ def graph_to_are_both_neighbours_func(g):
             n1_list.append(f'n1={y}')
             n2_list.append(f'n2={y}')
         if n1_list:  # and implicitly n2_list
-            u_list.append(f"(u={u} & ({'|'.join(n1_list)}) & ({'|'.join(n2_list)}))")
+            yield f"{separator}(u={u} & ({'|'.join(n1_list)}) & ({'|'.join(n2_list)}))"
+            separator = ' | '
+    yield ')'
+
 
-    return '(n1!=n2) & (' + (' | '.join(u_list)) + ')'
\ No newline at end of file
+def graph_to_is_neighbour_offset_func(g, unit_string='x', neighbour_string='y'):
+
+    units_by_offset = defaultdict(list)
+    for x in sorted(g.adj.keys()):
+        for y in g.adj[x]:
+            units_by_offset[y - x].append(x)
+
+    offset_list = []
+    for offset in sorted(units_by_offset):
+        units = _units_to_ranges(units_by_offset[offset], unit_string)
+        offset_list.append(f"({neighbour_string}={unit_string}{offset:+d} & ({units}))")
+
+    return ' | '.join(offset_list)
+
+
+def graph_to_are_both_neighbours_offset_func(g):
+    n1_func = graph_to_is_neighbour_offset_func(g, unit_string='u', neighbour_string='n1')
+    n2_func = graph_to_is_neighbour_offset_func(g, unit_string='u', neighbour_string='n2')
+    return f'(n1!=n2) & ({n1_func}) & ({n2_func})'
+
+
+def _units_to_ranges(sorted_units, unit_string):
+    """Return a disjunction matching unit_string to sorted_units, with consecutive units as one range."""
+    ranges = []
+    start = previous = sorted_units[0]
+    for x in sorted_units[1:]:
+        if x != previous + 1:
+            ranges.append((start, previous))
+            start = x
+        previous = x
+    ranges.append((start, previous))
+    return '|'.join(f"{unit_string}={a}" if a == b else f"({unit_string}>={a} & {unit_string}<={b})"
+                    for a, b in ranges)
@@ -0,0 +1,215 @@
+import re
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+
+from occ.model import SystemModel
+from occ.model.network import Adjacency
+from occ.model.transitions import FollowNeighbour, FollowTwoNeighbours, ModulatedInternal, External
+
+
+MASS_ACTION_RE = r"^\s*MassAction\((?P<k>[^()]+)\)\s*$"
+
+
+@dataclass
+class ModelIR:
+    """A SystemModel with its structure held as integer indexed arrays rather than strings.
+
+    Places and transitions are numbered in the order the UnitModel lists them.
+    Row t of the (T, P) place matrices describes one binding of transition t:
+    `pre` tokens are taken from the bound unit u and `post` tokens put on it,
+    `test` tokens must be held by u but are not taken (read arcs and
+    activators) and `neighbour_test` tokens must be held by each of the
+    `arity` bound neighbours (n1, and n2 if bound). Neighbours are found
+    with `adjacency`, the medium graph in CSR form.
+
+    External transitions are the exception: they bind no unit, but move a
+    token on every unit in `external_units[t]` at once.
+    """
+    place_names: List[str]
+    transition_names: List[str]
+    number_units: int
+    initial_marking: np.ndarray  # (P, N)
+
+    source: np.ndarray  # (T,) place index
+    target: np.ndarray  # (T,) place index
+    pre: np.ndarray  # (T, P)
+    post: np.ndarray  # (T, P)
+    test: np.ndarray  # (T, P)
+    neighbour_test: np.ndarray  # (T, P)
+    arity: np.ndarray  # (T,) number of neighbours bound, 0, 1 or 2
+    stochastic: np.ndarray  # (T,) bool
+    rate: np.ndarray  # (T,) rate constant (stochastic) or delay (deterministic)
+    mass_action: np.ndarray  # (T,) bool
+    external_units: List[Optional[np.ndarray]]  # units moved by each External transition, else None
+
+    adjacency: Adjacency
+
+    @property
+    def place_index(self):
+        return {name: i for i, name in enumerate(self.place_names)}
+
+    @property
+    def transition_index(self):
+        return {name: i for i, name in enumerate(self.transition_names)}
+
+    @property
+    def stoichiometry(self):
+        """Return the (T, P) change in marking at the bound unit when each transition fires."""
+        return self.post - self.pre
+
+    def bindings(self, transition):
+        """Return (unit, n1, n2) arrays with a row per binding of a stochastic transition, -1 where unbound.
+
+        Rows are ordered by unit, then n1, then n2, as Spike orders them.
+        """
+        return bindings(self.arity[transition], self.adjacency)
+
+    def column_names(self, transition, units, n1, n2):
+        """Return the Spike transitions.csv column name of each binding of transition."""
+        return column_names(self.transition_names[transition], self.arity[transition], units, n1, n2)
+
+
+def transition_arity(transition):
+    """Return the number of neighbours a transition binds: 0, 1 or 2."""
+    if isinstance(transition, FollowNeighbour):
+        return 1
+    if isinstance(transition, FollowTwoNeighbours):
+        return 2
+    return 0
+
+
+def bindings(arity, adjacency: Adjacency):
+    """Return (unit, n1, n2) arrays with a row per binding of a transition binding arity neighbours (see
+    ModelIR.bindings)."""
+    if arity == 0:
+        units = np.arange(adjacency.number_units)
+        return units, np.full_like(units, -1), np.full_like(units, -1)
+    if arity == 1:
+        units, n1 = adjacency.edges()
+        return units, n1, np.full_like(units, -1)
+    return adjacency.neighbour_pairs()
+
+
+def column_names(name, arity, units, n1, n2):
+    """Return the Spike transitions.csv column name of each binding of transition family name."""
+    if arity == 0:
+        return [f"{name}_{x}" for x in units.tolist()]
+    if arity == 1:
+        return [f"{name}_{y}_{x}" for x, y in zip(units.tolist(), n1.tolist())]
+    return [f"{name}_{y}_{z}_{x}" for x, y, z in zip(units.tolist(), n1.tolist(), n2.tolist())]
+
+
+def parse_rate(rate):
+    """Return (rate constant, is_mass_action) for a transition rate string.
+
+    Supports plain numbers and `MassAction(k)`. A plain number is taken as the
+    hazard of an enabled binding regardless of marking (as Spike does).
+    """
+    m = re.match(MASS_ACTION_RE, str(rate))
+    if m:
+        return float(m.group('k')), True
+    try:
+        return float(rate), False
+    except ValueError:
+        raise ValueError(f"Rate '{rate}' is not supported by the native backend")
+
+
+def parse_marking(marking_string, number_units):
+    """Return an array of token counts per unit from a candl marking such as '1`all', '0`0' or '3++4'."""
+    counts = np.zeros(number_units, dtype=np.int64)
+    for term in marking_string.split('++'):
+        term = term.strip()
+        if '`' in term:
+            multiplicity, colour = term.split('`')
+            multiplicity = int(multiplicity)
+        else:
+            multiplicity, colour = 1, term
+        colour = colour.strip()
+        try:
+            if colour == 'all':
+                counts += multiplicity
+            else:
+                counts[int(colour)] += multiplicity
+        except (ValueError, IndexError):
+            raise ValueError(f"Marking '{marking_string}' is not supported by the native backend")
+    return counts
+
+
+def compile_ir(model: SystemModel) -> ModelIR:
+    adjacency = Adjacency.from_graph(model.network)
+    unit_model = model.unit
+    number_units = adjacency.number_units
+    place_names = [p.name for p in unit_model.places]
+    if len(set(place_names)) != len(place_names):
+        raise ValueError(f"Place names must be unique: {place_names}")
+    place_index = {name: i for i, name in enumerate(place_names)}
+
+    initial_marking = np.zeros((len(place_names), number_units), dtype=np.int64)
+    for i, p in enumerate(unit_model.places):
+        initial_marking[i] = parse_marking(p.initial_marking, number_units)
+
+    transitions = unit_model.transitions
+    shape = (len(transitions), len(place_names))
+    pre = np.zeros(shape, dtype=np.int64)
+    post = np.zeros(shape, dtype=np.int64)
+    test = np.zeros(shape, dtype=np.int64)
+    neighbour_test = np.zeros(shape, dtype=np.int64)
+    arity = np.zeros(len(transitions), dtype=np.int64)
+    rate = np.zeros(len(transitions))
+    mass_action = np.zeros(len(transitions), dtype=bool)
+    external_units = []
+
+    for i, t in enumerate(transitions):
+        source = place_index[t.source.name]
+        target = place_index[t.target.name]
+        post[i, target] += 1
+        if isinstance(t, External):
+            pre[i, source] += 1
+            rate[i] = t.delay_time
+            external_units.append(np.array(t.unit_list, dtype=np.int64))
+            continue
+        external_units.append(None)
+
+        rate[i], mass_action[i] = parse_rate(t.rate)
+        arity[i] = transition_arity(t)
+        if isinstance(t, FollowNeighbour):
+            neighbour_test[i, target] += 1
+            if t.use_read_arc:
+                test[i, source] += 1
+            else:
+                pre[i, source] += 1
+            if t.enabled_by_local:
+                test[i, place_index[t.enabled_by_local.name]] += 1
+        elif isinstance(t, FollowTwoNeighbours):
+            neighbour_test[i, target] += 1
+            pre[i, source] += 1
+            if t.enabled_by_local:
+                test[i, place_index[t.enabled_by_local.name]] += 1
+        elif isinstance(t, ModulatedInternal):
+            pre[i, source] += 1
+            test[i, place_index[t.activate.name]] += 1
+            if t.activate2:
+                test[i, place_index[t.activate2.name]] += 1
+        else:
+            raise NotImplementedError(f"Transition type '{type(t).__name__}' is not supported by the native backend")
+
+    return ModelIR(
+        place_names=place_names,
+        transition_names=[t.name for t in transitions],
+        number_units=number_units,
+        initial_marking=initial_marking,
+        source=np.array([place_index[t.source.name] for t in transitions], dtype=np.int64),
+        target=np.array([place_index[t.target.name] for t in transitions], dtype=np.int64),
+        pre=pre,
+        post=post,
+        test=test,
+        neighbour_test=neighbour_test,
+        arity=arity,
+        stochastic=np.array([t.is_stochastic() for t in transitions], dtype=bool),
+        rate=rate,
+        mass_action=mass_action,
+        external_units=external_units,
+        adjacency=adjacency,
+    )
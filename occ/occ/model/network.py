@@ -1,4 +1,8 @@
+import itertools
+from dataclasses import dataclass
+
 import networkx as nx
+import numpy as np
 
 
 def check_medium_graph(medium_graph):
@@ -11,4 +15,62 @@ def check_medium_graph(medium_graph):
             raise AssertionError(f"node {node} must be of type 'int' not '{type(node)}."
                                  "Use destringizer=int with nx.read_gml()?'")
     assert list(g.nodes)[0] == 0, f"medium_graph nodes must be numbered from 0 not {list(g.nodes)[0]}"
-    assert list(g.nodes) == list(range(len(g.nodes)))
\ No newline at end of file
+    assert list(g.nodes) == list(range(len(g.nodes)))
+
+
+@dataclass
+class Adjacency:
+    """The medium graph in compressed sparse row form.
+
+    The neighbours of unit x are indices[indptr[x]:indptr[x + 1]], in
+    ascending order.
+    """
+    indptr: np.ndarray  # (N + 1,)
+    indices: np.ndarray  # (2E,)
+
+    @classmethod
+    def from_graph(cls, medium_graph):
+        check_medium_graph(medium_graph)
+        g = medium_graph
+        number_units = g.number_of_nodes()
+        edges = np.fromiter(itertools.chain.from_iterable(g.edges), dtype=np.int64, count=2 * g.number_of_edges())
+        edges = edges.reshape(-1, 2)
+        reverse = edges[edges[:, 0] != edges[:, 1]]  # a self loop makes a unit its own neighbour once
+        rows = np.concatenate([edges[:, 0], reverse[:, 1]])
+        columns = np.concatenate([edges[:, 1], reverse[:, 0]])
+        order = np.lexsort((columns, rows))
+        indptr = np.zeros(number_units + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=number_units), out=indptr[1:])
+        return cls(indptr=indptr, indices=columns[order])
+
+    @property
+    def number_units(self):
+        return len(self.indptr) - 1
+
+    @property
+    def degree(self):
+        return np.diff(self.indptr)
+
+    def neighbours(self, unit):
+        return self.indices[self.indptr[unit]:self.indptr[unit + 1]]
+
+    def edges(self):
+        """Return (unit, neighbour) arrays with a row per ordered pair of neighbouring units, by unit."""
+        return np.repeat(np.arange(self.number_units), self.degree), self.indices
+
+    def neighbour_pairs(self):
+        """Return (unit, n1, n2) arrays with a row per ordered pair of distinct neighbours of each unit.
+
+        Rows are ordered by unit, then n1, then n2.
+        """
+        degree = self.degree
+        units = np.repeat(np.arange(self.number_units), degree ** 2)
+        # Position of each row within its unit's degree x degree block
+        start = np.repeat(np.cumsum(degree ** 2) - degree ** 2, degree ** 2)
+        k = np.arange(len(units)) - start
+        d = degree[units]
+        first = self.indptr[units]
+        n1 = self.indices[first + k // np.maximum(d, 1)]
+        n2 = self.indices[first + k % np.maximum(d, 1)]
+        distinct = n1 != n2
+        return units[distinct], n1[distinct], n2[distinct]
@@ -5,9 +5,10 @@ from pyspike.model import Transition, Place, u, n1, n2
 class FollowNeighbour(Transition):
 
     def __init__(self, source: Place, target: Place, rate: str = '1', name_prefix='',
-                 use_read_arc=False, enabled_by_local: Place = None):  # TODO: consolidate enable/activate
+                 use_read_arc=False, enabled_by_local: Place = None,  # TODO: consolidate enable/activate
+                 guard_encoding='disjunction'):
         super().__init__(source, target,
-                         Transition.Kind.STOCHASTIC, "follow_neighbour", IsNeighbour(),
+                         Transition.Kind.STOCHASTIC, "follow_neighbour", IsNeighbour(guard_encoding),
                          name_prefix=name_prefix + ('f1L' if enabled_by_local else 'f1'))
         assert set(self.guard_function.variables) == {u, n1}
         self.rate = str(rate)
@@ -56,9 +57,9 @@ class FollowNeighbour(Transition):
 class FollowTwoNeighbours(Transition):
 
     def __init__(self, source: Place, target: Place, rate: str = '1', name_prefix='',
-                 enabled_by_local: Place = None):
+                 enabled_by_local: Place = None, guard_encoding='disjunction'):
         super().__init__(source, target,
-                         Transition.Kind.STOCHASTIC, "follow_two_neighbours", AreBothNeighbours(),
+                         Transition.Kind.STOCHASTIC, "follow_two_neighbours", AreBothNeighbours(guard_encoding),
                          name_prefix=name_prefix + ('f2L' if enabled_by_local else 'f2'))
         assert set(self.guard_function.variables) == {u, n1, n2}
         self.rate = rate
@@ -94,9 +95,9 @@ class FollowTwoNeighbours(Transition):
 class ModulatedInternal(Transition):
 
     def __init__(self, source: Place, target: Place, activate: Place, activate2: Place = None,
-                 rate: str = '1', name_prefix=''):
+                 rate: str = '1', name_prefix='', guard_encoding='disjunction'):
         super().__init__(source, target,
-                         Transition.Kind.STOCHASTIC, "modulated_internal", AreBothNeighbours(),
+                         Transition.Kind.STOCHASTIC, "modulated_internal", AreBothNeighbours(guard_encoding),
                          name_prefix=name_prefix + 'mi2' if activate2 else 'mi')
         assert set(self.guard_function.variables) == {u, n1, n2}
         self.activate = activate
@@ -0,0 +1,3 @@
+from occ.native.compile import compile_system_model, CompiledModel
+from occ.native.ensemble import Ensemble
+from occ.native.exe import simulate, simulate_runs, run_in_dir, SOLVERS, ENSEMBLE_SOLVERS, DETERMINISTIC_SOLVERS
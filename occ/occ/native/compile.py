@@ -0,0 +1,166 @@
+from dataclasses import dataclass
+from typing import List
+
+import numpy as np
+
+from occ.model import SystemModel
+from occ.model.ir import ModelIR, compile_ir
+from occ.model.ir import parse_marking, parse_rate  # noqa: F401 re-exported, they were defined here
+
+
+@dataclass
+class CompiledModel:
+    """A SystemModel unfolded onto its medium graph, ready for in-process simulation.
+
+    The state is a flat integer vector with one entry per (place, unit), indexed
+    `place_index * number_units + unit`, plus a final entry (at index `one`) which
+    always holds 1 and is used to pad the ragged per binding index lists below.
+
+    Each unfolded transition instance (a binding of u, n1 and n2) is a row in the
+    binding arrays. Stochastic bindings come first followed by deterministic ones.
+    """
+    place_names: List[str]
+    number_units: int
+    initial_state: np.ndarray  # (S + 1,)
+
+    family_names: List[str]  # transition names
+    binding_family: np.ndarray  # (B,) index into family_names
+    binding_unit: np.ndarray  # (B,) -1 if not bound
+    binding_neighbour: np.ndarray  # (B,) -1 if not bound
+    binding_neighbour2: np.ndarray  # (B,) -1 if not bound
+    binding_columns: List[str]  # Spike style column name, or None for uncoloured transitions
+
+    pre: np.ndarray  # (B, K) state indices which must all hold a token, padded with `one`
+    change_index: np.ndarray  # (B, J) state indices updated on firing, padded with `one`
+    change_value: np.ndarray  # (B, J) update to apply, padded with 0
+    rate: np.ndarray  # (B,) rate constant (stochastic) or delay (deterministic)
+    mass_action: np.ndarray  # (B,) bool
+    number_stochastic: int
+
+    @property
+    def number_states(self):
+        return len(self.place_names) * self.number_units
+
+    @property
+    def one(self):
+        return self.number_states
+
+    @property
+    def number_bindings(self):
+        return len(self.binding_family)
+
+    @property
+    def stochastic(self):
+        return slice(0, self.number_stochastic)
+
+    @property
+    def deterministic(self):
+        return slice(self.number_stochastic, self.number_bindings)
+
+    def propensities(self, x, bindings=None):
+        """Return the propensity of each stochastic binding (or just those given) given state x.
+
+        x may be a single state (S + 1,) or a batch of states (R, S + 1), giving (B,) or (R, B).
+        """
+        s = self.stochastic if bindings is None else bindings
+        held = x[..., self.pre[s]]
+        enabled = np.logical_and.reduce(np.moveaxis(held >= 1, -1, 0))
+        mass_action = self.mass_action[s]
+        if not mass_action.any():
+            return self.rate[s] * enabled
+        return np.where(mass_action, held.prod(axis=-1), 1) * self.rate[s] * enabled
+
+    def enabled(self, x, bindings):
+        return np.logical_and.reduce(np.moveaxis(x[..., self.pre[bindings]] >= 1, -1, 0))
+
+    def fire(self, x, binding):
+        np.add.at(x, self.change_index[binding], self.change_value[binding])
+
+
+def compile_system_model(model: SystemModel) -> CompiledModel:
+    return compile_ir_bindings(compile_ir(model))
+
+
+def compile_ir_bindings(ir: ModelIR) -> CompiledModel:
+    """Unfold each transition of ir into its bindings on the medium graph.
+
+    Bindings of a transition are built together as arrays from ir's
+    adjacency, so the cost is a few numpy operations per transition rather
+    than Python work per binding.
+    """
+    number_units = ir.number_units
+    one = len(ir.place_names) * number_units
+
+    initial_state = np.zeros(one + 1, dtype=np.int64)
+    initial_state[:one] = ir.initial_marking.ravel()
+    initial_state[one] = 1
+
+    stoichiometry = ir.stoichiometry
+    held = ir.pre + ir.test
+    stochastic_blocks = []
+    deterministic_blocks = []
+    for t in range(len(ir.transition_names)):
+        # Tokens put, then tokens taken
+        changed = np.concatenate([np.flatnonzero(stoichiometry[t] > 0), np.flatnonzero(stoichiometry[t] < 0)])
+        if not ir.stochastic[t]:
+            units = ir.external_units[t]
+            number_units_moved = len(units)
+            deterministic_blocks.append(dict(
+                family=[t], unit=[-1], neighbour=[-1], neighbour2=[-1], columns=[None],
+                pre=np.concatenate([p * number_units + units
+                                    for p in np.repeat(np.arange(len(ir.place_names)), held[t])])[None, :],
+                change_index=np.concatenate([p * number_units + units for p in changed])[None, :],
+                change_value=np.repeat(stoichiometry[t, changed], number_units_moved)[None, :],
+                rate=[ir.rate[t]], mass_action=[False]))
+            continue
+
+        units, neighbour, neighbour2 = ir.bindings(t)
+        local = np.repeat(np.arange(len(ir.place_names)), held[t])
+        remote = np.repeat(np.arange(len(ir.place_names)), ir.neighbour_test[t])
+        pre_columns = [p * number_units + units for p in local] + [p * number_units + neighbour for p in remote]
+        if ir.arity[t] == 2:
+            pre_columns += [p * number_units + neighbour2 for p in remote]
+        number_bindings = len(units)
+        stochastic_blocks.append(dict(
+            family=np.full(number_bindings, t), unit=units, neighbour=neighbour, neighbour2=neighbour2,
+            columns=ir.column_names(t, units, neighbour, neighbour2),
+            pre=np.stack(pre_columns, axis=1),
+            change_index=np.stack([p * number_units + units for p in changed], axis=1),
+            change_value=np.broadcast_to(stoichiometry[t, changed], (number_bindings, len(changed))),
+            rate=np.full(number_bindings, ir.rate[t]), mass_action=np.full(number_bindings, ir.mass_action[t])))
+
+    blocks = stochastic_blocks + deterministic_blocks
+    number_bindings = sum(len(b['family']) for b in blocks)
+    k = max([b['pre'].shape[1] for b in blocks], default=1)
+    j = max([b['change_index'].shape[1] for b in blocks], default=1)
+    pre = np.full((number_bindings, k), one, dtype=np.int64)
+    change_index = np.full((number_bindings, j), one, dtype=np.int64)
+    change_value = np.zeros((number_bindings, j), dtype=np.int64)
+    row = 0
+    for b in blocks:
+        rows = slice(row, row + len(b['family']))
+        pre[rows, :b['pre'].shape[1]] = b['pre']
+        change_index[rows, :b['change_index'].shape[1]] = b['change_index']
+        change_value[rows, :b['change_value'].shape[1]] = b['change_value']
+        row = rows.stop
+
+    def column(key, dtype=np.int64):
+        return np.concatenate([np.asarray(b[key], dtype=dtype) for b in blocks]) if blocks else np.zeros(0, dtype)
+
+    return CompiledModel(
+        place_names=list(ir.place_names),
+        number_units=number_units,
+        initial_state=initial_state,
+        family_names=list(ir.transition_names),
+        binding_family=column('family'),
+        binding_unit=column('unit'),
+        binding_neighbour=column('neighbour'),
+        binding_neighbour2=column('neighbour2'),
+        binding_columns=[c for b in blocks for c in b['columns']],
+        pre=pre,
+        change_index=change_index,
+        change_value=change_value,
+        rate=column('rate', float),
+        mass_action=column('mass_action', bool),
+        number_stochastic=sum(len(b['family']) for b in stochastic_blocks),
+    )
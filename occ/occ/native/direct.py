@@ -0,0 +1,84 @@
+import numpy as np
+
+from occ.native.compile import CompiledModel
+from occ.native.trajectory import Trajectory
+
+
+class DeterministicSchedule:
+    """Tracks when each deterministic (External) binding is next due to fire.
+
+    A deterministic binding fires once it has been continuously enabled for its
+    delay. The clock starts at time 0.
+    """
+
+    def __init__(self, cm: CompiledModel, x, t=0.):
+        self.cm = cm
+        self.bindings = np.arange(cm.number_stochastic, cm.number_bindings)
+        self.delays = cm.rate[cm.deterministic]
+        self.due = np.full(len(self.bindings), np.inf)
+        self.update(x, t)
+
+    def update(self, x, t):
+        if not len(self.bindings):
+            return
+        enabled = self.cm.enabled(x, self.bindings)
+        newly_enabled = enabled & np.isinf(self.due)
+        self.due[newly_enabled] = t + self.delays[newly_enabled]
+        self.due[~enabled] = np.inf
+
+    def next(self):
+        """Return (time, binding) of the next deterministic firing, or (inf, None)."""
+        if not len(self.bindings):
+            return np.inf, None
+        i = np.argmin(self.due)
+        return self.due[i], self.bindings[i]
+
+    def fired(self, binding, x, t):
+        self.due[binding - self.cm.number_stochastic] = np.inf
+        self.update(x, t)
+
+
+def simulate_direct(cm: CompiledModel, times, rng) -> Trajectory:
+    """Simulate one run with Gillespie's direct method.
+
+    Every propensity is recomputed (vectorised) after each firing, so an event
+    costs O(number of bindings).
+    """
+    x = cm.initial_state.copy()
+    states = np.empty((len(times), cm.number_states), dtype=np.int64)
+    firings = np.zeros((len(times), cm.number_bindings), dtype=np.int64)
+    event_times, event_bindings = [], []
+    schedule = DeterministicSchedule(cm, x)
+
+    t = 0.
+    k = 0  # next sample
+    while k < len(times):
+        a = cm.propensities(x)
+        cumulative = np.cumsum(a)
+        a0 = cumulative[-1] if len(cumulative) else 0.
+        t_stochastic = t + rng.exponential(1 / a0) if a0 > 0 else np.inf
+        t_deterministic, deterministic_binding = schedule.next()
+        t_next = min(t_stochastic, t_deterministic)
+
+        # Record samples due before the next event
+        while k < len(times) and times[k] <= t_next:
+            states[k] = x[:cm.number_states]
+            k += 1
+        if k == len(times):
+            break
+
+        t = t_next
+        if t_deterministic <= t_stochastic:
+            binding = deterministic_binding
+        else:
+            binding = min(np.searchsorted(cumulative, rng.random() * a0, side='right'), cm.number_stochastic - 1)
+        cm.fire(x, binding)
+        firings[k, binding] += 1
+        event_times.append(t)
+        event_bindings.append(binding)
+        if binding >= cm.number_stochastic:
+            schedule.fired(binding, x, t)
+        else:
+            schedule.update(x, t)
+
+    return Trajectory(times=times, states=states, firings=firings, events=(event_times, event_bindings))
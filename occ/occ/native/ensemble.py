@@ -0,0 +1,110 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from occ.native.compile import CompiledModel
+from occ.native.trajectory import Trajectory
+
+
+@dataclass
+class Ensemble:
+    """Sampled output of independent runs of one model simulated together.
+
+    Row [r, k] of `states` holds the marking of run r at `times[k]`. To bound
+    memory firings are summed over runs rather than kept per run.
+    """
+    times: np.ndarray  # (T,)
+    states: np.ndarray  # (R, T, S)
+    firings: np.ndarray  # (T, B) summed over runs
+    number_places: int
+
+    @property
+    def number_runs(self):
+        return self.states.shape[0]
+
+    @property
+    def places(self):
+        """Return states as a (run, time, place, unit) array."""
+        r, t, s = self.states.shape
+        return self.states.reshape(r, t, self.number_places, s // self.number_places)
+
+    def mean(self) -> Trajectory:
+        """Average over runs as Spike does when SimArgs.runs > 1."""
+        if self.number_runs == 1:
+            return Trajectory(times=self.times, states=self.states[0].astype(np.int64),
+                              firings=self.firings.astype(np.int64))
+        return Trajectory(times=self.times, states=self.states.mean(axis=0),
+                          firings=self.firings / self.number_runs)
+
+
+def simulate_ensemble(cm: CompiledModel, times, runs, rng) -> Ensemble:
+    """Simulate independent runs with Gillespie's direct method, batched over runs.
+
+    Each run keeps its own clock but every step fires one event in every
+    unfinished run, with propensities, binding choice and state updates
+    computed for all runs at once. The Python overhead is therefore that of
+    the longest run rather than the sum over runs.
+    """
+    number_times = len(times)
+    states = np.empty((runs, number_times, cm.number_states), dtype=np.int32)
+    firings = np.zeros((number_times, cm.number_bindings), dtype=np.int64)
+
+    x = np.tile(cm.initial_state, (runs, 1))
+    t = np.zeros(runs)
+    k = np.zeros(runs, dtype=np.int64)  # next sample of each run
+    deterministic = np.arange(cm.number_stochastic, cm.number_bindings)
+    delays = cm.rate[cm.deterministic]
+    due = np.full((runs, len(deterministic)), np.inf)
+
+    def update_due(r):
+        if not len(deterministic):
+            return
+        enabled = cm.enabled(x[r], deterministic)
+        due_r = due[r]
+        newly_enabled = enabled & np.isinf(due_r)
+        due_r[newly_enabled] = (t[r, None] + delays)[newly_enabled]
+        due_r[~enabled] = np.inf
+        due[r] = due_r
+
+    update_due(np.arange(runs))
+    sample_index = np.arange(number_times)
+    while True:
+        r = np.flatnonzero(k < number_times)  # unfinished runs
+        if not len(r):
+            break
+
+        a = cm.propensities(x[r])
+        cumulative = np.cumsum(a, axis=1)
+        a0 = a.sum(axis=1)
+        with np.errstate(divide='ignore'):
+            t_stochastic = t[r] + rng.exponential(size=len(r)) / a0
+        if len(deterministic):
+            next_deterministic = np.argmin(due[r], axis=1)
+            t_deterministic = due[r, next_deterministic]
+        else:
+            next_deterministic = np.zeros(len(r), dtype=np.int64)
+            t_deterministic = np.full(len(r), np.inf)
+        t_next = np.minimum(t_stochastic, t_deterministic)
+
+        # Record samples due before each run's next event
+        k_next = np.searchsorted(times, t_next, side='right')
+        rows, columns = np.nonzero((sample_index >= k[r, None]) & (sample_index < k_next[:, None]))
+        states[r[rows], columns] = x[r[rows], :cm.number_states]
+        k[r] = k_next
+
+        # Fire one event in each run still going
+        going = k_next < number_times
+        r, k_next, t_next = r[going], k_next[going], t_next[going]
+        is_deterministic = (t_deterministic <= t_stochastic)[going]
+        choice = (rng.random(len(r)) * a0[going])[:, None]
+        stochastic_binding = np.minimum((cumulative[going] <= choice).sum(axis=1), cm.number_stochastic - 1)
+        binding = np.where(is_deterministic, deterministic[next_deterministic[going]] if len(deterministic) else 0,
+                           stochastic_binding)
+        t[r] = t_next
+        np.add.at(x, (r[:, None], cm.change_index[binding]), cm.change_value[binding])
+        np.add.at(firings, (k_next, binding), 1)
+        if len(deterministic):
+            due[r[is_deterministic], next_deterministic[going][is_deterministic]] = np.inf
+            update_due(r)
+
+    return Ensemble(times=times, states=states, firings=firings, number_places=len(cm.place_names))
@@ -0,0 +1,138 @@
+import logging
+import os
+
+import numpy as np
+
+import occ.reduction.events
+import pyspike.spcconf
+from occ.model import SystemModel
+from occ.native.compile import compile_system_model
+from occ.native.direct import simulate_direct
+from occ.native.ensemble import simulate_ensemble, Ensemble
+from occ.native.mean_field import simulate_mean_field
+from occ.native.next_reaction import simulate_next_reaction
+from occ.native.tau_leap import simulate_tau_leap
+from occ.native.trajectory import sample_times, average, to_raw_frames, to_event_log
+from pyspike.exe import SimArgs
+
+
+SOLVERS = {
+    'direct': simulate_direct,
+    'next_reaction': simulate_next_reaction,
+    'tau_leap': simulate_tau_leap,
+}
+
+# Solvers simulating all of SimArgs.runs together, taking (cm, times, runs, rng) and returning an Ensemble
+ENSEMBLE_SOLVERS = {
+    'ensemble': simulate_ensemble,
+}
+
+# Deterministic solvers, taking (model, sim_args) and returning raw frames of expected values
+DETERMINISTIC_SOLVERS = {
+    'mean_field': simulate_mean_field,
+}
+
+
+def simulate(model: SystemModel, sim_args: SimArgs, solver='direct', seed=None, rng=None, events=False):
+    """Simulate model in process returning (raw_places, raw_transitions) frames.
+
+    The frames are laid out as Spike's places.csv and transitions.csv would be.
+    When sim_args.runs > 1 the runs are averaged, as Spike does.
+
+    If events is True return (raw_places, raw_transitions, events) where events
+    is the exact event log of the first run (see occ.reduction.events), or None
+    for solvers which do not fire events one at a time.
+    """
+    if solver in DETERMINISTIC_SOLVERS:
+        raw_places, raw_transitions = DETERMINISTIC_SOLVERS[solver](model, sim_args)
+        event_log = None
+    else:
+        if rng is None:
+            rng = np.random.default_rng(seed)
+        raw_places, raw_transitions, event_log = _simulate_compiled(
+            compile_system_model(model), sim_args, solver, rng)
+    return (raw_places, raw_transitions, event_log) if events else (raw_places, raw_transitions)
+
+
+def simulate_runs(model: SystemModel, sim_args: SimArgs, seed=None, rng=None) -> Ensemble:
+    """Simulate sim_args.runs independent runs of model together, keeping every run.
+
+    Ensemble.places gives the marking of each run as a (run, time, place, unit) array.
+    """
+    if rng is None:
+        rng = np.random.default_rng(seed)
+    cm = compile_system_model(model)
+    return simulate_ensemble(cm, sample_times(sim_args), sim_args.runs, rng)
+
+
+def _simulate_compiled(cm, sim_args, solver, rng):
+    times = sample_times(sim_args)
+    if solver in ENSEMBLE_SOLVERS:
+        return to_raw_frames(cm, ENSEMBLE_SOLVERS[solver](cm, times, sim_args.runs, rng).mean()) + (None,)
+    if solver not in SOLVERS:
+        raise ValueError(f"Unknown solver '{solver}'. Expected one of: "
+                         f"{list(SOLVERS) + list(ENSEMBLE_SOLVERS) + list(DETERMINISTIC_SOLVERS)}")
+    trajectory = average([SOLVERS[solver](cm, times, rng) for _ in range(sim_args.runs)])
+    return to_raw_frames(cm, trajectory) + (to_event_log(cm, trajectory),)
+
+
+def run_in_dir(model: SystemModel, sim_args: SimArgs, native_run_dir, solver='direct', seed=None,
+               export_places=None, export_transitions=None):
+    """Simulate model in process writing output to a directory and returning a manifest dictionary.
+
+    Creates output/places.csv and output/transitions.csv (numbered as Spike
+    would when sim_args.repeat_sim > 1), and output/events.csv for solvers
+    which record an event log.
+
+    export_places and export_transitions select columns to write, as for
+    pyspike.exe.run_in_dir. None writes every column, and an empty list
+    raises ValueError as it would for Spike.
+    """
+    pyspike.exe.check_export_columns(export_places, export_transitions)
+    assert not os.listdir(native_run_dir), f"'{native_run_dir} is not empty'"
+    os.makedirs(os.path.join(native_run_dir, 'output'))
+
+    places_path_list = ['output/places.csv']
+    transitions_path_list = ['output/transitions.csv']
+    events_path_list = ['output/events.csv']
+    if sim_args.repeat_sim > 1:
+        places_path_list = pyspike.spcconf.expand_export_path_list(places_path_list, sim_args.repeat_sim)
+        transitions_path_list = pyspike.spcconf.expand_export_path_list(transitions_path_list, sim_args.repeat_sim)
+        events_path_list = pyspike.spcconf.expand_export_path_list(events_path_list, sim_args.repeat_sim)
+
+    logging.info(f"Simulating in process with solver '{solver}' in: {native_run_dir}")
+    if solver in DETERMINISTIC_SOLVERS:
+        # Repeats of a deterministic solver are identical
+        frames_list = [DETERMINISTIC_SOLVERS[solver](model, sim_args) + (None,)] * len(places_path_list)
+    else:
+        cm = compile_system_model(model)
+        rng = np.random.default_rng(seed)
+        frames_list = (_simulate_compiled(cm, sim_args, solver, rng) for _ in places_path_list)
+    for places_path, transitions_path, events_path, (raw_places, raw_transitions, event_log) in zip(
+            places_path_list, transitions_path_list, events_path_list, frames_list):
+        raw_places = select_columns(raw_places, export_places)
+        raw_transitions = select_columns(raw_transitions, export_transitions)
+        raw_places.to_csv(os.path.join(native_run_dir, places_path), sep=';', index=False)
+        raw_transitions.to_csv(os.path.join(native_run_dir, transitions_path), sep=';', index=False)
+        if event_log is not None:
+            occ.reduction.events.write_event_log(event_log, os.path.join(native_run_dir, events_path))
+
+    output = {
+        'places': places_path_list,
+        'transitions': transitions_path_list
+    }
+    if event_log is not None:
+        output['events'] = events_path_list
+    return {
+        'solver': solver,
+        'seed': seed,
+        'output': output
+    }
+
+
+def select_columns(raw_frame, columns):
+    """Return raw_frame with its Time column and those of columns it has, in its own order. None selects all."""
+    if columns is None:
+        return raw_frame
+    columns = set(columns)
+    return raw_frame[[c for c in raw_frame.columns if c == 'Time' or c in columns]]
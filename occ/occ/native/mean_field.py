@@ -0,0 +1,154 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from occ.model import SystemModel
+from occ.model.ir import compile_ir
+from occ.native.trajectory import sample_times
+from pyspike.exe import SimArgs
+
+# Largest fraction of a unit's expected occupancy allowed to flow in one Runge-Kutta step
+MAX_STEP_FLOW = 0.1
+
+
+class MeanFieldModel:
+    """A SystemModel as ODEs in the expected occupancy of each place at each unit.
+
+    Neighbour places are assumed independent (mean field), so a follow
+    transition at unit u fires at rate * p(source, u) * (A @ p(target))[u],
+    where A is the medium graph's adjacency matrix. The adjacency matrix is
+    held in coordinate form and products computed with np.bincount, costing
+    O(edges) per evaluation.
+    """
+
+    def __init__(self, model: SystemModel):
+        ir = compile_ir(model)
+        self.number_units = ir.number_units
+        self.place_names = ir.place_names
+        self.family_names = ir.transition_names
+        self.initial_occupancy = ir.initial_marking.astype(float)
+
+        self.rows, self.columns = ir.adjacency.edges()
+        degree = ir.adjacency.degree
+
+        self.terms = []  # (family, arity, local places, neighbour place, stoichiometry, rate)
+        self.externals = []  # (family, delay, source, target, unit_list)
+        max_unit_rate = np.zeros(self.number_units)
+        for family in range(len(ir.transition_names)):
+            if not ir.stochastic[family]:
+                self.externals.append((family, ir.rate[family], ir.source[family], ir.target[family],
+                                       list(ir.external_units[family])))
+                continue
+            # with 0/1 occupancy mass action gives the same expected rate
+            rate = ir.rate[family]
+            arity = ir.arity[family]
+            # a place read twice at a unit needs only one token
+            local = np.flatnonzero(ir.pre[family] + ir.test[family])
+            neighbour = np.flatnonzero(ir.neighbour_test[family])
+            if len(neighbour) > 1:
+                raise NotImplementedError(
+                    f"Transition '{ir.transition_names[family]}' reads more than one place at its neighbours")
+            neighbour = neighbour[0] if len(neighbour) else None
+            max_unit_rate += rate * [1, degree, degree * (degree - 1)][arity]
+            self.terms.append((family, arity, local, neighbour, ir.stoichiometry[family], rate))
+        self.max_rate = max_unit_rate.max(initial=0)
+
+    def neighbour_sum(self, v):
+        """Return A @ v, the sum of v over each unit's neighbours."""
+        return np.bincount(self.rows, weights=v[self.columns], minlength=self.number_units)
+
+    def derivative(self, p):
+        """Return (dp/dt, expected firing rate of each transition family) for occupancy p (places, units)."""
+        dp = np.zeros_like(p)
+        family_rates = np.zeros(len(self.family_names))
+        for family, arity, local, neighbour, stoichiometry, rate in self.terms:
+            if arity == 2:
+                q = p[neighbour]
+                # Sum over ordered pairs of distinct neighbours of q[n1] * q[n2]
+                neighbours = self.neighbour_sum(q) ** 2 - self.neighbour_sum(q ** 2)
+            elif arity == 1:
+                neighbours = self.neighbour_sum(p[neighbour])
+            else:
+                neighbours = 1.
+            flux = rate * neighbours * p[local].prod(axis=0)
+            dp += stoichiometry[:, np.newaxis] * flux
+            family_rates[family] = flux.sum()
+        return dp, family_rates
+
+    def step(self, p, h):
+        """Return (p, expected firings) after one classic Runge-Kutta step of length h."""
+        k1, f1 = self.derivative(p)
+        k2, f2 = self.derivative(p + h / 2 * k1)
+        k3, f3 = self.derivative(p + h / 2 * k2)
+        k4, f4 = self.derivative(p + h * k3)
+        return p + h / 6 * (k1 + 2 * k2 + 2 * k3 + k4), h / 6 * (f1 + 2 * f2 + 2 * f3 + f4)
+
+    def integrate(self, p, duration):
+        """Return (p, expected firings) after integrating for duration."""
+        firings = np.zeros(len(self.family_names))
+        if duration <= 0:
+            return p, firings
+        number_steps = max(1, math.ceil(duration * self.max_rate / MAX_STEP_FLOW))
+        h = duration / number_steps
+        for _ in range(number_steps):
+            p, f = self.step(p, h)
+            firings += f
+        return p, firings
+
+    def fire_external(self, p, external):
+        """Return (p, expected firings) after an External transition fires with the probability it is enabled."""
+        family, _, source, target, unit_list = external
+        p = p.copy()
+        probability = np.prod(p[source, unit_list])
+        p[source, unit_list] -= probability
+        p[target, unit_list] += probability
+        return p, probability
+
+
+def simulate_mean_field(model: SystemModel, sim_args: SimArgs):
+    """Integrate the mean field ODEs of model returning (raw_places, raw_transitions) frames.
+
+    The places frame holds the expected (fractional) token counts, laid out as
+    Spike's places.csv. The transitions frame holds the expected number of
+    firings of each transition family in each sampling interval; there are no
+    coloured transition columns.
+
+    External transitions fire once at their delay time, with the probability
+    that all their source units are then occupied.
+    """
+    mf = MeanFieldModel(model)
+    times = sample_times(sim_args)
+    externals = sorted(mf.externals, key=lambda e: e[1])
+
+    p = mf.initial_occupancy
+    occupancy = np.empty((len(times),) + p.shape)
+    firings = np.zeros((len(times), len(mf.family_names)))
+    t = 0.
+    e = 0  # next external
+    for k, sample_time in enumerate(times):
+        # As in the stochastic solvers, an External due at a sample time fires after the sample is taken
+        while e < len(externals) and externals[e][1] < sample_time:
+            p, f = mf.integrate(p, externals[e][1] - t)
+            firings[k] += f
+            t = externals[e][1]
+            p, probability = mf.fire_external(p, externals[e])
+            firings[k, externals[e][0]] += probability
+            e += 1
+        p, f = mf.integrate(p, sample_time - t)
+        firings[k] += f
+        t = sample_time
+        occupancy[k] = p
+
+    place_sums = occupancy.sum(axis=2)
+    raw_places = pd.concat([
+        pd.DataFrame({'Time': times}),
+        pd.DataFrame(place_sums, columns=mf.place_names),
+        pd.DataFrame(occupancy.reshape(len(times), -1),
+                     columns=[f"{name}_{unit}" for name in mf.place_names for unit in range(mf.number_units)]),
+    ], axis=1)
+    raw_transitions = pd.concat([
+        pd.DataFrame({'Time': times}),
+        pd.DataFrame(firings, columns=mf.family_names),
+    ], axis=1)
+    return raw_places, raw_transitions
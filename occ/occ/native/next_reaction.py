@@ -0,0 +1,137 @@
+import numpy as np
+
+from occ.native.compile import CompiledModel
+from occ.native.direct import DeterministicSchedule
+from occ.native.trajectory import Trajectory
+
+
+class IndexedPriorityQueue:
+    """A tournament tree holding one key per index with O(log n) updates and O(1) access to the minimum.
+
+    Updates are vectorised: changing k keys costs O(log n) numpy operations
+    rather than k separate sifts.
+    """
+
+    def __init__(self, keys):
+        n = len(keys)
+        size = 1
+        while size < n:
+            size *= 2
+        self.size = size
+        self.value = np.full(2 * size, np.inf)
+        self.winner = np.zeros(2 * size, dtype=np.int64)
+        self.value[size:size + n] = keys
+        self.winner[size:] = np.arange(size)
+        level = size // 2
+        while level >= 1:
+            self._replay(np.arange(level, 2 * level))
+            level //= 2
+
+    def _replay(self, nodes):
+        left = 2 * nodes
+        right = left + 1
+        take_right = self.value[right] < self.value[left]
+        self.value[nodes] = np.where(take_right, self.value[right], self.value[left])
+        self.winner[nodes] = np.where(take_right, self.winner[right], self.winner[left])
+
+    def top(self):
+        """Return (key, index) of the smallest key."""
+        return self.value[1], self.winner[1]
+
+    def __getitem__(self, indexes):
+        return self.value[self.size + np.asarray(indexes)]
+
+    def update(self, indexes, keys):
+        nodes = self.size + np.asarray(indexes)
+        self.value[nodes] = keys
+        nodes = np.unique(nodes // 2)
+        while len(nodes) and nodes[-1] >= 1:
+            self._replay(nodes)
+            nodes = np.unique(nodes[nodes > 1] // 2)
+
+
+def build_dependency_index(cm: CompiledModel):
+    """Return a CSR index (indptr, indices) from each state index to the stochastic bindings reading it.
+
+    Every binding reads only places at its own unit and at its neighbours, so
+    the bindings which must be updated after a firing at unit u are those bound
+    to u or to one of u's neighbours in the medium graph.
+    """
+    pre = cm.pre[cm.stochastic]
+    bindings = np.repeat(np.arange(len(pre)), pre.shape[1])
+    states = pre.ravel()
+    keep = states != cm.one
+    bindings, states = bindings[keep], states[keep]
+    order = np.argsort(states, kind='stable')
+    indices = bindings[order]
+    indptr = np.searchsorted(states[order], np.arange(cm.number_states + 1))
+    return indptr, indices
+
+
+def dependents(cm: CompiledModel, dependency_index, binding):
+    """Return the stochastic bindings whose propensity may change when binding fires."""
+    indptr, indices = dependency_index
+    changed = cm.change_index[binding][cm.change_value[binding] != 0]
+    return np.unique(np.concatenate([indices[indptr[i]:indptr[i + 1]] for i in changed]))
+
+
+def simulate_next_reaction(cm: CompiledModel, times, rng) -> Trajectory:
+    """Simulate one run with Gibson and Bruck's next reaction method.
+
+    Putative firing times are kept in an indexed priority queue and after each
+    firing only the propensities of dependent bindings are updated, so an event
+    costs O(degree * log(number of bindings)) rather than O(number of bindings).
+    """
+    x = cm.initial_state.copy()
+    states = np.empty((len(times), cm.number_states), dtype=np.int64)
+    firings = np.zeros((len(times), cm.number_bindings), dtype=np.int64)
+    event_times, event_bindings = [], []
+    schedule = DeterministicSchedule(cm, x)
+    dependency_index = build_dependency_index(cm)
+
+    t = 0.
+    a = cm.propensities(x)
+    with np.errstate(divide='ignore'):
+        queue = IndexedPriorityQueue(t + rng.exponential(size=len(a)) / a)
+
+    k = 0  # next sample
+    while k < len(times):
+        t_stochastic, stochastic_binding = queue.top()
+        t_deterministic, deterministic_binding = schedule.next()
+        t_next = min(t_stochastic, t_deterministic)
+
+        # Record samples due before the next event
+        while k < len(times) and times[k] <= t_next:
+            states[k] = x[:cm.number_states]
+            k += 1
+        if k == len(times):
+            break
+
+        t = t_next
+        binding = deterministic_binding if t_deterministic <= t_stochastic else stochastic_binding
+        cm.fire(x, binding)
+        firings[k, binding] += 1
+        event_times.append(t)
+        event_bindings.append(binding)
+        if binding >= cm.number_stochastic:
+            schedule.fired(binding, x, t)
+        else:
+            schedule.update(x, t)
+
+        # Update putative times of affected bindings, reusing their random numbers (Gibson & Bruck)
+        affected = dependents(cm, dependency_index, binding)
+        a_old = a[affected]
+        a_new = cm.propensities(x, affected)
+        tau_old = queue[affected]
+        tau_new = np.full(len(affected), np.inf)
+        reuse = (a_old > 0) & (a_new > 0) & (affected != binding)
+        tau_new[reuse] = t + (a_old[reuse] / a_new[reuse]) * (tau_old[reuse] - t)
+        redraw = (a_new > 0) & ~reuse
+        tau_new[redraw] = t + rng.exponential(size=redraw.sum()) / a_new[redraw]
+        a[affected] = a_new
+        queue.update(affected, tau_new)
+        if binding < cm.number_stochastic and binding not in affected:
+            # A binding whose firing leaves its own propensity unchanged (e.g. read arcs only)
+            queue.update([binding], [t + rng.exponential() / a[binding]] if a[binding] > 0 else [np.inf])
+
+    return Trajectory(times=times, states=states, firings=firings, events=(event_times, event_bindings))
@@ -0,0 +1,164 @@
+import numpy as np
+
+from occ.native.compile import CompiledModel
+from occ.native.direct import DeterministicSchedule
+from occ.native.trajectory import Trajectory
+
+# Bound on the relative change in any place total during one leap (Cao, Gillespie & Petzold's epsilon)
+EPSILON = 0.03
+
+# Take an exact direct method step instead of leaping when fewer firings than this are expected in a leap
+MIN_LEAP_FIRINGS = 10
+
+# Smallest expected change in a reactant state over one leap. Cao et al. use 1 but with one token per unit
+# that lets a unit's neighbourhood change completely within a leap, noticeably slowing spread.
+MIN_LEAP_CHANGE = 0.5
+
+
+class _LeapIndex:
+    """Precomputed structure used to leap the stochastic bindings of a CompiledModel."""
+
+    def __init__(self, cm: CompiledModel):
+        s = cm.stochastic
+        change_index = cm.change_index[s]
+        change_value = cm.change_value[s]
+        self.number_states = cm.number_states
+        self.up_binding, up_column = np.nonzero(change_value == 1)
+        self.down_binding, down_column = np.nonzero(change_value == -1)
+        self.up = change_index[self.up_binding, up_column]
+        self.down = change_index[self.down_binding, down_column]
+
+        # States read by some stochastic binding, whose relative change bounds the leap size
+        self.reactants = np.zeros(cm.number_states + 1, dtype=bool)
+        self.reactants[cm.pre[s]] = True
+        self.reactants[cm.one] = False
+
+        # The state each binding consumes a token from (every stochastic occ transition consumes at most one)
+        consumed = np.where(change_value == -1, change_index, -1).max(axis=1)
+        if ((change_value < 0).sum(axis=1) > 1).any() or (np.abs(change_value) > 1).any():
+            raise NotImplementedError("tau leaping supports transitions moving at most one token per place")
+        self.free = np.flatnonzero(consumed == -1)
+        consuming = np.flatnonzero(consumed != -1)
+        order = np.argsort(consumed[consuming], kind='stable')
+        self.grouped = consuming[order]  # consuming bindings sorted by the state they consume
+        group_states = consumed[self.grouped]
+        self.group_starts = np.flatnonzero(np.r_[True, group_states[1:] != group_states[:-1]]) \
+            if len(group_states) else np.zeros(0, dtype=np.int64)
+        self.group_states = group_states[self.group_starts]
+        self.group_of = np.repeat(np.arange(len(self.group_starts)),
+                                  np.diff(np.r_[self.group_starts, len(self.grouped)]))
+
+
+def leap_size(index: _LeapIndex, a, x):
+    """Return a leap over which no reactant state is expected to change by more than EPSILON of itself.
+
+    This is Cao, Gillespie & Petzold's bound on the mean and variance of the
+    change in each reactant, taken over the unfolded (place, unit) states.
+    """
+    # Every change is +1 or -1 so the variance is the sum of the up and down rates
+    minlength = index.number_states + 1
+    up = np.bincount(index.up, a[index.up_binding], minlength)[index.reactants]
+    down = np.bincount(index.down, a[index.down_binding], minlength)[index.reactants]
+    mu = up - down
+    sigma2 = up + down
+    bound = np.maximum(EPSILON * x[index.reactants], MIN_LEAP_CHANGE)
+    with np.errstate(divide='ignore'):
+        return min(np.min(bound / np.abs(mu), initial=np.inf), np.min(bound ** 2 / sigma2, initial=np.inf))
+
+
+def leap_firings(index: _LeapIndex, a, x, tau, rng):
+    """Return the number of firings of each stochastic binding over a leap of length tau.
+
+    Bindings which consume from the same state are leapt together with a
+    binomial draw bounded by the tokens available, so no state goes negative.
+    Bindings which consume nothing fire a Poisson number of times.
+    """
+    counts = np.zeros(len(a), dtype=np.int64)
+    counts[index.free] = rng.poisson(a[index.free] * tau)
+    if not len(index.grouped):
+        return counts
+
+    a_grouped = a[index.grouped]
+    group_a = np.add.reduceat(a_grouped, index.group_starts)
+    tokens = x[index.group_states]
+    live = (group_a > 0) & (tokens > 0)
+    group_firings = np.zeros(len(group_a), dtype=np.int64)
+    group_firings[live] = rng.binomial(tokens[live], -np.expm1(-group_a[live] * tau / tokens[live]))
+
+    # Share each group's firings between its bindings in proportion to their propensity.
+    # A single firing (the usual case with one token per unit) goes to the winner of an exponential race.
+    racing = np.flatnonzero(group_firings[index.group_of] == 1)
+    if len(racing):
+        with np.errstate(divide='ignore'):
+            race = np.full(len(a_grouped), np.inf)
+            race[racing] = rng.exponential(size=len(racing)) / a_grouped[racing]
+        winners = racing[race[racing] == np.minimum.reduceat(race, index.group_starts)[index.group_of[racing]]]
+        counts[index.grouped[winners]] += 1
+    for g in np.flatnonzero(group_firings > 1):
+        stop = index.group_starts[g + 1] if g + 1 < len(index.group_starts) else len(a_grouped)
+        members = slice(index.group_starts[g], stop)
+        counts[index.grouped[members]] += rng.multinomial(
+            group_firings[g], a_grouped[members] / group_a[g])
+    return counts
+
+
+def simulate_tau_leap(cm: CompiledModel, times, rng) -> Trajectory:
+    """Simulate one run approximately with adaptive tau leaping.
+
+    Leap sizes are chosen (after Cao, Gillespie & Petzold) so that no place
+    total changes by more than EPSILON of itself, and leaps never cross a sample
+    time or a deterministic firing. When fewer than MIN_LEAP_FIRINGS firings are
+    expected in a leap an exact direct method step is taken instead.
+    """
+    index = _LeapIndex(cm)
+    x = cm.initial_state.copy()
+    states = np.empty((len(times), cm.number_states), dtype=np.int64)
+    firings = np.zeros((len(times), cm.number_bindings), dtype=np.int64)
+    schedule = DeterministicSchedule(cm, x)
+
+    t = 0.
+    k = 0  # next sample
+    while k < len(times):
+        # Record samples due before anything else happens
+        if times[k] <= t:
+            states[k] = x[:cm.number_states]
+            k += 1
+            continue
+
+        a = cm.propensities(x)
+        a0 = a.sum()
+        t_deterministic, deterministic_binding = schedule.next()
+        t_horizon = min(times[k], t_deterministic)
+        tau = leap_size(index, a, x) if a0 > 0 else np.inf
+
+        if a0 > 0 and tau * a0 < MIN_LEAP_FIRINGS:
+            # Exact step
+            t_stochastic = t + rng.exponential(1 / a0)
+            if t_stochastic < t_horizon:
+                t = t_stochastic
+                binding = min(np.searchsorted(np.cumsum(a), rng.random() * a0, side='right'),
+                              cm.number_stochastic - 1)
+                cm.fire(x, binding)
+                firings[k, binding] += 1
+                schedule.update(x, t)
+                continue
+            t_leap_end = t_horizon
+            counts = None
+        else:
+            t_leap_end = min(t + tau, t_horizon)
+            counts = leap_firings(index, a, x, t_leap_end - t, rng) if a0 > 0 else None
+
+        if counts is not None and counts.any():
+            fired = np.flatnonzero(counts)
+            np.add.at(x, cm.change_index[fired].ravel(),
+                      (cm.change_value[fired] * counts[fired, None]).ravel())
+            firings[k, :cm.number_stochastic] += counts
+        t = t_leap_end
+        schedule.update(x, t)
+
+        if t == t_deterministic and t < times[k]:
+            cm.fire(x, deterministic_binding)
+            firings[k, deterministic_binding] += 1
+            schedule.fired(deterministic_binding, x, t)
+
+    return Trajectory(times=times, states=states, firings=firings)
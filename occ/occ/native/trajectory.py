@@ -0,0 +1,112 @@
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from occ.native.compile import CompiledModel
+from occ.reduction.events import EVENT_LOG_COLUMNS
+from pyspike.exe import SimArgs
+
+
+@dataclass
+class Trajectory:
+    """Sampled output of one (or the average of several) simulation runs.
+
+    Row k of `states` holds the marking at `times[k]`, and row k of `firings`
+    the number of times each binding fired in [times[k-1], times[k]).
+    Exact solvers also record every firing in `events`.
+    """
+    times: np.ndarray  # (T,)
+    states: np.ndarray  # (T, S)
+    firings: np.ndarray  # (T, B)
+    events: Optional[Tuple[np.ndarray, np.ndarray]] = None  # (event times, bindings fired)
+
+
+def sample_times(sim_args: SimArgs):
+    """Return the times at which Spike would sample a run (the stop time is excluded).
+
+    Times are rounded so that they print as Spike's do (0.3 rather than 0.30000000000000004).
+    """
+    number_samples = int(round((sim_args.stop - sim_args.start) / sim_args.step))
+    return np.round(sim_args.start + sim_args.step * np.arange(number_samples), 12)
+
+
+def average(trajectories):
+    """Average a list of trajectories as Spike does when SimArgs.runs > 1.
+
+    Only the events of the first run are kept.
+    """
+    if len(trajectories) == 1:
+        return trajectories[0]
+    return Trajectory(
+        times=trajectories[0].times,
+        states=np.mean([t.states for t in trajectories], axis=0),
+        firings=np.mean([t.firings for t in trajectories], axis=0),
+        events=trajectories[0].events)
+
+
+def to_raw_frames(cm: CompiledModel, trajectory: Trajectory):
+    """Return (raw_places, raw_transitions) frames laid out as Spike's places.csv and transitions.csv.
+
+    Each frame has a Time column, a non-coloured sum column per place (or
+    transition) and a coloured column per unit (or binding).
+    """
+    times = trajectory.times
+    number_places = len(cm.place_names)
+    states = trajectory.states
+    place_sums = states.reshape(len(times), number_places, cm.number_units).sum(axis=2)
+    raw_places = pd.concat([
+        pd.DataFrame({'Time': times}),
+        pd.DataFrame(place_sums, columns=cm.place_names),
+        pd.DataFrame(states, columns=[f"{name}_{unit}" for name in cm.place_names
+                                      for unit in range(cm.number_units)]),
+    ], axis=1)
+
+    firings = trajectory.firings
+    family_sums = np.zeros((len(times), len(cm.family_names)), dtype=firings.dtype)
+    for i in range(len(cm.family_names)):
+        family_sums[:, i] = firings[:, cm.binding_family == i].sum(axis=1)
+    coloured = [i for i, column in enumerate(cm.binding_columns) if column is not None]
+    raw_transitions = pd.concat([
+        pd.DataFrame({'Time': times}),
+        pd.DataFrame(family_sums, columns=cm.family_names),
+        pd.DataFrame(firings[:, coloured], columns=[cm.binding_columns[i] for i in coloured]),
+    ], axis=1)
+
+    return raw_places, raw_transitions
+
+
+def to_event_log(cm: CompiledModel, trajectory: Trajectory):
+    """Return the events of a trajectory as a frame with columns EVENT_LOG_COLUMNS, or None if not recorded.
+
+    An External transition firing on several units gives one row per unit.
+    Unbound unit, neighbour and neighbour2 are NaN, as in tidy transitions frames.
+    """
+    if trajectory.events is None:
+        return None
+    event_times, bindings = trajectory.events
+    event_times = np.asarray(event_times, dtype=float)
+    bindings = np.asarray(bindings, dtype=np.int64)
+
+    # Expand each deterministic binding into the units it moves a token into
+    units = cm.binding_unit[bindings].astype(float)
+    expanded = np.arange(len(bindings))
+    unbound = np.flatnonzero(cm.binding_unit[bindings] == -1)
+    if len(unbound):
+        targets = [cm.change_index[b][cm.change_value[b] > 0] % cm.number_units for b in bindings[unbound]]
+        repeats = np.ones(len(bindings), dtype=np.int64)
+        repeats[unbound] = [len(t) for t in targets]
+        expanded = np.repeat(expanded, repeats)
+        units = np.repeat(units, repeats)
+        units[np.isin(expanded, unbound)] = np.concatenate(targets)
+
+    bindings = bindings[expanded]
+    frame = pd.DataFrame({
+        'time': event_times[expanded],
+        'name': np.array(cm.family_names, dtype=object)[cm.binding_family[bindings]],
+        'unit': units,
+        'neighbour': np.where(cm.binding_neighbour[bindings] == -1, np.nan, cm.binding_neighbour[bindings]),
+        'neighbour2': np.where(cm.binding_neighbour2[bindings] == -1, np.nan, cm.binding_neighbour2[bindings]),
+    })
+    return frame[EVENT_LOG_COLUMNS]
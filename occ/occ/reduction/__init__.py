@@ -1,3 +1,6 @@
 from occ.reduction.read import read_tidy_places, tidy_places, read_tidy_transitions, tidy_transitions, read_raw_csv, prepend_tidy_frame_with_tstep
 
-from occ.reduction.occasion_graph import generate_transition_events, generate_causal_graph, generate_place_increased_events
\ No newline at end of file
+from occ.reduction.occasion_graph import generate_transition_events, generate_causal_graph, generate_place_increased_events, \
+    generate_causal_graph_from_events
+from occ.reduction.tensor import PlaceTensor
+from occ.reduction.events import EVENT_LOG_COLUMNS, event_log_from_transitions, read_event_log, write_event_log
\ No newline at end of file
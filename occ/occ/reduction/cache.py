@@ -0,0 +1,174 @@
+import json
+import logging
+import os
+from dataclasses import dataclass
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from occ.reduction.read import read_raw_csv
+
+try:
+    import pyarrow.feather
+    ARROW_AVAILABLE = True
+except ImportError:
+    ARROW_AVAILABLE = False
+
+
+# Bump when the frames written to a cache change
+CACHE_VERSION = 1
+
+
+def read_raw_csv_cached(csv_path):
+    """Return read_raw_csv(csv_path), caching the frame in an Arrow IPC file next to csv_path.
+
+    The first call writes 'places.arrow' (for 'places.csv') and a stamp of
+    the csv file's size and modification time. Later calls memory map the
+    Arrow file instead of parsing the csv file, as long as the stamp still
+    matches. Without pyarrow, or if the cache cannot be written, the csv
+    file is always parsed.
+    """
+    arrow_path, stamp_path = cache_paths(csv_path)
+    stamp = _stamp(csv_path)
+    if ARROW_AVAILABLE and _read_stamp(stamp_path) == stamp:
+        try:
+            return pyarrow.feather.read_feather(arrow_path, memory_map=True)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable cache of '{csv_path}': {e}")
+
+    raw_frame = read_raw_csv(csv_path)
+    if ARROW_AVAILABLE:
+        try:
+            pyarrow.feather.write_feather(raw_frame, arrow_path, compression='uncompressed')
+            # Written last, so that an interrupted write leaves no valid stamp
+            with open(stamp_path, 'w') as f:
+                json.dump(stamp, f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Could not cache '{csv_path}': {e}")
+    return raw_frame
+
+
+def read_cached_columns(csv_path, columns):
+    """Return the columns of read_raw_csv(csv_path) from a valid cache written by read_raw_csv_cached, reading
+    only those columns from disk, or None if there is no valid cache."""
+    arrow_path, stamp_path = cache_paths(csv_path)
+    if not ARROW_AVAILABLE or _read_stamp(stamp_path) != _stamp(csv_path):
+        return None
+    try:
+        return pyarrow.feather.read_feather(arrow_path, columns=list(columns), memory_map=True)
+    except (OSError, ValueError) as e:
+        logging.warning(f"Ignoring unreadable cache of '{csv_path}': {e}")
+        return None
+
+
+def cache_paths(csv_path):
+    """Return the (Arrow file, stamp) paths caching csv_path."""
+    root = os.path.splitext(str(csv_path))[0]
+    return root + '.arrow', root + '.cache.json'
+
+
+def clear_cache(csv_path):
+    """Remove the cache and CountStore of csv_path."""
+    for path in cache_paths(csv_path) + store_paths(csv_path):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _stamp(csv_path):
+    stat = os.stat(csv_path)
+    return {'version': CACHE_VERSION, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _read_stamp(stamp_path):
+    try:
+        with open(stamp_path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+@dataclass
+class CountStore:
+    """The counts of a Spike csv file held in a memory mapped (time, column) array.
+
+    Processes opening the same store share the operating system's cached
+    pages of it rather than each holding a copy. Nothing is read from disk
+    until counts are sliced, so slices by time or column read only the
+    pages they need.
+    """
+    times: np.ndarray  # (T,)
+    columns: List[str]  # headers other than 'Time'
+    counts: np.ndarray  # (T, C), memory mapped
+    dtypes: List[str]  # dtype of each column in the csv file's raw frame
+
+    @property
+    def column_index(self):
+        return {column: i for i, column in enumerate(self.columns)}
+
+    def unit_columns(self, unit):
+        """Return the columns of unit, such as 'a_3' and 'f1ab_2_3' for unit 3."""
+        suffix = f"_{unit}"
+        return [c for c in self.columns if c.endswith(suffix)]
+
+    def time_slice(self, start=None, stop=None):
+        """Return the slice of rows with start <= time <= stop."""
+        first = 0 if start is None else int(np.searchsorted(self.times, start, side='left'))
+        last = len(self.times) if stop is None else int(np.searchsorted(self.times, stop, side='right'))
+        return slice(first, last)
+
+    def frame(self, start=None, stop=None, columns=None):
+        """Return the raw frame (as read_raw_csv would) of columns between times start and stop inclusive.
+
+        Rows are stored one after another, so only the pages holding the rows
+        selected are read from disk. Counts of a time slice of every column
+        are not copied, so the frame is read only.
+        """
+        rows = self.time_slice(start, stop)
+        if columns is None:
+            column_numbers = np.arange(len(self.columns))
+        else:
+            column_index = self.column_index
+            column_numbers = np.array([column_index[c] for c in columns], dtype=np.int64)
+        counts = self.counts[rows]
+        if columns is not None:
+            counts = counts[:, column_numbers]
+        frame = pd.DataFrame(np.asarray(counts), columns=[self.columns[i] for i in column_numbers])
+        dtypes = {self.columns[i]: self.dtypes[i] for i in column_numbers}
+        if set(dtypes.values()) - {str(counts.dtype)}:  # columns were upcast to share the store's dtype
+            frame = frame.astype(dtypes)
+        frame.insert(0, 'Time', self.times[rows])
+        return frame
+
+
+def open_count_store(csv_path) -> CountStore:
+    """Return a CountStore of the csv file at csv_path, writing it next to the file first if missing or stale.
+
+    The store is the files 'places.counts.npy', 'places.times.npy' and
+    'places.store.json' (for 'places.csv'), stamped as read_raw_csv_cached
+    stamps its cache.
+    """
+    counts_path, times_path, header_path = store_paths(csv_path)
+    stamp = _stamp(csv_path)
+    header = _read_stamp(header_path)
+    if header is None or header['stamp'] != stamp:
+        raw_frame = read_raw_csv_cached(csv_path)
+        columns = list(raw_frame.columns[1:])
+        values = raw_frame[columns].to_numpy() if columns else np.zeros((len(raw_frame), 0))
+        np.save(counts_path, values)
+        np.save(times_path, raw_frame['Time'].to_numpy())
+        header = {'stamp': stamp, 'columns': columns, 'dtypes': [str(raw_frame[c].dtype) for c in columns]}
+        # Written last, so that an interrupted write leaves no valid stamp
+        with open(header_path, 'w') as f:
+            json.dump(header, f)
+    return CountStore(
+        times=np.load(times_path),
+        columns=header['columns'],
+        counts=np.load(counts_path, mmap_mode='r'),
+        dtypes=header['dtypes'])
+
+
+def store_paths(csv_path):
+    """Return the (counts, times, header) paths of the CountStore of csv_path."""
+    root = os.path.splitext(str(csv_path))[0]
+    return root + '.counts.npy', root + '.times.npy', root + '.store.json'
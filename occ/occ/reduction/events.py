@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+
+# One row per transition firing. Unbound unit, neighbour and neighbour2 are NaN.
+EVENT_LOG_COLUMNS = ['time', 'name', 'unit', 'neighbour', 'neighbour2']
+
+
+def read_event_log(filename):
+    return pd.read_csv(filename, delimiter=';')
+
+
+def write_event_log(events, filename):
+    events.to_csv(filename, sep=';', index=False)
+
+
+def event_log_from_transitions(transitions):
+    """Return an event log from a tidy transitions frame such as SimulationResult.transitions.
+
+    Spike only records how many times each transition fired between samples,
+    so each firing is given the time of the sample which counted it. The log
+    is therefore only as precise as the sampling grid, and transitions without
+    coloured columns (such as External) are missing.
+    """
+    fired = transitions[transitions['count'] > 0]
+    repeats = np.round(fired['count']).astype(int)
+    events = fired.loc[fired.index.repeat(repeats), EVENT_LOG_COLUMNS]
+    return events.sort_values(by=['time', 'unit'], kind='stable').reset_index(drop=True)
@@ -2,9 +2,11 @@ import math
 from collections import namedtuple, defaultdict
 
 import networkx as nx
+import numpy as np
 import pandas as pd
 
 import pyspike.model
+from occ.reduction.tensor import PlaceTensor
 
 expand_transition_name = pyspike.model.Transition.expand_name  # TODO: hmm
 
@@ -18,7 +20,19 @@ def generate_place_increased_events(places_data_frame):
     :return:
     '''
     df = places_data_frame
-    df.sort_values(by=['time'])
+    tensor, rows = PlaceTensor._from_tidy(df)
+    if not _is_time_ordered_grid(rows, df):
+        return _generate_place_increased_events_by_group(df)
+
+    entered = tensor.changed() & (tensor.counts > 0)  # chance will go up > 1
+    df_out = df.iloc[np.sort(rows[entered])].copy()
+    del df_out['count']  # not required for current application and complicates tests
+    df_out['num'] = pd.to_numeric(df['num'], downcast='integer')
+
+    return df_out.sort_values(by=['time', 'name', 'num'])
+
+
+def _generate_place_increased_events_by_group(df):
     change_frame_list = []
 
     for num in df.num.unique():
@@ -36,6 +50,13 @@ def generate_place_increased_events(places_data_frame):
     return df_out.sort_values(by=['time', 'name', 'num'])
 
 
+def _is_time_ordered_grid(rows, df):
+    """Return True if a PlaceTensor's rows (see PlaceTensor._from_tidy) came from a frame df with exactly one row
+    for every (time, state, unit) in which each unit's state is listed in time order, as in a tidy places frame.
+    Diffs along the tensor's time axis then match diffs down each (unit, state) group of the frame."""
+    return (rows.size > 0 and rows.size == df['num'].notna().sum() and bool((rows >= 0).all())
+            and bool((np.diff(rows, axis=0) > 0).all()))
+
 
 # TODO: remove this forked version of generate_place_increased_events()
 
@@ -45,19 +66,12 @@ def filter_place_changed_events(df):
     :param df:
     :return:
     '''
-    df.sort_values(by=['time'])
-    change_frame_list = []
-    tstep_set = set()
-    for num in df.num.unique():
-        for state_name in df.name.unique():
-            df_num_name = df[(df.num == num) & (df.name == state_name)]
-            df_num_name_changed = df_num_name[df_num_name['count'].diff() != 0]
-            # df_num_name_entered = df_num_name_changed[df_num_name_changed['count'] > 0]  # chance will go up > 1
-            tstep_set.update(set(df_num_name_changed['tstep']))
-            # change_frame_list.append(df_num_name_changed)
-
-    tstep_list = list(tstep_set)
-    # tstep_list.sort()
+    tensor, rows = PlaceTensor._from_tidy(df)
+    if _is_time_ordered_grid(rows, df):
+        changed_rows = rows[tensor.changed_tsteps()].ravel()
+        tstep_list = list(set(df['tstep'].iloc[changed_rows]))
+    else:
+        tstep_list = _changed_tsteps_by_group(df)
 
     df_out = df[df['tstep'].isin(tstep_list)]
     # del df_out['count']  # not required for current application and complicates tests
@@ -66,6 +80,16 @@ def filter_place_changed_events(df):
     return df_out.sort_values(by=['time', 'name', 'num'])
 
 
+def _changed_tsteps_by_group(df):
+    tstep_set = set()
+    for num in df.num.unique():
+        for state_name in df.name.unique():
+            df_num_name = df[(df.num == num) & (df.name == state_name)]
+            df_num_name_changed = df_num_name[df_num_name['count'].diff() != 0]
+            tstep_set.update(set(df_num_name_changed['tstep']))
+    return list(tstep_set)
+
+
 def generate_transition_events(df):
     df = df[df['count'] > 0]
     return df.sort_values(by=['time', 'unit'])
@@ -129,6 +153,69 @@ def generate_causal_graph(place_change_events: DataFrame,
     return g
 
 
+def generate_causal_graph_from_events(places: DataFrame, events: DataFrame):
+    """Generate a causal graph in one pass over an event log (see occ.reduction.events).
+
+    The last occasion of each (unit, state) is tracked as the log is read, so
+    the occasions a transition prehends are known exactly rather than guessed
+    from sampled counts. Initial occasions are taken from the first sample in
+    the tidy places frame.
+
+    Events sharing a time (as in logs made from sampled counts) are reordered
+    where needed so that an occasion is created before it is prehended.
+    """
+    g = nx.DiGraph()  # Nodes are occasions and edges leading in their prehensions
+    last_occasion = {}  # (unit, state) -> Occasion
+
+    initial_time = places['time'].min()
+    initial_occasions = places[(places['time'] == initial_time) & (places['count'] > 0)]
+    initial_occasions = initial_occasions.sort_values(by=['num', 'name'])
+    for occ in initial_occasions.itertuples():
+        occasion = Occasion(int(occ.num), occ.name, occ.time)
+        g.add_node(occasion)
+        last_occasion[(occasion.unit, occasion.state)] = occasion
+
+    def inputs(event):
+        prefix, input_state, output_state = expand_transition_name(event.name)
+        keys = [(int(event.unit), input_state)]
+        for neighbour in (event.neighbour, event.neighbour2):
+            if not math.isnan(neighbour):
+                keys.append((int(neighbour), output_state))
+        return output_state, keys
+
+    def add_event(event, output_state, input_keys):
+        output_occasion = Occasion(int(event.unit), output_state, event.time)
+        g.add_node(output_occasion)
+        for key in input_keys:
+            if key in last_occasion:
+                g.add_edge(last_occasion[key], output_occasion)
+        last_occasion[(output_occasion.unit, output_state)] = output_occasion
+
+    def add_same_time_events(same_time_events):
+        pending = [(event,) + inputs(event) for event in same_time_events]
+        while pending:
+            waiting = [p for p in pending if not all(key in last_occasion for key in p[2][1:])]
+            if len(waiting) == len(pending):
+                waiting = []  # Prehended occasions missing from the log
+            waiting_ids = {id(w) for w in waiting}
+            for p in pending:
+                if id(p) not in waiting_ids:
+                    add_event(*p)
+            pending = waiting
+
+    # Sort once (stably, keeping the log's order within a time) and collect runs of equal times
+    same_time_events = []
+    for event in events.sort_values(by='time', kind='mergesort').itertuples():
+        if same_time_events and event.time != same_time_events[0].time:
+            add_same_time_events(same_time_events)
+            same_time_events = []
+        same_time_events.append(event)
+    if same_time_events:
+        add_same_time_events(same_time_events)
+
+    return g
+
+
     # def determine_earliest_unused_transition
 
 
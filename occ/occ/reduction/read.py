@@ -1,3 +1,7 @@
+import functools
+import logging
+
+import numpy as np
 import pandas as pd
 
 #%% Read and filter data
@@ -25,75 +29,225 @@ def read_tidy_csv(filename, node_type, filter_name_list=None, drop_non_coloured_
         raise TypeError(f"Unexpected type '{node_type}'")
 
 
-def read_tidy_places(filename, filter_name_list=None, drop_non_coloured_sums=False):
+def read_tidy_places(filename, filter_name_list=None, drop_non_coloured_sums=False, compact=False,
+                     unit_list=None, time_range=None):
+    """Read a Spike places csv file as tidy_places would tidy it.
 
-    raw_frame = read_raw_csv(filename)
-    frame = tidy_places(raw_frame, drop_non_coloured_sums)
-    if filter_name_list:
-        frame = filter_by_name(frame, list(filter_name_list))
+    filter_name_list (place names), unit_list (units of coloured columns)
+    and time_range (start, stop) inclusive select what is read from the
+    file, so asking for one place costs little more than reading its columns.
+    """
+    return _read_tidy_selection(filename, tidy_places, _place_headers, filter_name_list,
+                                drop_non_coloured_sums, compact, unit_list, time_range)
 
-    return frame
+
+def read_tidy_transitions(filename, filter_name_list=None, drop_non_coloured_sums=False, compact=False,
+                          unit_list=None, time_range=None, drop_zero_counts=False):
+    """Read a Spike transitions csv file as tidy_transitions would tidy it.
+
+    filter_name_list (transition names), unit_list (units bound, the last
+    number in a column's header) and time_range (start, stop) inclusive
+    select what is read from the file.
+    """
+    tidy = functools.partial(tidy_transitions, drop_zero_counts=drop_zero_counts)
+    return _read_tidy_selection(filename, tidy, _transition_headers, filter_name_list,
+                                drop_non_coloured_sums, compact, unit_list, time_range)
 
 
-def read_tidy_transitions(filename, filter_name_list=None, drop_non_coloured_sums=False):
-    raw_frame = read_raw_csv(filename)
-    frame = tidy_transitions(raw_frame, drop_non_coloured_sums)
-    if filter_name_list:
-        frame = filter_by_name(frame, list(filter_name_list))
+def _read_tidy_selection(filename, tidy, parse_headers, name_list, drop_non_coloured_sums, compact,
+                         unit_list, time_range):
+    if not name_list and unit_list is None and time_range is None:
+        return tidy(read_raw_csv(filename), drop_non_coloured_sums, compact)
+
+    with open(filename, 'r') as f:
+        columns = [c for c in f.readline().rstrip('\r\n').split(';') if c != 'Time']
+    names, nums = parse_headers(columns)
+    keep = np.ones(len(columns), dtype=bool)
+    if name_list:
+        keep &= np.isin(names, list(name_list))
+    if unit_list is not None:
+        keep &= _split_place_columns(columns)[1].isin(list(unit_list)).to_numpy()
+    usecols = ['Time'] + [c for c, k in zip(columns, keep) if k]
+    rows = None if time_range is None else _rows_in_time_range(filename, *time_range)
+
+    frame = tidy(_read_raw_csv_selection(filename, usecols, rows), drop_non_coloured_sums, compact)
+    frame.index = pd.RangeIndex(len(frame))
+    if not compact:
+        # Give nums the dtypes they would have had were every column read (float if any is NaN)
+        frame = frame.astype({key: values.dtype for key, values in nums.items()})
     return frame
 
 
-def tidy_places(raw_frame, drop_non_coloured_sums=False):
-    frame = pd.melt(raw_frame, id_vars=['Time'])
-    frame['type'] = 'place'
-    # Expand variable name into name and node
-    # r: separate(node, into = c("name", "num"), "sep" = "_(?!.*_)", fill = "right", extra = "merge")
-    frame['name'], frame['num'] = frame['variable'].str.rsplit('_', 1).str
-    del frame['variable']
-    frame = frame.reindex(columns=['Time', 'type', 'name', 'num', 'value'])
-    frame['Time'] = pd.to_numeric(frame['Time'], errors='coerce')
-    frame['num'] = pd.to_numeric(frame['num'], errors='coerce')
+def _read_raw_csv_selection(filename, usecols, rows=None):
+    """Return the usecols columns and (if given, a range of) rows of read_raw_csv(filename).
+
+    They are read from a valid Arrow cache of the file (see
+    occ.reduction.cache) if there is one. Otherwise the csv parser skips
+    the rows before the range and stops after it, though it must still
+    tokenize every column of the rows it reads.
+    """
+    import occ.reduction.cache  # imports this module
+    frame = occ.reduction.cache.read_cached_columns(filename, usecols)
+    if frame is not None:
+        return frame if rows is None else frame.iloc[rows.start:rows.stop].reset_index(drop=True)
+    if rows is None:
+        return pd.read_csv(filename, delimiter=';', usecols=usecols)
+    # Row 0 of the file is the header
+    return pd.read_csv(filename, delimiter=';', usecols=usecols, skiprows=range(1, rows.start + 1),
+                       nrows=len(rows))
+
+
+def _rows_in_time_range(filename, start, stop):
+    """Return the range of rows of filename with start <= Time <= stop.
 
-    # frame = frame.astype({'num': np.int16, 'Time': float}, errors='coerce')
+    Spike writes times in increasing order, so the bounds are found by
+    binary search of the Time column, read alone from the Arrow cache if
+    valid or else from the csv file.
+    """
+    import occ.reduction.cache  # imports this module
+    frame = occ.reduction.cache.read_cached_columns(filename, ['Time'])
+    if frame is None:
+        frame = pd.read_csv(filename, delimiter=';', usecols=['Time'])
+    times = frame['Time'].to_numpy()
+    return range(int(np.searchsorted(times, start, side='left')), int(np.searchsorted(times, stop, side='right')))
+
+
+def _place_headers(columns):
+    """Return the (names, {'num': nums}) tidy_places parses from columns."""
+    names, nums = _split_place_columns(columns)
+    return names, {'num': nums}
+
+
+def _transition_headers(columns):
+    """Return the (names, {'unit': units, 'neighbour': ..., 'neighbour2': ...}) tidy_transitions parses from
+    columns."""
+    headers = pd.Series(columns, dtype=object).str.extract(TRANSITION_COL_RE)
+    nums = {key: pd.to_numeric(headers[key], errors='coerce') for key in ('unit', 'neighbour', 'neighbour2')}
+    return headers['name'].to_numpy(dtype=object), nums
+
+
+def tidy_places(raw_frame, drop_non_coloured_sums=False, compact=False, tstep=False):
+    """Return the wide places frame raw_frame as a long frame with a row per (Time, column).
+
+    Column headers are parsed once, into a name and a num (the unit, or NaN
+    for a place's non-coloured sum), and broadcast to every time. If compact
+    is True name is categorical and num an integer (nullable if sums are kept).
+    If tstep is True a first column numbering the times is included, as
+    prepend_tidy_frame_with_tstep would add.
+    """
+    columns = [c for c in raw_frame.columns if c != 'Time']
+    number_times = len(raw_frame)
+    names, nums = _split_place_columns(columns)
+
+    keep = np.ones(len(columns), dtype=bool)
     if drop_non_coloured_sums:
+        keep = nums.notna().to_numpy()
+    kept = np.flatnonzero(keep)
+    rows = np.repeat(kept, number_times)
+
+    times = pd.to_numeric(raw_frame['Time'], errors='coerce').to_numpy()
+    frame = pd.DataFrame({
+        'time': np.tile(times, len(kept)),
+        'type': 'place',
+        'name': _broadcast_names(names, rows, compact),
+        'num': _broadcast_nums(nums, rows, compact),
+        'count': raw_frame[columns].to_numpy()[:, kept].ravel('F'),
+    })
+    # Label rows as pd.melt would have, before dropping
+    frame.index = pd.RangeIndex(len(frame)) if keep.all() else \
+        pd.Index(rows * number_times + np.tile(np.arange(number_times), len(kept)))
+    if drop_non_coloured_sums and (frame['time'].isna().any() or frame['count'].isna().any()):
         frame.dropna(inplace=True)
-    frame.rename(columns={'Time': 'time', 'value': 'count'}, inplace=True)
+    if tstep:
+        if len(frame) == len(kept) * number_times:
+            frame.insert(0, 'tstep', _tsteps(times, len(kept)))
+        else:  # rows with missing values were dropped
+            frame.insert(0, 'tstep', _tsteps(frame['time'].to_numpy(), 1))
     return frame
 
 
+def _split_place_columns(columns):
+    """Return (names, nums) of place column headers such as 'a_2' or 'a', splitting on the last '_'."""
+    split = [c.rsplit('_', 1) for c in columns]
+    names = np.array([s[0] for s in split] if split else [], dtype=object)
+    nums = pd.to_numeric(pd.Series([s[1] if len(s) == 2 else np.nan for s in split], dtype=object),
+                         errors='coerce')
+    return names, nums
+
+
+def _broadcast_names(names, rows, compact):
+    if not compact:
+        return names[rows]
+    names = pd.Categorical(names)
+    return pd.Categorical.from_codes(names.codes[rows], names.categories)
+
+
+def _broadcast_nums(nums, rows, compact):
+    nums = nums.to_numpy()[rows]
+    if not compact:
+        return nums
+    if np.isnan(nums.astype(float)).any():
+        return pd.array(nums, dtype='Int32')
+    return nums.astype(np.int32)
+
 
 # The one below worked well for just the is_neighbour func, but was not ready for are_both_neighbours
 # TRANSITION_COL_RE = r"(?P<name>[^\W_]+)(?:_+)(?P<neighbour>[0-9]+)(?:_*)(?P<unit>[^\W_]+)*"
 TRANSITION_COL_RE = r"(?P<name>[^\W_]+)(?:_+)(?P<neighbour>[0-9]+)(?:_*)(?P<neighbour2>[0-9]+(?=(?:_+)[^\W_]+))*(?:_*)(?P<unit>[0-9]+)*"
 
-def tidy_transitions(raw_frame, drop_non_coloured_sums=False):
-    frame = pd.melt(raw_frame, id_vars=['Time'])
-    frame['type'] = 'transition'
-    # Expand variable name into name and node
-        # r: separate(node, into = c("name", "num"), "sep" = "_(?!.*_)", fill = "right", extra = "merge")
-
-    new_col_frame = frame['variable'].str.extract(TRANSITION_COL_RE)
-    del frame['variable']
-    frame['name'] = new_col_frame['name']
-    frame['unit'] = new_col_frame['unit']
-    frame['neighbour'] = new_col_frame['neighbour']
-    frame['neighbour2'] = new_col_frame['neighbour2']
-    frame = frame.reindex(columns=['Time', 'type', 'name', 'unit', 'neighbour', 'neighbour2', 'value'])
-    # frame = frame.astype({'unit': int, 'neighbour': int, 'Time': float}, errors='ignore')
-    frame['Time'] = pd.to_numeric(frame['Time'], errors='coerce')
+def tidy_transitions(raw_frame, drop_non_coloured_sums=False, compact=False, tstep=False, drop_zero_counts=False):
+    """Return the wide transitions frame raw_frame as a long frame with a row per (Time, column).
+
+    TRANSITION_COL_RE is applied once per column header, giving the name,
+    unit, neighbour and neighbour2 broadcast to every time. Columns it does
+    not match (such as non-coloured sums) have NaN for all four. If compact is
+    True name is categorical and unit, neighbour and neighbour2 are (nullable)
+    integers. If tstep is True a first column numbering the times is included,
+    as prepend_tidy_frame_with_tstep would add.
+
+    If drop_zero_counts is True only the rows of non-zero counts are built,
+    found directly in the wide matrix, so the frame grows with the number of
+    firings rather than times x bindings. It equals frame[frame['count'] != 0]
+    of the full frame, row labels included.
+    """
+    # msg not implemented in python yet
+    # r: extract(node, c("name", "num", "msg"), "([^\\W_]+)(?:_+)([0-9]+)(?:_*)([^\\W_]+)*")
+    columns = [c for c in raw_frame.columns if c != 'Time']
+    number_times = len(raw_frame)
     # Int columns can't have NaN!
     # See https://stackoverflow.com/questions/11548005/numpy-or-pandas-keeping-array-type-as-integer-while-having-a-nan-value
-    frame['unit'] = pd.to_numeric(frame['unit'], errors='coerce')
-    frame['neighbour'] = pd.to_numeric(frame['neighbour'], errors='coerce')
-    frame['neighbour2'] = pd.to_numeric(frame['neighbour2'], errors='coerce')
+    names, nums = _transition_headers(columns)
 
+    keep = np.ones(len(columns), dtype=bool)
     if drop_non_coloured_sums:
-        frame.dropna(subset=['neighbour'], inplace=True)
-    # msg not implemented in python yet
-    # r: extract(node, c("name", "num", "msg"), "([^\\W_]+)(?:_+)([0-9]+)(?:_*)([^\\W_]+)*")
+        keep = nums['neighbour'].notna().to_numpy()
+    kept = np.flatnonzero(keep)
+    counts = raw_frame[columns].to_numpy()[:, kept]
+    times = pd.to_numeric(raw_frame['Time'], errors='coerce').to_numpy()
+    if drop_zero_counts:
+        # (column, time) of each non-zero count, ordered by column then time as the full frame's rows
+        kept_entries, time_entries = np.nonzero(counts.T)
+        rows = kept[kept_entries]
+        counts = counts[time_entries, kept_entries]
+    else:
+        rows = np.repeat(kept, number_times)
+        time_entries = np.tile(np.arange(number_times), len(kept))
+        counts = counts.ravel('F')
 
-    # Reorder columns
-    frame.rename(columns={'Time': 'time', 'value': 'count'}, inplace=True)
+    frame = pd.DataFrame({
+        'time': times[time_entries],
+        'type': 'transition',
+        'name': _broadcast_names(names, rows, compact),
+        'unit': _broadcast_nums(nums['unit'], rows, compact),
+        'neighbour': _broadcast_nums(nums['neighbour'], rows, compact),
+        'neighbour2': _broadcast_nums(nums['neighbour2'], rows, compact),
+        'count': counts,
+    })
+    # Label rows as pd.melt would have, before dropping
+    if drop_zero_counts or not keep.all():
+        frame.index = pd.Index(rows * number_times + time_entries)
+    if tstep:
+        frame.insert(0, 'tstep', _tsteps(times, 1)[time_entries])
     return frame
 
 
@@ -113,7 +267,30 @@ def determine_time_range_of_data_frame(df):
 
 
 def prepend_tidy_frame_with_tstep(frame):
-    # TODO: probably very slow!
-    z = {v: i for i, v in enumerate(frame['time'].unique())}
-    frame.insert(0, 'tstep', frame['time'].map(z))
-    return frame
\ No newline at end of file
+    """Insert a first column numbering the unique times of frame, in the order they first appear.
+
+    Pass tstep=True to tidy_places or tidy_transitions instead to number the
+    times as the frame is built.
+    """
+    frame.insert(0, 'tstep', _tsteps(frame['time'].to_numpy(), 1))
+    return frame
+
+
+# Times closer than this (relative to the step between them) are taken to be the same time printed with float drift
+TSTEP_TOLERANCE = 1e-6
+
+
+def _tsteps(times, repeats):
+    """Return the tstep of each of times, tiled repeats times.
+
+    Times are numbered by exact value in the order they first appear. If two
+    distinct times are within TSTEP_TOLERANCE of each other (such as 0.3 and
+    0.30000000000000004) they are given separate tsteps, so a warning is logged.
+    """
+    codes, uniques = pd.factorize(times, sort=False)
+    ordered = np.sort(uniques)
+    if len(ordered) > 2:
+        gaps = np.diff(ordered)
+        if (gaps < TSTEP_TOLERANCE * np.median(gaps)).any():
+            logging.warning("Some times differ only by float drift so are given separate tsteps")
+    return np.tile(codes.astype(np.int64), repeats)
\ No newline at end of file
@@ -0,0 +1,109 @@
+from dataclasses import dataclass
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from occ.reduction.read import _split_place_columns
+
+
+@dataclass
+class PlaceTensor:
+    """Coloured place counts held densely as a (tstep, state, unit) array.
+
+    Axis 0 follows `times` (the tstep column of a tidy places frame), axis 1
+    follows `states` and axis 2 follows `units`. Slicing out a state, unit or
+    tstep returns a view rather than filtering a long frame.
+    """
+    counts: np.ndarray  # (T, S, U)
+    times: np.ndarray  # (T,)
+    states: List[str]
+    units: np.ndarray  # (U,)
+
+    @property
+    def state_index(self):
+        return {name: i for i, name in enumerate(self.states)}
+
+    @property
+    def unit_index(self):
+        return {unit: i for i, unit in enumerate(self.units.tolist())}
+
+    def state(self, name):
+        """Return the (T, U) counts of state name."""
+        return self.counts[:, self.state_index[name], :]
+
+    def unit(self, unit):
+        """Return the (T, S) counts of unit."""
+        return self.counts[:, :, self.unit_index[unit]]
+
+    def at(self, tstep):
+        """Return the (S, U) counts at tstep."""
+        return self.counts[tstep]
+
+    def changed(self):
+        """Return a (T, S, U) bool array, True where a count differs from the tstep before (and at tstep 0)."""
+        changed = np.ones(self.counts.shape, dtype=bool)
+        changed[1:] = self.counts[1:] != self.counts[:-1]
+        return changed
+
+    def changed_tsteps(self):
+        """Return the tsteps at which any count changed, including tstep 0."""
+        return np.flatnonzero(self.changed().any(axis=(1, 2)))
+
+    @classmethod
+    def from_raw(cls, raw_places):
+        """Return the coloured columns of a wide places frame (as read from places.csv).
+
+        Counts of (state, unit) pairs without a column are zero.
+        """
+        columns = raw_places.columns[1:]
+        names, nums = _split_place_columns(columns)
+        coloured = np.flatnonzero(nums.notna().to_numpy())
+        state_codes, states = pd.factorize(names[coloured], sort=True)
+        unit_codes, units = pd.factorize(nums.to_numpy()[coloured].astype(np.int64), sort=True)
+
+        values = raw_places[columns].to_numpy()[:, coloured]
+        counts = np.zeros((len(raw_places), len(states), len(units)), dtype=values.dtype)
+        counts[:, state_codes, unit_codes] = values
+        times = pd.to_numeric(raw_places['Time'], errors='coerce').to_numpy()
+        return cls(counts, times, list(states), np.asarray(units))
+
+    @classmethod
+    def from_tidy(cls, places):
+        """Return the coloured rows of a tidy places frame (see occ.reduction.read.tidy_places).
+
+        Times are numbered in the order they first appear. Counts of
+        (time, state, unit) triples without a row are zero.
+        """
+        return cls._from_tidy(places)[0]
+
+    @classmethod
+    def _from_tidy(cls, places):
+        """Return (tensor, rows), where rows holds the position in places of each count or -1 if it had no row."""
+        coloured = np.flatnonzero(places['num'].notna().to_numpy())
+        frame = places.iloc[coloured]
+        time_codes, times = pd.factorize(frame['time'], sort=False)
+        state_codes, states = pd.factorize(np.asarray(frame['name'], dtype=object), sort=True)
+        unit_codes, units = pd.factorize(frame['num'].to_numpy().astype(np.int64), sort=True)
+
+        shape = (len(times), len(states), len(units))
+        values = frame['count'].to_numpy()
+        counts = np.zeros(shape, dtype=values.dtype)
+        counts[time_codes, state_codes, unit_codes] = values
+        rows = np.full(shape, -1, dtype=np.int64)
+        rows[time_codes, state_codes, unit_codes] = coloured
+        return cls(counts, np.asarray(times), list(states), np.asarray(units)), rows
+
+    def to_tidy(self):
+        """Return a tidy places frame, as tidy_places(..., tstep=True) would, with rows ordered by state, unit then
+        tstep."""
+        number_times, number_states, number_units = self.counts.shape
+        number_columns = number_states * number_units
+        return pd.DataFrame({
+            'tstep': np.tile(np.arange(number_times), number_columns),
+            'time': np.tile(self.times, number_columns),
+            'type': 'place',
+            'name': np.repeat(np.array(self.states, dtype=object), number_units * number_times),
+            'num': np.tile(np.repeat(self.units, number_times), number_states),
+            'count': self.counts.reshape(number_times, number_columns).ravel('F'),
+        })
@@ -1,17 +1,26 @@
 import dataclasses
+import hashlib
 import json
 import logging
 import os
 import pathlib
 import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 
 import networkx as nx
+import numpy as np
 import pandas as pd
 
+import occ.native
 import occ.reduction
+import occ.reduction.cache
 import pyspike.exe
+import pyspike.model
+import pyspike.spcconf
+from occ.export import Export, export_lists
 from occ.model import SystemModel
+from occ.reduction.tensor import PlaceTensor
 from pyspike.exe import SimArgs
 
 
@@ -32,22 +41,76 @@ logging.basicConfig(level=logging.INFO)
 # Set default scan location to 'runs' folder in top level of occmodeler dir
 BASEDIR = str(pathlib.Path(os.path.abspath(__file__)).parents[2] / 'runs')
 
+# 'spike' calls the Spike binary. 'native' simulates in process with occ.native (see occ.native.SOLVERS).
+BACKENDS = ('spike', 'native')
 
+# Maps the fingerprint of each run in a basedir to its number (see find_run)
+RUN_INDEX_FILE_NAME = 'fingerprints.json'
+
+
+
+
+class _Frame:
+    """A frame of a SimulationResult. A result loaded lazily from a run directory reads it with its
+    _FRAME_LOADERS entry the first time it is used and caches it until release_frames is called."""
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, sim_result, owner=None):
+        if sim_result is None:
+            return None  # the dataclass default
+        if self.name not in sim_result.__dict__:
+            sim_result.__dict__[self.name] = _FRAME_LOADERS[self.name](sim_result)
+        return sim_result.__dict__[self.name]
+
+    def __set__(self, sim_result, frame):
+        sim_result.__dict__[self.name] = frame
 
 
-# TODO: provide option to create in a lzy way from a run directory
 @dataclass
 class SimulationResult:
+    """The frames of a run with its model and sim_args.
+
+    A result loaded lazily from a run directory (see load) reads each frame
+    the first time it is used and caches it until release_frames is called.
+    """
     run: dict  # with keys: dir and optionally num
     model: SystemModel
     sim_args: SimArgs
-    places: pd.DataFrame  # drop_non_coloured_sums=True
-    transitions: pd.DataFrame  # drop_non_coloured_sums=True
-    raw_places: pd.DataFrame
-    raw_transitions: pd.DataFrame
+    places: pd.DataFrame = _Frame()  # drop_non_coloured_sums=True
+    transitions: pd.DataFrame = _Frame()  # drop_non_coloured_sums=True, drop_zero_counts=True
+    raw_places: pd.DataFrame = _Frame()
+    raw_transitions: pd.DataFrame = _Frame()
+    events: pd.DataFrame = _Frame()  # exact event log (see occ.reduction.events) if the solver recorded one
+    export: Export = dataclasses.field(default_factory=Export)  # columns written by the run
     # place_sums: pd.DataFrame
     # transition_sums: pd.DataFrame
-
+    _place_tensor: PlaceTensor = dataclasses.field(default=None, init=False, repr=False, compare=False)
+    # csv files the frames can be (re)loaded from, keyed as backend manifests' output
+    _output_paths: dict = dataclasses.field(default_factory=dict, init=False, repr=False, compare=False)
+
+    def release_frames(self):
+        """Drop the frames cached by a result loaded from a run directory. They are read again when next used."""
+        if not self._output_paths:
+            return  # nowhere to read them from again
+        for name in _FRAME_LOADERS:
+            self.__dict__.pop(name, None)
+        self._place_tensor = None
+
+    @property
+    def place_tensor(self) -> PlaceTensor:
+        """Coloured place counts as a dense (tstep, state, unit) array. Built from raw_places on first use."""
+        if self._place_tensor is None:
+            self._place_tensor = PlaceTensor.from_raw(self.raw_places)
+        return self._place_tensor
+
+    def open_store(self, kind='places') -> occ.reduction.cache.CountStore:
+        """Memory map the counts of this run's 'places' or 'transitions' csv file (see
+        occ.reduction.cache.CountStore), writing the store into the run directory on first use."""
+        if kind not in self._output_paths:
+            raise ValueError(f"{self} has no {kind} output file in a run directory to store counts of")
+        return occ.reduction.cache.open_count_store(self._output_paths[kind])
 
     def __str__(self):
         s = 'SimulationResult: '
@@ -61,13 +124,46 @@ class SimulationResult:
     __repr__ = __str__
 
 
-def run_in_dir(model: SystemModel, sim_args: SimArgs, run_dir) -> SimulationResult:
+def run_in_dir(model: SystemModel, sim_args: SimArgs, run_dir,
+               backend='spike', solver='direct', seed=None, workers=1, spike_processes=1,
+               export: Export = None) -> SimulationResult:
+    """Simulate model in run_dir (see write_run_dir) and return the loaded SimulationResult."""
+    write_run_dir(model, sim_args, run_dir, backend=backend, solver=solver, seed=seed, workers=workers,
+                  spike_processes=spike_processes, export=export)
+
+    if OCCDASH_AVAILABLE:
+        occdash.manage.reload_dash_server()
+
+    return create_simulation_result(model, run_dir)
+
+
+def write_run_dir(model: SystemModel, sim_args: SimArgs, run_dir,
+                  backend='spike', solver='direct', seed=None, workers=1, spike_processes=1,
+                  export: Export = None) -> dict:
+    """Simulate model in run_dir with the given backend, returning the manifest written without loading any output.
+    solver and seed are used by the native backend only.
+
+    export selects the places and transitions written to the output files
+    (see occ.export.Export); by default everything is. It is recorded in the
+    manifest.
+
+    When workers > 1 and sim_args.repeat_sim > 1 the repeats are run concurrently
+    on a pool of worker processes (see _run_repeats_in_pool). Otherwise, with
+    spike_processes > 1 the Spike backend splits sim_args.runs between that many
+    concurrent Spike processes (see pyspike.exe.run_in_dir).
+    """
+
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}'. Expected one of: {BACKENDS}")
+    if export is None:
+        export = Export()
+    export_places, export_transitions = export_lists(model, export)
 
     # Create dirs
     assert not os.listdir(run_dir), f"'{run_dir} is not empty'"
-    spike_run_dir = os.path.join(run_dir, 'spike')
+    backend_run_dir = os.path.join(run_dir, backend)
     model_dir = os.path.join(run_dir, 'model')
-    os.makedirs(spike_run_dir)
+    os.makedirs(backend_run_dir)
     os.makedirs(model_dir)
 
     # Move offsets from places onto graph
@@ -83,64 +179,146 @@ def run_in_dir(model: SystemModel, sim_args: SimArgs, run_dir) -> SimulationResu
     system_model = {'unit': None, 'network': 'model/medium_graph.gml',
                     'network_name': model.network_name, 'marking': None}
 
-    # Run spike
-    candl_file_path = model.unit.to_candl_string(model.network, model.network_name)
-    spike_manifest_dict = pyspike.exe.run_in_dir(candl_file_path, sim_args, spike_run_dir)
+    if workers > 1 and sim_args.repeat_sim > 1:
+        backend_manifest_dict = _run_repeats_in_pool(
+            model, sim_args, backend_run_dir, backend, solver, seed, workers, export_places, export_transitions)
+    elif backend == 'spike':
+        # Run spike
+        backend_manifest_dict = pyspike.exe.run_in_dir(
+            _candl_writer(model), sim_args, backend_run_dir, processes=spike_processes,
+            export_places=export_places, export_transitions=export_transitions)
+    else:
+        backend_manifest_dict = occ.native.run_in_dir(
+            model, sim_args, backend_run_dir, solver=solver, seed=seed,
+            export_places=export_places, export_transitions=export_transitions)
 
     # Create manifest
     manifest = {
         'model': system_model,
         'sim_args': dataclasses.asdict(sim_args),
-        'spike': dict(spike_manifest_dict)
+        'fingerprint': fingerprint(model, sim_args, backend, solver, seed, export, workers),
+        'export': export.to_dict(),
+        'backend': backend,
+        backend: dict(backend_manifest_dict)
     }
 
     with open(os.path.join(run_dir, 'manifest.json'), 'w') as f:
         json.dump(manifest, f, indent=2)
 
-    if OCCDASH_AVAILABLE:
-        occdash.manage.reload_dash_server()
+    return manifest
 
-    return create_simulation_result(model, run_dir)
 
+def _run_repeats_in_pool(model, sim_args, backend_run_dir, backend, solver, seed, workers,
+                         export_places=None, export_transitions=None):
+    """Run each repeat in its own subdirectory of backend_run_dir/repeats on a pool of worker processes.
 
-def run_in_tmp(model: SystemModel, sim_args: SimArgs) -> SimulationResult:
+    Each repeat is a separate Spike call (or native simulation) with
+    repeat_sim=1. Their outputs are then moved into backend_run_dir/output with
+    the names a serial run would give them, so the returned manifest dictionary
+    is laid out exactly as for a serial run.
+    """
+    if backend == 'spike':
+        # Write the input a serial run would use without calling Spike. Workers copy its candl.
+        backend_manifest_dict = pyspike.exe.run_in_dir(
+            _candl_writer(model), sim_args, backend_run_dir, skip_call=True,
+            export_places=export_places, export_transitions=export_transitions)
+        candl_path = os.path.join(backend_run_dir, 'input', pyspike.exe.CANDL_FILE_NAME)
+        model = None  # Workers need only the candl file
+    else:
+        candl_path = None
+        os.makedirs(os.path.join(backend_run_dir, 'output'))
+        backend_manifest_dict = {
+            'solver': solver,
+            'seed': seed,
+            'output': {
+                'places': pyspike.spcconf.expand_export_path_list(['output/places.csv'], sim_args.repeat_sim),
+                'transitions': pyspike.spcconf.expand_export_path_list(['output/transitions.csv'], sim_args.repeat_sim)
+            }
+        }
+    output = backend_manifest_dict['output']
+
+    # As with Spike, an un-numbered simulation is run as well as the numbered repeats
+    repeat_names = ['main'] + [f"{i:04d}" for i in range(sim_args.repeat_sim)]
+    assert len(repeat_names) == len(output['places'])
+    repeat_dirs = [os.path.join(backend_run_dir, 'repeats', name) for name in repeat_names]
+    repeat_seeds = np.random.SeedSequence(seed).spawn(len(repeat_names))
+    repeat_sim_args = dataclasses.replace(sim_args, repeat_sim=1)
+
+    logging.info(f"Running {len(repeat_names)} repeats on {workers} workers in: {backend_run_dir}")
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_run_repeat, backend, model, candl_path, repeat_sim_args, repeat_dir, solver, s,
+                               export_places, export_transitions)
+                   for repeat_dir, s in zip(repeat_dirs, repeat_seeds)]
+        repeat_manifest_dicts = [f.result() for f in futures]
+
+    # Move outputs into place
+    for key in repeat_manifest_dicts[0]['output']:
+        if key not in output:
+            output[key] = pyspike.spcconf.expand_export_path_list([f"output/{key}.csv"], sim_args.repeat_sim)
+        for repeat_dir, repeat_manifest_dict, path in zip(repeat_dirs, repeat_manifest_dicts, output[key]):
+            os.replace(os.path.join(repeat_dir, repeat_manifest_dict['output'][key][0]),
+                       os.path.join(backend_run_dir, path))
+
+    return backend_manifest_dict
+
+
+def _run_repeat(backend, model, candl_path, sim_args, repeat_dir, solver, seed, export_places, export_transitions):
+    os.makedirs(repeat_dir)
+    if backend == 'spike':
+        return pyspike.exe.run_in_dir(pyspike.exe.candl_file_copier(candl_path), sim_args, repeat_dir,
+                                      export_places=export_places, export_transitions=export_transitions)
+    else:
+        return occ.native.run_in_dir(model, sim_args, repeat_dir, solver=solver, seed=seed,
+                                     export_places=export_places, export_transitions=export_transitions)
+
+
+def _candl_writer(model: SystemModel):
+    """Return a callable streaming model's candl to an open file (see pyspike.exe.run_in_dir)."""
+    return lambda f: model.unit.write_candl(f, model.network, model.network_name)
+
+
+def run_in_tmp(model: SystemModel, sim_args: SimArgs,
+               backend='spike', solver='direct', seed=None) -> SimulationResult:
     """Call run_in_dir a tmp folder and return results as dataframes.
 
+    The native backend needs no folder and simulates straight to dataframes.
+
     :return:
     """
     assert sim_args.repeat_sim == 1  # No use case for this yet
 
+    if backend == 'native':
+        raw_places_frame, raw_transitions_frame, events_frame = occ.native.simulate(
+            model, sim_args, solver=solver, seed=seed, events=True)
+        return _create_simulation_result_from_raw_frames(
+            {}, model, sim_args, raw_places_frame, raw_transitions_frame, events_frame)
+
     with tempfile.TemporaryDirectory() as tmp_dir:
 
         logging.info('Using temporary directory:' + tmp_dir)
-        sim_result = run_in_dir(model, sim_args, tmp_dir)
-        with open(os.path.join(tmp_dir, 'manifest.json'), "r") as read_file:
-            manifest = json.load(read_file)
-        spike_output_dict = manifest['spike']['output']
+        sim_result = run_in_dir(model, sim_args, tmp_dir, backend=backend)
         sim_res = create_simulation_result(model, run_dir=tmp_dir)
         sim_res.run = {}  # Clear as tmp_dir will be gone outside this scope!
+        sim_res._output_paths = {}  # so frames are never released
         assert sim_res.sim_args == sim_args
         return sim_res
 
 
 
 # TODO: move inside SimulationResult
-def create_simulation_result(model=None, run_dir=None, run_num=None):
+def create_simulation_result(model=None, run_dir=None, run_num=None, lazy=False):
+    """Return the SimulationResult of the run in run_dir.
+
+    If lazy, only the manifest and medium graph are read now. Each frame is
+    read when first used (see SimulationResult.release_frames).
+    """
 
     run_dict = {'dir': run_dir, 'num': run_num}
-    with open(os.path.join(run_dir, 'manifest.json'), "r") as read_file:
-        manifest = json.load(read_file)
-
-    # Load spike output
-    spike_output_dict = manifest['spike']['output']
-    places_path = os.path.join(run_dir, 'spike', spike_output_dict['places'][0])
-    raw_places_frame = occ.reduction.read_raw_csv(places_path)
-    places_frame = occ.reduction.tidy_places(raw_places_frame, drop_non_coloured_sums=True)
-    places_frame = occ.reduction.prepend_tidy_frame_with_tstep(places_frame)
-    transitions_path = os.path.join(run_dir, 'spike', spike_output_dict['transitions'][0])
-    raw_transitions_frame = occ.reduction.read_raw_csv(transitions_path)
-    transitions_frame = occ.reduction.tidy_transitions(raw_transitions_frame, drop_non_coloured_sums=True)
-    transitions_frame = occ.reduction.prepend_tidy_frame_with_tstep(transitions_frame)
+    manifest = _read_manifest(run_dir)
+
+    # Locate backend output (runs from before the native backend have no 'backend' key)
+    output_paths = {kind: _output_path(run_dir, manifest, kind)
+                    for kind in ('places', 'transitions', 'events') if kind in _backend_output(manifest)}
 
     # model
     if not model:
@@ -150,27 +328,171 @@ def create_simulation_result(model=None, run_dir=None, run_num=None):
     # sim args
     sim_arg_dict = manifest['sim_args']
     sim_args = SimArgs(**sim_arg_dict)
+    sim_result = SimulationResult(run=run_dict, model=model, sim_args=sim_args)
+    if 'export' in manifest:  # runs from before export filters exported everything
+        sim_result.export = Export(**manifest['export'])
+    sim_result._output_paths = output_paths
+    sim_result.release_frames()
+    if not lazy:
+        for name in _FRAME_LOADERS:
+            getattr(sim_result, name)
+    return sim_result
+
+
+def _read_manifest(run_dir):
+    with open(os.path.join(run_dir, 'manifest.json'), "r") as read_file:
+        return json.load(read_file)
+
+
+def _backend_output(manifest):
+    return manifest[manifest.get('backend', 'spike')]['output']
+
+
+def _output_path(run_dir, manifest, kind):
+    """Return the path of the first 'places', 'transitions' or 'events' csv file a run's backend wrote."""
+    return os.path.join(run_dir, manifest.get('backend', 'spike'), _backend_output(manifest)[kind][0])
+
+
+# Read each frame of a SimulationResult from its _output_paths
+_FRAME_LOADERS = {
+    'raw_places': lambda sr: occ.reduction.cache.read_raw_csv_cached(sr._output_paths['places']),
+    'raw_transitions': lambda sr: occ.reduction.cache.read_raw_csv_cached(sr._output_paths['transitions']),
+    'places': lambda sr: _tidy_places(sr.raw_places),
+    'transitions': lambda sr: _tidy_transitions(sr.raw_transitions),
+    'events': lambda sr: occ.reduction.read_event_log(sr._output_paths['events'])
+    if 'events' in sr._output_paths else None,
+}
+
+
+def _create_simulation_result_from_raw_frames(run_dict, model, sim_args, raw_places_frame, raw_transitions_frame,
+                                              events_frame=None):
     return SimulationResult(
         run=run_dict, model=model, sim_args=sim_args,
-        places=places_frame, transitions=transitions_frame,
-        raw_places=raw_places_frame, raw_transitions=raw_transitions_frame)
+        places=_tidy_places(raw_places_frame), transitions=_tidy_transitions(raw_transitions_frame),
+        raw_places=raw_places_frame, raw_transitions=raw_transitions_frame, events=events_frame)
         # place_sums=place_sums_frame, transition_sums=transition_sums_frame)
 
 
-def run(model: SystemModel, sim_args: SimArgs, basedir=None):
+def _tidy_places(raw_places_frame):
+    return occ.reduction.tidy_places(raw_places_frame, drop_non_coloured_sums=True, tstep=True)
+
+
+def _tidy_transitions(raw_transitions_frame):
+    return occ.reduction.tidy_transitions(raw_transitions_frame, drop_non_coloured_sums=True, tstep=True,
+                                          drop_zero_counts=True)
+
+
+def run(model: SystemModel, sim_args: SimArgs, basedir=None, backend='spike', solver='direct', seed=None,
+        workers=1, spike_processes=1, cache=False, export: Export = None):
     """Create a new run directory in basedir and call run_in_dir.
     Returning (run_dir, manifest).
+
+    If cache is True and a run in basedir has the same fingerprint (see
+    fingerprint) its SimulationResult is returned instead of simulating again.
+    Only native runs with a seed are reproducible, so other runs are always
+    simulated afresh.
     """
     if not basedir:
         basedir = BASEDIR
+    if cache and backend == 'native' and seed is not None:
+        cached_run_num = find_run(fingerprint(model, sim_args, backend, solver, seed, export, workers), basedir)
+        if cached_run_num is not None:
+            run_dir = os.path.join(basedir, str(cached_run_num))
+            logging.info(f"Using cached run with the same fingerprint: {run_dir}")
+            return create_simulation_result(model, run_dir, cached_run_num)
     id_ = _IncrementalDir(basedir)
     run_num, run_dir = id_.create_next_dir()
-    sim_result = run_in_dir(model, sim_args, run_dir)
+    sim_result = run_in_dir(model, sim_args, run_dir, backend=backend, solver=solver, seed=seed, workers=workers,
+                            spike_processes=spike_processes, export=export)
     assert sim_result.run['dir'] == run_dir
     sim_result.run['num'] = run_num
+    _index_runs(basedir, run_num)
     return sim_result
 
 
+def fingerprint(model: SystemModel, sim_args: SimArgs, backend='spike', solver='direct', seed=None,
+                export: Export = None, workers=1) -> str:
+    """Return a hex digest identifying the simulation run would perform with these arguments.
+
+    Built from the UnitModel's fingerprint, the medium graph's sorted nodes and
+    edges, sim_args and backend (plus solver, seed and how repeats are seeded
+    for the native backend, and export unless it is everything).
+    Other arguments which only change how the work is split between processes
+    are not included.
+    """
+    sim_arg_dict = dataclasses.asdict(sim_args)
+    for key in ('start', 'step', 'stop'):
+        sim_arg_dict[key] = float(sim_arg_dict[key])
+    d = {
+        'unit': model.unit.fingerprint(),
+        'network': pyspike.model.graph_fingerprint(model.network),
+        'marking': model.marking,
+        'sim_args': sim_arg_dict,
+        'backend': backend
+    }
+    if backend == 'native':
+        # Repeats run on a pool each get a seed spawned from seed (see _run_repeats_in_pool)
+        seeding = 'spawned' if workers > 1 and sim_args.repeat_sim > 1 else 'serial'
+        d.update(solver=solver, seed=seed, seeding=seeding)
+    if export is not None and not export.is_everything():
+        d.update(export=export.to_dict())
+    return hashlib.sha256(json.dumps(d, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def find_run(fingerprint_, basedir=None):
+    """Return the number of the last run in basedir whose manifest has fingerprint_, or None.
+
+    Fingerprints are looked up in basedir/fingerprints.json, which run keeps up
+    to date. Runs numbered after the last one indexed (such as those made
+    before the index existed) are read into it first.
+    """
+    if not basedir:
+        basedir = BASEDIR
+    if not os.path.isdir(basedir):
+        return None
+    run_num = _index_runs(basedir)['fingerprints'].get(fingerprint_)
+    if run_num is None or not os.path.exists(os.path.join(basedir, str(run_num), 'manifest.json')):
+        return None  # never run, or removed since it was indexed
+    return run_num
+
+
+def _index_runs(basedir, run_num=None):
+    """Add the runs in basedir numbered after the last one in its index, and run run_num if given, to the
+    index and return it."""
+    index_path = os.path.join(basedir, RUN_INDEX_FILE_NAME)
+    if os.path.exists(index_path):
+        with open(index_path, 'r') as f:
+            index = json.load(f)
+    else:
+        index = {'last_run': -1, 'fingerprints': {}}
+
+    def add(run_num_):
+        manifest_path = os.path.join(basedir, str(run_num_), 'manifest.json')
+        if not os.path.exists(manifest_path):
+            return False  # failed, or still running and added by its own call to run
+        with open(manifest_path, 'r') as f:
+            fingerprint_ = json.load(f).get('fingerprint')
+        if fingerprint_ is None or index['fingerprints'].get(fingerprint_, -1) > run_num_:
+            return False  # runs from before fingerprints, and saved runs, have none
+        index['fingerprints'][fingerprint_] = run_num_
+        return True
+
+    last_run = index['last_run']
+    while os.path.isdir(os.path.join(basedir, str(index['last_run'] + 1))):
+        index['last_run'] += 1
+        add(index['last_run'])
+    changed = index['last_run'] != last_run
+    if run_num is not None and run_num <= last_run:  # passed over while it was running
+        changed = add(run_num) or changed
+
+    if changed:
+        # Write then rename so an interrupted run never leaves a truncated index
+        with open(index_path + '.tmp', 'w') as f:
+            json.dump(index, f, indent=2)
+        os.replace(index_path + '.tmp', index_path)
+    return index
+
+
 def save(simulation_result: SimulationResult, basedir=None):
     """Archive a SimulationResult as if it were created with run.
 
@@ -188,16 +510,16 @@ def save(simulation_result: SimulationResult, basedir=None):
     spike_run_dir = os.path.join(archive_dir, 'spike')
     os.makedirs(spike_run_dir)
 
-    candl_file_path = sr.model.unit.to_candl_string(sr.model.network, sr.model.network_name)
-
     # Do everything but run spike
-    spike_manifest_dict = pyspike.exe.run_in_dir(candl_file_path, sr.sim_args, spike_run_dir, skip_call=True)
+    spike_manifest_dict = pyspike.exe.run_in_dir(_candl_writer(sr.model), sr.sim_args, spike_run_dir, skip_call=True)
 
     manifest = {
         'system_model': None,
         'sim_args': dataclasses.asdict(sr.sim_args),
         'spike': dict(spike_manifest_dict)
     }
+    if sr.events is not None:
+        manifest['spike']['output']['events'] = ['output/events.csv']
 
     with open(os.path.join(archive_dir, 'manifest.json'), 'w') as f:
         json.dump(manifest, f)
@@ -205,11 +527,14 @@ def save(simulation_result: SimulationResult, basedir=None):
     # Write places.csv and transitions.csv
     sr.raw_places.to_csv(os.path.join(spike_run_dir, 'output', 'places.csv'), sep=';', index=False)
     sr.raw_transitions.to_csv(os.path.join(spike_run_dir, 'output', 'transitions.csv'), sep=';', index=False)
+    if sr.events is not None:
+        occ.reduction.write_event_log(sr.events, os.path.join(spike_run_dir, 'output', 'events.csv'))
     sr.run = {'dir': archive_dir, 'num': run_number}
     return sr
 
 
-def load(run_num, basedir=None) -> SimulationResult:
+def load(run_num, basedir=None, lazy=False) -> SimulationResult:
+    """Return the SimulationResult of run run_num in basedir. If lazy, frames are read when first used."""
     if not basedir:
         basedir = BASEDIR
     run_dir = os.path.join(basedir, str(run_num))
@@ -218,7 +543,7 @@ def load(run_num, basedir=None) -> SimulationResult:
     if not os.path.isdir(run_dir):
         raise ValueError(f"'{run_dir}' is not a dir")
 
-    sr = create_simulation_result(model=None, run_dir=run_dir, run_num=run_num)
+    sr = create_simulation_result(model=None, run_dir=run_dir, run_num=run_num, lazy=lazy)
     return sr
 
 
@@ -0,0 +1,134 @@
+import itertools
+import json
+import logging
+import os
+import shutil
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+import occ.sim
+from occ.model import SystemModel
+from pyspike.exe import SimArgs
+
+INDEX_FILE_NAME = 'index.json'
+
+# Status of a sweep point in the index
+PENDING = 'pending'
+DONE = 'done'
+FAILED = 'failed'
+
+
+def grid(**axes):
+    """Return a list of parameter dicts, one for each combination of the values in axes.
+
+    >>> grid(rate=[1, 2], seeds=[3])
+    [{'rate': 1, 'seeds': 3}, {'rate': 2, 'seeds': 3}]
+    """
+    names = list(axes)
+    return [dict(zip(names, values)) for values in itertools.product(*axes.values())]
+
+
+def points_from_params(make_point, params_list):
+    """Return a list of sweep points (params, model, sim_args) calling make_point(**params) for each params dict.
+
+    make_point should return a (SystemModel, SimArgs) pair.
+    """
+    return [(params,) + tuple(make_point(**params)) for params in params_list]
+
+
+def run_sweep(points, sweep_dir, workers=1, backend='spike', solver='direct', seed=None, export=None):
+    """Run each sweep point (params, model, sim_args) in its own run directory of sweep_dir.
+
+    Point i is run with occ.sim.write_run_dir in sweep_dir/i, so can be loaded
+    with occ.sim.load(i, sweep_dir). The params dict of each point (which must
+    be json serialisable) and its status are kept in sweep_dir/index.json,
+    which is rewritten as each point finishes.
+
+    Points are run on a pool of workers processes. A point which raises is
+    marked failed and the sweep continues. Calling run_sweep again with the same
+    points and sweep_dir reruns only the points which are not yet done.
+
+    If seed is given, point i is run with seed + i (native backend only).
+    Every point is run with export (see occ.export.Export).
+
+    Returns the index as a DataFrame (see load_index).
+    """
+    params_list = [params for params, _, _ in points]
+    index = _read_or_create_index(sweep_dir, params_list)
+    todo = [i for i, entry in enumerate(index['points']) if entry['status'] != DONE]
+    logging.info(f"Sweep of {len(points)} points in '{sweep_dir}': "
+                 f"{len(points) - len(todo)} already done, running {len(todo)} on {workers} workers")
+
+    for i in todo:
+        run_dir = os.path.join(sweep_dir, str(i))
+        if os.path.exists(run_dir):
+            shutil.rmtree(run_dir)  # left by a failed or interrupted attempt
+        os.makedirs(run_dir)
+        index['points'][i].update(status=PENDING, error=None)
+    _write_index(sweep_dir, index)
+
+    def record(i, error):
+        entry = index['points'][i]
+        entry.update(status=FAILED if error else DONE, error=error)
+        _write_index(sweep_dir, index)
+        finished = sum(entry['status'] != PENDING for entry in index['points'])
+        if error:
+            logging.warning(f"Sweep point {i} {entry['params']} failed ({finished}/{len(points)}):\n{error}")
+        else:
+            logging.info(f"Sweep point {i} {entry['params']} done ({finished}/{len(points)})")
+
+    point_args = {i: (points[i][1], points[i][2], os.path.join(sweep_dir, str(i)), backend, solver,
+                      None if seed is None else seed + i, export)
+                  for i in todo}
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(_run_point, *args): i for i, args in point_args.items()}
+            for future in as_completed(futures):
+                record(futures[future], future.result())
+    else:
+        for i, args in point_args.items():
+            record(i, _run_point(*args))
+
+    return load_index(sweep_dir)
+
+
+def load_index(sweep_dir) -> pd.DataFrame:
+    """Return the index of a sweep with one row per point: point, status, error and a column per param."""
+    with open(os.path.join(sweep_dir, INDEX_FILE_NAME), 'r') as f:
+        index = json.load(f)
+    rows = [dict(point=i, status=entry['status'], error=entry['error'], **entry['params'])
+            for i, entry in enumerate(index['points'])]
+    return pd.DataFrame(rows)
+
+
+def _run_point(model: SystemModel, sim_args: SimArgs, run_dir, backend, solver, seed, export):
+    """Run one sweep point returning None, or the formatted traceback if it failed."""
+    try:
+        occ.sim.write_run_dir(model, sim_args, run_dir, backend=backend, solver=solver, seed=seed, export=export)
+    except Exception:
+        return traceback.format_exc()
+    return None
+
+
+def _read_or_create_index(sweep_dir, params_list):
+    index_path = os.path.join(sweep_dir, INDEX_FILE_NAME)
+    if os.path.exists(index_path):
+        with open(index_path, 'r') as f:
+            index = json.load(f)
+        if [entry['params'] for entry in index['points']] != json.loads(json.dumps(params_list)):
+            raise ValueError(f"Sweep points differ from those indexed in '{index_path}'")
+        return index
+    os.makedirs(sweep_dir, exist_ok=True)
+    if os.listdir(sweep_dir):
+        raise ValueError(f"'{sweep_dir}' is not empty and has no sweep index")
+    return {'points': [{'params': params, 'status': PENDING, 'error': None} for params in params_list]}
+
+
+def _write_index(sweep_dir, index):
+    # Write then rename so an interrupted sweep never leaves a truncated index
+    index_path = os.path.join(sweep_dir, INDEX_FILE_NAME)
+    with open(index_path + '.tmp', 'w') as f:
+        json.dump(index, f, indent=2)
+    os.replace(index_path + '.tmp', index_path)
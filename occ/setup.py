@@ -18,5 +18,8 @@ setup(
         'pandas',
         'pyspike'
     ],  # external packages as dependencies
+    extras_require={
+        'cache': ['pyarrow'],  # caches parsed csv files as Arrow files (see occ.reduction.cache)
+    },
 
 )
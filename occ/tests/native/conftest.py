@@ -0,0 +1,39 @@
+import networkx as nx
+import pytest
+
+from occ.model import Unit, UnitModel, ext, u, n1, n2, SystemModel, follow1, follow2, marking
+
+
+@pytest.fixture
+def medium_graph():
+    return nx.Graph([(0, 1), (1, 2), (2, 3), (3, 0), (0, 2)])
+
+
+@pytest.fixture
+def diffusion_model(medium_graph):
+    # Every unit but 0 starts in a, and follows a neighbour into b
+    a = Unit.place('a', marking([x for x in medium_graph.nodes if x != 0]))
+    b = Unit.place('b', marking([0]))
+    m = UnitModel(name='diffusion', colors=[Unit], variables=[u, n1, n2], places=[a, b])
+    m.add_transitions_from([follow1(a, b, 1), follow2(a, b, 2)])
+    return SystemModel(m, medium_graph, 'four', None)
+
+
+@pytest.fixture
+def external_model():
+    # Unit 0 moves from a to b at time 0.5
+    a = Unit.place('a', '1`all')
+    b = Unit.place('b')
+    m = UnitModel(name='external_transition', colors=[Unit], variables=[u], places=[a, b])
+    m.add_transitions_from([ext(a, b, 0.5, [0])])
+    return SystemModel(m, nx.Graph([(0, 1), (1, 2)]), 'two graph', None)
+
+
+@pytest.fixture
+def pair_model():
+    # Unit 1 follows unit 0 at rate 1 so is in b at time t with probability 1 - exp(-t)
+    a = Unit.place('a', marking([1]))
+    b = Unit.place('b', marking([0]))
+    m = UnitModel(name='pair', colors=[Unit], variables=[u, n1], places=[a, b])
+    m.add_transitions_from([follow1(a, b, 1)])
+    return SystemModel(m, nx.Graph([(0, 1)]), 'pair', None)
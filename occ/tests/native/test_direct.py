@@ -0,0 +1,92 @@
+import networkx as nx
+import pytest
+
+from occ.model import Unit, UnitModel, ext, u, n1, n2, SystemModel, marking, SimArgs
+from occ.model.transitions import ModulatedInternal
+from occ.native import compile_system_model, simulate
+from occ.native.compile import parse_marking, parse_rate
+from occ.native.trajectory import sample_times
+
+
+def test_parse_marking():
+    assert list(parse_marking('1`all', 3)) == [1, 1, 1]
+    assert list(parse_marking('0`0', 3)) == [0, 0, 0]
+    assert list(parse_marking('0++2', 3)) == [1, 0, 1]
+    assert list(parse_marking('2`1++0', 3)) == [1, 2, 0]
+    with pytest.raises(ValueError):
+        parse_marking('1`(M,M)', 3)
+
+
+def test_parse_rate():
+    assert parse_rate('1') == (1., False)
+    assert parse_rate(0.5) == (.5, False)
+    assert parse_rate('MassAction(2)') == (2., True)
+    with pytest.raises(ValueError):
+        parse_rate('BioMassAction(2)')
+
+
+def test_sample_times():
+    times = sample_times(SimArgs(start=0, stop=1, step=.1))
+    assert list(times) == [0., .1, .2, .3, .4, .5, .6, .7, .8, .9]
+
+
+class TestCompile:
+
+    def test_bindings(self, diffusion_model, medium_graph):
+        cm = compile_system_model(diffusion_model)
+        degrees = [d for _, d in medium_graph.degree]
+        number_follow1 = sum(degrees)
+        number_follow2 = sum(d * (d - 1) for d in degrees)
+        assert cm.family_names == ['f1ab', 'f2ab']
+        assert cm.number_stochastic == cm.number_bindings == number_follow1 + number_follow2
+        assert cm.binding_columns[0] == 'f1ab_1_0'
+        assert cm.binding_columns[number_follow1] == 'f2ab_1_2_0'
+
+    def test_initial_state(self, diffusion_model):
+        cm = compile_system_model(diffusion_model)
+        assert list(cm.initial_state) == [0, 1, 1, 1, 1, 0, 0, 0, 1]
+        assert cm.one == 8
+
+    def test_propensities(self, diffusion_model):
+        cm = compile_system_model(diffusion_model)
+        a = cm.propensities(cm.initial_state)
+        enabled_columns = {c for c, rate in zip(cm.binding_columns, a) if rate > 0}
+        # Only units neighbouring unit 0 (the only b) can follow, and only follow1 can be enabled
+        assert enabled_columns == {'f1ab_0_1', 'f1ab_0_2', 'f1ab_0_3'}
+
+    def test_modulated_internal(self, medium_graph):
+        a = Unit.place('a', '1`all')
+        b = Unit.place('b')
+        e = Unit.place('e', marking([2]))
+        m = UnitModel(name='mi', colors=[Unit], variables=[u, n1, n2], places=[a, b, e])
+        m.add_transitions_from([ModulatedInternal(a, b, e)])
+        cm = compile_system_model(SystemModel(m, medium_graph, 'four', None))
+        assert cm.binding_columns == ['mieab_0', 'mieab_1', 'mieab_2', 'mieab_3']
+        assert list(cm.propensities(cm.initial_state)) == [0, 0, 1, 0]
+
+
+class TestEventLog:
+
+    def test_events_match_firings(self, diffusion_model):
+        raw_places, raw_transitions, events = simulate(
+            diffusion_model, SimArgs(start=0, stop=5, step=.1), seed=3, events=True)
+        assert list(events.columns) == ['time', 'name', 'unit', 'neighbour', 'neighbour2']
+        assert events['time'].is_monotonic_increasing
+        assert len(events) == raw_transitions['f1ab'].sum() + raw_transitions['f2ab'].sum()
+        assert len(events) == raw_places['b'].iloc[-1] - raw_places['b'].iloc[0]
+        assert events['neighbour2'].isna().equals(events['name'] == 'f1ab')
+
+    def test_external_transition_gives_a_row_per_unit(self):
+        a = Unit.place('a', '1`all')
+        b = Unit.place('b')
+        m = UnitModel(name='external_transition', colors=[Unit], variables=[u], places=[a, b])
+        m.add_transitions_from([ext(a, b, 0.5, [0, 2])])
+        model = SystemModel(m, nx.Graph([(0, 1), (1, 2)]), 'two graph', None)
+        _, _, events = simulate(model, SimArgs(start=0, stop=1, step=.1), seed=0, events=True)
+        assert list(events['time']) == [.5, .5]
+        assert list(events['unit']) == [0, 2]
+        assert events['neighbour'].isna().all()
+
+    def test_approximate_solvers_record_no_events(self, diffusion_model):
+        _, _, events = simulate(diffusion_model, SimArgs(start=0, stop=1, step=.1), solver='tau_leap', events=True)
+        assert events is None
@@ -0,0 +1,24 @@
+import numpy as np
+
+from occ.model import SimArgs
+from occ.native import compile_system_model, simulate_runs
+from occ.native.ensemble import simulate_ensemble
+from occ.native.trajectory import sample_times
+
+
+def test_places_shape(diffusion_model):
+    ensemble = simulate_runs(diffusion_model, SimArgs(start=0, stop=1, step=.1, runs=7), seed=0)
+    assert ensemble.places.shape == (7, 10, 2, 4)
+    assert (ensemble.places[:, 0, 1, :] == [1, 0, 0, 0]).all()
+
+
+def test_runs_are_independent_and_conserve_units(diffusion_model):
+    cm = compile_system_model(diffusion_model)
+    times = sample_times(SimArgs(start=0, stop=10, step=.5))
+    ensemble = simulate_ensemble(cm, times, 50, np.random.default_rng(3))
+    places = ensemble.places
+    assert (places.sum(axis=2) == 1).all()
+    assert (places[:, -1, 1, :] == 1).all()
+    assert len({places[r, :, 1, :].tobytes() for r in range(50)}) > 1
+    b_counts = places[:, :, 1, :].sum(axis=(0, 2))
+    assert list(np.diff(b_counts)) == list(ensemble.firings.sum(axis=1)[1:])
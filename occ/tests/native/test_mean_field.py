@@ -0,0 +1,51 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+import occ.sim
+from occ.model import Unit, UnitModel, u, n1, n2, SystemModel, SimArgs
+from occ.model.transitions import ModulatedInternal
+from occ.native import simulate
+from occ.native.mean_field import MeanFieldModel
+
+
+def test_neighbour_sum(diffusion_model):
+    mf = MeanFieldModel(diffusion_model)
+    number_units = diffusion_model.network.number_of_nodes()
+    v = np.arange(float(number_units))
+    expected = [sum(v[n] for n in diffusion_model.network.adj[x]) for x in range(number_units)]
+    assert list(mf.neighbour_sum(v)) == expected
+
+
+def test_follow_matches_exponential(pair_model):
+    # With unit 0 certainly in b, unit 1 follows at rate 1 so is in b with probability 1 - exp(-t)
+    raw_places, raw_transitions = simulate(pair_model, SimArgs(start=0, stop=2, step=.5), solver='mean_field')
+    assert np.allclose(raw_places['b_1'], 1 - np.exp(-raw_places['Time']), atol=1e-5)
+    assert list(raw_transitions.columns) == ['Time', 'f1ab']
+    assert np.allclose(raw_transitions['f1ab'][1:], np.diff(raw_places['b_1']))
+
+
+def test_units_are_conserved(diffusion_model):
+    raw_places, raw_transitions = simulate(diffusion_model, SimArgs(start=0, stop=5, step=.25), solver='mean_field')
+    assert raw_places['b'].dtype == float
+    assert np.allclose(raw_places['a'] + raw_places['b'], diffusion_model.network.number_of_nodes())
+    assert raw_places['b'].is_monotonic_increasing
+    firings = raw_transitions['f1ab'] + raw_transitions['f2ab']
+    assert np.allclose(firings[1:], np.diff(raw_places['b']))
+
+
+def test_modulated_internal_reading_its_source():
+    b = Unit.place('b', '1`all')
+    c = Unit.place('c')
+    m = UnitModel(name='mi', colors=[Unit], variables=[u, n1, n2], places=[b, c])
+    m.add_transitions_from([ModulatedInternal(b, c, b, rate=2)])
+    model = SystemModel(m, nx.Graph([(0, 1)]), 'pair', None)
+    raw_places, _ = simulate(model, SimArgs(start=0, stop=1, step=.5), solver='mean_field')
+    assert raw_places['c_0'][1] == pytest.approx(1 - np.exp(-1), abs=1e-5)
+
+
+def test_run_in_tmp(pair_model):
+    sim_result = occ.sim.run_in_tmp(pair_model, SimArgs(start=0, stop=2, step=.5), backend='native',
+                                    solver='mean_field')
+    b_1 = sim_result.places.query("name == 'b' and num == 1")['count']
+    assert 0 < b_1.iloc[1] < 1
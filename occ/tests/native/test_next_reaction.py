@@ -0,0 +1,40 @@
+import numpy as np
+
+from occ.native import compile_system_model
+from occ.native.next_reaction import IndexedPriorityQueue, build_dependency_index, dependents
+
+
+class TestIndexedPriorityQueue:
+
+    def test_top(self):
+        q = IndexedPriorityQueue([5., 3., np.inf, 4.])
+        assert q.top() == (3., 1)
+
+    def test_update(self):
+        q = IndexedPriorityQueue([5., 3., np.inf, 4., 9.])
+        q.update([1, 4], [6., 1.])
+        assert q.top() == (1., 4)
+        q.update([4], [np.inf])
+        assert q.top() == (4., 3)
+        assert list(q[[0, 1, 2]]) == [5., 6., np.inf]
+
+    def test_matches_sort_under_random_updates(self):
+        rng = np.random.default_rng(0)
+        keys = rng.random(37)
+        q = IndexedPriorityQueue(keys)
+        for _ in range(100):
+            indexes = rng.choice(37, size=5, replace=False)
+            keys[indexes] = rng.random(5)
+            q.update(indexes, keys[indexes])
+            assert q.top() == (keys.min(), keys.argmin())
+
+    def test_empty(self):
+        assert IndexedPriorityQueue([]).top()[0] == np.inf
+
+
+def test_dependents_are_graph_local(diffusion_model, medium_graph):
+    cm = compile_system_model(diffusion_model)
+    index = build_dependency_index(cm)
+    fired = cm.binding_columns.index('f1ab_1_2')  # unit 2 follows unit 1
+    units = set(cm.binding_unit[dependents(cm, index, fired)])
+    assert units == {2} | set(medium_graph.adj[2])  # unit 2 and its neighbours
@@ -0,0 +1,67 @@
+"""Properties every native solver shares, checked once per solver."""
+import numpy as np
+import pytest
+
+from occ.model import SimArgs
+from occ.native import compile_system_model, simulate, SOLVERS, ENSEMBLE_SOLVERS, DETERMINISTIC_SOLVERS
+from occ.native.trajectory import sample_times
+
+STOCHASTIC_SOLVERS = list(SOLVERS) + list(ENSEMBLE_SOLVERS)
+ALL_SOLVERS = STOCHASTIC_SOLVERS + list(DETERMINISTIC_SOLVERS)
+
+
+@pytest.mark.parametrize('solver', ALL_SOLVERS)
+def test_external_transition_fires_at_delay(external_model, solver):
+    raw_places, raw_transitions = simulate(external_model, SimArgs(start=0, stop=1, step=.1), solver=solver, seed=0)
+    assert list(raw_places.columns) == ['Time', 'a', 'b', 'a_0', 'a_1', 'a_2', 'b_0', 'b_1', 'b_2']
+    assert list(raw_places['a_0']) == [1] * 6 + [0] * 4
+    assert list(raw_places['b_0']) == [0] * 6 + [1] * 4
+    assert list(raw_places['a']) == [3] * 6 + [2] * 4
+    assert list(raw_transitions.columns) == ['Time', 'extab']
+    assert list(raw_transitions['extab']) == [0] * 6 + [1] + [0] * 3
+
+
+@pytest.mark.parametrize('solver', list(SOLVERS))
+def test_units_are_conserved(diffusion_model, solver):
+    cm = compile_system_model(diffusion_model)
+    times = sample_times(SimArgs(start=0, stop=10, step=.1))
+    trajectory = SOLVERS[solver](cm, times, np.random.default_rng(3))
+    states = trajectory.states.reshape(len(times), 2, cm.number_units)
+    assert (states.sum(axis=1) == 1).all()
+    b_counts = states[:, 1, :].sum(axis=1)
+    assert (np.diff(b_counts) >= 0).all()
+    assert list(np.diff(b_counts)) == list(trajectory.firings.sum(axis=1)[1:])
+    # Everything reachable from unit 0 follows eventually
+    assert (states[-1, 1, :] == 1).all()
+
+
+@pytest.mark.parametrize('solver', STOCHASTIC_SOLVERS)
+def test_follow_probability_matches_exponential(pair_model, solver):
+    raw_places, _ = simulate(pair_model, SimArgs(start=0, stop=2, step=1, runs=2000), solver=solver, seed=1)
+    assert raw_places['b_1'][1] == pytest.approx(1 - np.exp(-1), abs=0.04)
+
+
+@pytest.mark.parametrize('solver', STOCHASTIC_SOLVERS)
+def test_seed_reproducible(diffusion_model, solver):
+    sim_args = SimArgs(start=0, stop=5, step=.1)
+    raw_places_1, _ = simulate(diffusion_model, sim_args, solver=solver, seed=7)
+    raw_places_2, _ = simulate(diffusion_model, sim_args, solver=solver, seed=7)
+    assert raw_places_1.equals(raw_places_2)
+
+
+@pytest.mark.parametrize('solver', STOCHASTIC_SOLVERS)
+def test_single_run_matches_spike_dtypes(diffusion_model, solver):
+    raw_places, _ = simulate(diffusion_model, SimArgs(start=0, stop=1, step=.1), solver=solver, seed=0)
+    assert raw_places['b'].dtype == np.int64
+
+
+@pytest.mark.parametrize('solver', STOCHASTIC_SOLVERS)
+def test_runs_are_averaged(diffusion_model, solver):
+    raw_places, _ = simulate(diffusion_model, SimArgs(start=0, stop=1, step=.1, runs=10), solver=solver, seed=1)
+    assert raw_places['b'].dtype == float
+    assert np.allclose(raw_places['a'] + raw_places['b'], diffusion_model.network.number_of_nodes())
+
+
+def test_unknown_solver(diffusion_model):
+    with pytest.raises(ValueError):
+        simulate(diffusion_model, SimArgs(start=0, stop=1, step=.1), solver='nonsense')
@@ -0,0 +1,50 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from occ.model import Unit, UnitModel, u, n1, n2, SystemModel, follow1, follow2, marking, SimArgs
+from occ.native import compile_system_model, simulate
+from occ.native.tau_leap import simulate_tau_leap, leap_firings, _LeapIndex
+from occ.native.trajectory import sample_times
+
+
+@pytest.fixture
+def large_diffusion_model():
+    # Start with 60 scattered units in b so that runs vary little
+    seeds = set(np.random.default_rng(0).choice(900, 60, replace=False))
+    a = Unit.place('a', marking([i for i in range(900) if i not in seeds]))
+    b = Unit.place('b', marking(sorted(seeds)))
+    m = UnitModel(name='diffusion', colors=[Unit], variables=[u, n1, n2], places=[a, b])
+    m.add_transitions_from([follow1(a, b, 1), follow2(a, b, 2)])
+    graph = nx.convert_node_labels_to_integers(nx.grid_2d_graph(30, 30))
+    return SystemModel(m, graph, 'grid', None)
+
+
+def test_leap_firings_never_overdraw_tokens(large_diffusion_model):
+    cm = compile_system_model(large_diffusion_model)
+    index = _LeapIndex(cm)
+    x = cm.initial_state.copy()
+    x[:cm.number_states] = 1  # every unit in both places so every binding is enabled
+    a = cm.propensities(x)
+    counts = leap_firings(index, a, x, 10., np.random.default_rng(0))
+    consumed = np.bincount(cm.change_index[:cm.number_stochastic, 1], weights=counts,
+                           minlength=cm.number_states + 1)
+    assert (consumed[:cm.number_units] == 1).all()
+
+
+def test_units_are_conserved_over_large_leaps(large_diffusion_model):
+    cm = compile_system_model(large_diffusion_model)
+    times = sample_times(SimArgs(start=0, stop=20, step=1))
+    trajectory = simulate_tau_leap(cm, times, np.random.default_rng(3))
+    states = trajectory.states.reshape(len(times), 2, cm.number_units)
+    assert (states.sum(axis=1) == 1).all()
+    assert (states[-1, 1, :] == 1).all()
+    b_counts = states[:, 1, :].sum(axis=1)
+    assert list(np.diff(b_counts)) == list(trajectory.firings.sum(axis=1)[1:])
+
+
+def test_mean_matches_exact_solver(large_diffusion_model):
+    sim_args = SimArgs(start=0, stop=1.5, step=.25, runs=10)
+    exact, _ = simulate(large_diffusion_model, sim_args, solver='next_reaction', seed=1)
+    leapt, _ = simulate(large_diffusion_model, sim_args, solver='tau_leap', seed=1)
+    assert np.allclose(leapt['b'], exact['b'], rtol=.05)
@@ -0,0 +1,78 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import occ_test_files
+from occ.reduction import cache, read
+
+pytest.importorskip('pyarrow')
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = str(tmp_path / 'transitions.csv')
+    shutil.copy(occ_test_files.RUN_71_TRANSITIONS, path)
+    return path
+
+
+def fail_to_read(filename):
+    raise AssertionError(f"'{filename}' was parsed")
+
+
+def test_first_read_writes_cache(csv_path):
+    raw_frame = cache.read_raw_csv_cached(csv_path)
+    assert all(os.path.exists(path) for path in cache.cache_paths(csv_path))
+    pd.testing.assert_frame_equal(raw_frame, read.read_raw_csv(csv_path))
+
+
+def test_later_reads_use_cache(csv_path, monkeypatch):
+    raw_frame = cache.read_raw_csv_cached(csv_path)
+    monkeypatch.setattr(cache, 'read_raw_csv', fail_to_read)
+    pd.testing.assert_frame_equal(cache.read_raw_csv_cached(csv_path), raw_frame)
+
+
+def test_changed_csv_invalidates_cache(csv_path):
+    cache.read_raw_csv_cached(csv_path)
+    with open(csv_path, 'w') as f:
+        f.write('Time;a;a_0\n0;1;1\n')
+    assert list(cache.read_raw_csv_cached(csv_path).columns) == ['Time', 'a', 'a_0']
+
+
+def test_clear_cache(csv_path):
+    cache.read_raw_csv_cached(csv_path)
+    cache.clear_cache(csv_path)
+    assert not any(os.path.exists(path) for path in cache.cache_paths(csv_path))
+
+
+def test_count_store_frame_matches_raw_frame(csv_path):
+    store = cache.open_count_store(csv_path)
+    assert isinstance(store.counts, np.memmap)
+    pd.testing.assert_frame_equal(store.frame(), read.read_raw_csv(csv_path))
+
+
+def test_count_store_slices(csv_path):
+    raw_frame = read.read_raw_csv(csv_path)
+    store = cache.open_count_store(csv_path)
+    columns = store.unit_columns(3)
+    assert columns and all(c.rsplit('_', 1)[1] == '3' for c in columns)
+    frame = store.frame(start=1., stop=2., columns=columns)
+    window = raw_frame[(raw_frame['Time'] >= 1.) & (raw_frame['Time'] <= 2.)]
+    pd.testing.assert_frame_equal(frame, window[['Time'] + columns].reset_index(drop=True))
+
+
+def test_count_store_is_rewritten_when_csv_changes(csv_path):
+    cache.open_count_store(csv_path)
+    with open(csv_path, 'w') as f:
+        f.write('Time;a;a_0\n0;1;1\n')
+    assert cache.open_count_store(csv_path).columns == ['a', 'a_0']
+
+
+def test_read_tidy_selection_uses_cache(csv_path, monkeypatch):
+    expected = read.read_tidy_transitions(csv_path, ['ab'], unit_list=[2], time_range=(1., 2.))
+    cache.read_raw_csv_cached(csv_path)
+    monkeypatch.setattr(read.pd, 'read_csv', fail_to_read)
+    pd.testing.assert_frame_equal(
+        read.read_tidy_transitions(csv_path, ['ab'], unit_list=[2], time_range=(1., 2.)), expected)
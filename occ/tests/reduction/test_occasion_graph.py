@@ -9,7 +9,8 @@ import occ.reduction.read
 from occ.reduction import read
 
 from occ.reduction.occasion_graph import generate_place_increased_events, generate_transition_events, \
-    generate_causal_graph, Occasion
+    generate_causal_graph, Occasion, generate_causal_graph_from_events
+from occ.reduction.events import event_log_from_transitions, EVENT_LOG_COLUMNS
 
 from occ_test_files import TRANSITIONS, PLACES
 import occ_test_files
@@ -72,6 +73,18 @@ def test_generate_state_change_frame(big_example_frame):
     assert_frame_equal(desired_frame.reset_index(drop=True), actual_frame.reset_index(drop=True))
 
 
+def test_generate_state_change_frame_with_duplicated_rows(big_example_frame):
+    duplicated = pd.concat([big_example_frame, big_example_frame]).reset_index(drop=True)
+
+    actual_frame = generate_place_increased_events(duplicated)
+    expected_frame = occ.reduction.occasion_graph._generate_place_increased_events_by_group(duplicated)
+    assert_frame_equal(expected_frame, actual_frame)
+
+    duplicated = duplicated.rename(columns={'step': 'tstep'})
+    actual_frame = occ.reduction.occasion_graph.filter_place_changed_events(duplicated)
+    assert set(actual_frame['tstep']) == set(occ.reduction.occasion_graph._changed_tsteps_by_group(duplicated))
+
+
 def test_occasion_repr():
 
     o = Occasion(unit=1, state='a', time=4.1)
@@ -99,6 +112,38 @@ def test_generate_causal_graph_with_run_77():
     assert str(list(causal_graph.edges)) == "[(a1@0.0, b1@6.1), (a2@0.0, b2@5.1), (a3@0.0, b3@4.0), (a4@0.0, b4@3.0), (a5@0.0, b5@2.0), (b5@2.0, b4@3.0), (b0@1.1, b5@2.0), (b4@3.0, b3@4.0), (b3@4.0, b2@5.1), (b2@5.1, b1@6.1)]"
 
 
+def test_generate_causal_graph_from_events_with_run_77():
+    places = read.read_tidy_csv(PLACES, 'place', drop_non_coloured_sums=True)
+    transitions = read.read_tidy_csv(TRANSITIONS, 'transition', drop_non_coloured_sums=True)
+    events = event_log_from_transitions(transitions)
+    assert list(events.columns) == EVENT_LOG_COLUMNS
+    assert list(events['unit']) == [5, 4, 3, 2, 1]
+
+    causal_graph = generate_causal_graph_from_events(places, events)
+
+    # Spike records no coloured columns for the external transition into b0, so b5 has only its local input
+    assert str(list(causal_graph.edges)) == "[(a1@0.0, b1@6.1), (a2@0.0, b2@5.1), (a3@0.0, b3@4.0), (a4@0.0, b4@3.0), (a5@0.0, b5@2.0), (b5@2.0, b4@3.0), (b4@3.0, b3@4.0), (b3@4.0, b2@5.1), (b2@5.1, b1@6.1)]"
+
+
+def test_generate_causal_graph_from_events_reorders_events_at_same_time():
+    places = pd.DataFrame([
+        # time, name, num, count
+        [0., 'a', 0, 0], [0., 'a', 1, 1], [0., 'a', 2, 1],
+        [0., 'b', 0, 1], [0., 'b', 1, 0], [0., 'b', 2, 0],
+    ], columns=['time', 'name', 'num', 'count'])
+    events = pd.DataFrame([
+        # unit 2 follows unit 1 which follows unit 0, all in the same sample step
+        [1., 'ab', 2, 1, float('nan')],
+        [1., 'ab', 1, 0, float('nan')],
+    ], columns=EVENT_LOG_COLUMNS)
+
+    causal_graph = generate_causal_graph_from_events(places, events)
+
+    O = Occasion
+    assert set(causal_graph.predecessors(O(2, 'b', 1.))) == {O(2, 'a', 0.), O(1, 'b', 1.)}
+    assert set(causal_graph.predecessors(O(1, 'b', 1.))) == {O(1, 'a', 0.), O(0, 'b', 0.)}
+
+
 def occ_pair(a, b):
     # s of form a1@0.0
     astate, aunit, atime = a[0], a[1], a[-3:]
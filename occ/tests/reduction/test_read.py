@@ -55,6 +55,25 @@ def test_tidy_places(raw_frame, tidy_frame):
     assert_frame_equal(frame, tidy_frame)
 
 
+def test_tidy_places_parses_each_header_once(raw_frame, tidy_frame):
+    raw_frame = pd.concat([raw_frame, raw_frame.assign(Time=.1)], ignore_index=True)
+    frame = read.tidy_places(raw_frame, drop_non_coloured_sums=True)
+    assert list(frame.index) == [2, 3, 4, 5, 8, 9]  # labelled as by pd.melt before dropping sums
+    assert list(frame['time']) == [0., .1, 0., .1, 0., .1]
+    assert list(frame['name']) == ['a', 'a', 'a', 'a', 'b', 'b']
+    assert list(frame['num']) == [1, 1, 2, 2, 1, 1]
+
+
+def test_tidy_places_compact(raw_frame, tidy_frame):
+    frame = read.tidy_places(raw_frame, compact=True)
+    assert frame['name'].dtype == 'category'
+    assert frame['num'].dtype == 'Int32'
+    assert list(frame['name']) == list(tidy_frame['name'])
+    assert list(frame['num'].fillna(0)) == list(tidy_frame['num'].fillna(0))
+    frame = read.tidy_places(raw_frame, drop_non_coloured_sums=True, compact=True)
+    assert frame['num'].dtype == 'int32'
+
+
 def test_prepend_tidy_frame_with_tstep():
     f_in = pd.DataFrame()
     f_in['time'] = pd.Series([0., 0., .1, .1, .2, .2])
@@ -66,6 +85,22 @@ def test_prepend_tidy_frame_with_tstep():
     assert_frame_equal(actual, desired)
 
 
+def test_tidy_with_tstep(raw_frame):
+    raw_frame = pd.concat([raw_frame, raw_frame.assign(Time=.1)], ignore_index=True)
+    for tidy in (read.tidy_places, read.tidy_transitions):
+        desired = read.prepend_tidy_frame_with_tstep(tidy(raw_frame, drop_non_coloured_sums=True))
+        actual = tidy(raw_frame, drop_non_coloured_sums=True, tstep=True)
+        assert_frame_equal(actual, desired)
+        assert list(actual['tstep'][:2]) == [0, 1]
+
+
+def test_tstep_warns_of_float_drift(caplog):
+    f_in = pd.DataFrame({'time': [0., .1, .2, .30000000000000004, .3]})
+    actual = occ.reduction.read.prepend_tidy_frame_with_tstep(f_in)
+    assert list(actual['tstep']) == [0, 1, 2, 3, 4]
+    assert 'float drift' in caplog.text
+
+
 def test_tidy_with_underscore_name():
 
     input_frame = pd.DataFrame(
@@ -124,9 +159,68 @@ class TestLoadTransitions:
         log(frame)
         assert list(frame.columns) == ['time', 'type', 'name', 'unit', 'neighbour', 'neighbour2', 'count']
 
+    def test_headers_broadcast_to_each_time(self):
+        raw_frame = pd.DataFrame({'Time': [0., .1], 'f1ab': [1, 1], 'f1ab_1_10': [1, 0], 'f2ab_1_2_3': [0, 1]})
+        frame = read.tidy_transitions(raw_frame, drop_non_coloured_sums=True)
+        assert list(frame.index) == [2, 3, 4, 5]  # labelled as by pd.melt before dropping sums
+        assert list(frame['name']) == ['f1ab', 'f1ab', 'f2ab', 'f2ab']
+        assert list(frame['unit']) == [10, 10, 3, 3]
+        assert list(frame['neighbour']) == [1, 1, 1, 1]
+        assert list(frame['neighbour2'].fillna(-1)) == [-1, -1, 2, 2]
+        assert list(frame['count']) == [1, 0, 0, 1]
+
+    def test_compact(self):
+        raw_frame = pd.DataFrame({'Time': [0., .1], 'f1ab': [1, 1], 'f1ab_1_10': [1, 0], 'f2ab_1_2_3': [0, 1]})
+        frame = read.tidy_transitions(raw_frame, compact=True)
+        assert frame['name'].dtype == 'category'
+        assert list(frame['name'].astype(object).fillna('-')) == ['-', '-', 'f1ab', 'f1ab', 'f2ab', 'f2ab']
+        for column in ('unit', 'neighbour', 'neighbour2'):
+            assert frame[column].dtype == 'Int32'
+        assert frame['neighbour2'].isna().sum() == 4
+
+    def test_drop_zero_counts(self):
+        raw_frame = pd.DataFrame({'Time': [0., .1], 'f1ab': [1, 1], 'f1ab_1_10': [1, 0], 'f2ab_1_2_3': [0, 1]})
+        frame = read.tidy_transitions(raw_frame, drop_non_coloured_sums=True, tstep=True, drop_zero_counts=True)
+        assert list(frame.index) == [2, 5]  # labelled as by pd.melt before dropping
+        assert list(frame['tstep']) == [0, 1]
+        assert list(frame['name']) == ['f1ab', 'f2ab']
+        assert list(frame['count']) == [1, 1]
+
+    def test_drop_zero_counts_matches_filtering_every_count(self):
+        raw_frame = read.read_raw_csv(occ_test_files.RUN_71_TRANSITIONS)
+        frame = read.tidy_transitions(raw_frame, tstep=True)
+        assert_frame_equal(read.tidy_transitions(raw_frame, tstep=True, drop_zero_counts=True),
+                           frame[frame['count'] != 0])
+
     def test_with_are_both_neighbours__func_used(self):
         transitions = read.read_tidy_csv(occ_test_files.files.RUN_90_TRANSITIONS, 'transition')
         log([transitions])
 
 
 
+
+
+class TestReadSelection:
+
+    def test_names_read_match_filtering_everything(self):
+        expected = read.filter_by_name(read.read_tidy_places(occ_test_files.RUN_71_PLACES), ['a'])
+        assert_frame_equal(read.read_tidy_places(occ_test_files.RUN_71_PLACES, ['a']), expected)
+        transitions = read.read_tidy_transitions(occ_test_files.RUN_71_TRANSITIONS, drop_non_coloured_sums=True)
+        expected = read.filter_by_name(transitions, ['ab'])
+        assert_frame_equal(read.read_tidy_transitions(occ_test_files.RUN_71_TRANSITIONS, ['ab'], True), expected)
+
+    def test_units(self):
+        frame = read.read_tidy_transitions(occ_test_files.RUN_71_TRANSITIONS, unit_list=[2, 3])
+        assert set(frame['unit']) == {2, 3}
+        places = read.read_tidy_places(occ_test_files.RUN_71_PLACES, unit_list=[2])
+        assert set(places['num']) == {2}
+
+    def test_time_range(self):
+        everything = read.read_tidy_places(occ_test_files.RUN_71_PLACES)
+        frame = read.read_tidy_places(occ_test_files.RUN_71_PLACES, time_range=(1., 2.))
+        expected = everything[(everything['time'] >= 1.) & (everything['time'] <= 2.)].reset_index(drop=True)
+        assert_frame_equal(frame, expected)
+
+    def test_empty_time_range(self):
+        frame = read.read_tidy_places(occ_test_files.RUN_71_PLACES, time_range=(-2., -1.))
+        assert len(frame) == 0
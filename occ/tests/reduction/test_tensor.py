@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import occ_test_files
+from occ.reduction import read
+from occ.reduction.tensor import PlaceTensor
+
+
+@pytest.fixture()
+def raw_frame():
+    return pd.DataFrame({
+        'Time': [0., .1, .2],
+        'b': [0, 1, 1],
+        'a': [2, 1, 1],
+        'b_0': [0, 1, 1],
+        'a_0': [1, 0, 0],
+        'b_1': [0, 0, 0],
+        'a_1': [1, 1, 1],
+    })
+
+
+def test_from_raw(raw_frame):
+    tensor = PlaceTensor.from_raw(raw_frame)
+    assert tensor.states == ['a', 'b']
+    assert list(tensor.units) == [0, 1]
+    assert list(tensor.times) == [0., .1, .2]
+    assert tensor.counts.shape == (3, 2, 2)
+    assert list(tensor.state('b')[:, 0]) == [0, 1, 1]
+    assert tensor.unit(1).tolist() == [[1, 0], [1, 0], [1, 0]]
+    assert tensor.at(1).tolist() == [[0, 1], [1, 0]]
+
+
+def test_slices_are_views(raw_frame):
+    tensor = PlaceTensor.from_raw(raw_frame)
+    assert np.shares_memory(tensor.state('a'), tensor.counts)
+    assert np.shares_memory(tensor.unit(0), tensor.counts)
+
+
+def test_from_tidy_matches_from_raw(raw_frame):
+    tidy = read.tidy_places(raw_frame, drop_non_coloured_sums=False, tstep=True)
+    from_tidy = PlaceTensor.from_tidy(tidy)
+    from_raw = PlaceTensor.from_raw(raw_frame)
+    assert from_tidy.states == from_raw.states
+    np.testing.assert_array_equal(from_tidy.units, from_raw.units)
+    np.testing.assert_array_equal(from_tidy.times, from_raw.times)
+    np.testing.assert_array_equal(from_tidy.counts, from_raw.counts)
+
+
+def test_to_tidy_round_trips():
+    raw_frame = read.read_raw_csv(occ_test_files.RUN_71_PLACES)
+    tidy = read.tidy_places(raw_frame, drop_non_coloured_sums=True, tstep=True)
+    tensor = PlaceTensor.from_raw(raw_frame)
+    expected = tidy.sort_values(by=['name', 'num', 'tstep'], kind='stable').reset_index(drop=True)
+    expected['num'] = expected['num'].astype(np.int64)
+    pd.testing.assert_frame_equal(tensor.to_tidy(), expected)
+    assert tensor.counts.nbytes < tidy.memory_usage(deep=True).sum() / 4
+
+
+def test_changed_tsteps(raw_frame):
+    tensor = PlaceTensor.from_raw(raw_frame)
+    assert tensor.changed_tsteps().tolist() == [0, 1]
@@ -0,0 +1,107 @@
+import os
+
+import networkx as nx
+import pytest
+
+import occ.native
+import pyspike.exe
+from occ.export import Export, export_lists
+from occ.model import Unit, UnitModel, ext, u, n1, SystemModel, follow1, marking
+from occ.model.ir import compile_ir
+from occ.sim import SimArgs
+
+
+@pytest.fixture
+def model():
+    a = Unit.place('a', marking([1, 2]))
+    b = Unit.place('b', marking([0]))
+    m = UnitModel(name='follow', colors=[Unit], variables=[u, n1], places=[a, b])
+    m.add_transitions_from([follow1(a, b, 1), ext(a, b, 0.5, [2])])
+    return SystemModel(m, nx.Graph([(0, 1), (1, 2)]), 'line', None)
+
+
+def test_everything(model):
+    assert Export().is_everything()
+    assert export_lists(model, Export()) == (None, None)
+
+
+def test_coloured_places(model):
+    places, transitions = export_lists(model, Export(places='coloured'))
+    assert places == ['a_0', 'a_1', 'a_2', 'b_0', 'b_1', 'b_2']
+    assert transitions is None
+
+
+def test_place_sums(model):
+    assert export_lists(model, Export(places='sums'))[0] == ['a', 'b']
+
+
+def test_named_places(model):
+    assert export_lists(model, Export(place_names=['b']))[0] == ['b', 'b_0', 'b_1', 'b_2']
+
+
+def test_transition_families(model):
+    places, transitions = export_lists(model, Export(transitions='coloured', transition_names=['f1ab']))
+    assert places is None
+    assert transitions == ['f1ab_1_0', 'f1ab_0_1', 'f1ab_2_1', 'f1ab_1_2']
+    assert export_lists(model, Export(transitions='sums'))[1] == ['f1ab', 'extab']
+
+
+def test_spc_export_of_model_with_rate_unsupported_by_native_backend(tmp_path):
+    a = Unit.place('a', marking([1, 2]))
+    b = Unit.place('b', marking([0]))
+    m = UnitModel(name='follow', colors=[Unit], variables=[u, n1], places=[a, b])
+    m.add_transitions_from([follow1(a, b, 'BioMassAction(0.5)'), ext(a, b, 0.5, [2])])
+    model = SystemModel(m, nx.Graph([(0, 1), (1, 2)]), 'line', None)
+    with pytest.raises(ValueError):
+        compile_ir(model)
+
+    places, transitions = export_lists(model, Export(places='coloured', place_names=['b'], transitions='coloured'))
+    pyspike.exe.run_in_dir(m.to_candl_string(model.network), SimArgs(start=0, stop=1, step=.1, runs=1, repeat_sim=1),
+                           str(tmp_path), skip_call=True, export_places=places, export_transitions=transitions)
+    with open(os.path.join(tmp_path, 'input', 'conf.spc')) as f:
+        spc = f.read()
+    assert '''        export: {
+            places: ["b_0", "b_1", "b_2"]
+            to: "output/places.csv"
+        }
+        export: {
+            transitions: ["f1ab_1_0", "f1ab_0_1", "f1ab_2_1", "f1ab_1_2"]
+            to: "output/transitions.csv"
+        }''' in spc
+
+
+def test_unknown_names(model):
+    with pytest.raises(ValueError):
+        export_lists(model, Export(transition_names=['f2ab']))
+    with pytest.raises(ValueError):
+        Export(places='some')
+
+
+def test_empty_selection_is_rejected(model):
+    with pytest.raises(ValueError):
+        Export(transition_names=[])
+    with pytest.raises(ValueError):
+        Export(places='sums', place_names=())
+
+    only_external = SystemModel(UnitModel(name='ext', colors=[Unit], variables=[u], places=[]), model.network, '', None)
+    a, b = Unit.place('a', marking([1])), Unit.place('b')
+    only_external.unit.add_transitions_from([ext(a, b, 0.5, [1])])
+    with pytest.raises(ValueError):
+        export_lists(only_external, Export(transitions='coloured'))  # External transitions have no coloured columns
+
+
+@pytest.mark.parametrize('backend', ['spike', 'native'])
+def test_empty_selection_is_rejected_by_both_backends(model, backend, tmp_path):
+    sim_args = SimArgs(start=0, stop=1, step=.1)
+    with pytest.raises(ValueError):
+        if backend == 'spike':
+            pyspike.exe.run_in_dir(model.unit.to_candl_string(model.network), sim_args, str(tmp_path), skip_call=True,
+                                   export_transitions=[])
+        else:
+            occ.native.run_in_dir(model, sim_args, str(tmp_path), export_transitions=[])
+    assert not os.listdir(tmp_path)
+
+
+def test_to_dict_round_trip():
+    export = Export(places='coloured', transition_names=('f1ab',))
+    assert Export(**export.to_dict()) == Export(places='coloured', transition_names=['f1ab'])
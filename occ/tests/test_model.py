@@ -1,11 +1,19 @@
+import re
+
 import pytest
 
 import networkx as nx
+import pandas as pd
 
 import occ.model.colour_functions
 import occ.model.transitions
+import occ.sim
+import pyspike.exe
 from occ import model
 from occ.model.colour_functions import graph_to_is_neighbour_func, graph_to_are_both_neighbours_func
+from occ.model.colour_functions import graph_to_is_neighbour_offset_func, graph_to_are_both_neighbours_offset_func
+from occ.model.ir import compile_ir
+from occ.model.network import Adjacency
 
 
 @pytest.fixture()
@@ -162,7 +170,7 @@ class TestTransitions:
     ;"""
 
 
-def test_integration(medium_graph):
+def test_integration(medium_graph, tmp_path):
 
     from occ.model import UnitModel, u, n1, n2, Place, Unit
     from occ.model import follow1, follow2, ext
@@ -264,6 +272,10 @@ deterministic:
 
 }
 """
+    # Streamed a section at a time
+    candl_path = m.to_candl_file(medium_graph, 'some graph', tmp_path)
+    assert candl_path.read_text() == m.to_candl_string(medium_graph, 'some graph')
+
 
 class TestUnitModel:
 
@@ -293,6 +305,12 @@ class TestUnitModel:
         with pytest.raises(ValueError):
             m.add_transition(t)
 
+    def test_add_transitions_with_different_guard_encodings_fails(self, m, place_a, place_b, place_e):
+        m.add_transition(occ.model.transitions.FollowNeighbour(place_a, place_b))
+        m.add_transition(occ.model.transitions.FollowNeighbour(place_b, place_e))
+        with pytest.raises(ValueError):
+            m.add_transition(occ.model.transitions.FollowNeighbour(place_a, place_e, guard_encoding='offset'))
+
     def test__colorsets_chunk(self, m, medium_graph):
         assert m._colorsets_chunk(medium_graph) == """\
 colorsets:
@@ -403,4 +421,150 @@ class TestGraphToAreBothNeighboursFunc(object):
         g.add_edge(2, 3)
         g.add_edge(3, 1)
         g.add_edge(3, 4)
-        assert graph_to_are_both_neighbours_func(g) == '(n1!=n2) & ((u=1 & (n1=2|n1=3) & (n2=2|n2=3)) | (u=2 & (n1=1|n1=3) & (n2=1|n2=3)) | (u=3 & (n1=1|n1=2|n1=4) & (n2=1|n2=2|n2=4)) | (u=4 & (n1=3) & (n2=3)))'
\ No newline at end of file
+        assert graph_to_are_both_neighbours_func(g) == '(n1!=n2) & ((u=1 & (n1=2|n1=3) & (n2=2|n2=3)) | (u=2 & (n1=1|n1=3) & (n2=1|n2=3)) | (u=3 & (n1=1|n1=2|n1=4) & (n2=1|n2=2|n2=4)) | (u=4 & (n1=3) & (n2=3)))'
+
+def evaluate_candl_guard(guard, **colours):
+    """Evaluate a candl guard of = != >= <= + - & | and brackets in python."""
+    expression = re.sub(r'(?<![!<>])=', '==', guard)
+    expression = expression.replace('&', ' and ').replace('|', ' or ')
+    return eval(expression, {}, colours)
+
+
+class TestGraphToIsNeighbourOffsetFunc(object):
+
+    def test_pair(self):
+        g = nx.Graph()
+        g.add_edge(4, 5)
+        assert graph_to_is_neighbour_offset_func(g) == '(y=x-1 & (x=5)) | (y=x+1 & (x=4))'
+
+    def test_line(self):
+        g = nx.path_graph(5)
+        assert graph_to_is_neighbour_offset_func(g, 'u', 'n1') == (
+            '(n1=u-1 & ((u>=1 & u<=4))) | (n1=u+1 & ((u>=0 & u<=3)))')
+
+    @pytest.mark.parametrize('g', [
+        nx.convert_node_labels_to_integers(nx.grid_2d_graph(4, 5)),
+        nx.cycle_graph(7),
+        nx.gnm_random_graph(12, 20, seed=1),
+    ])
+    def test_same_relation_as_disjunction(self, g):
+        disjunction = graph_to_is_neighbour_func(g)
+        offset = graph_to_is_neighbour_offset_func(g)
+        for x in g.nodes:
+            for y in g.nodes:
+                expected = g.has_edge(x, y)
+                assert evaluate_candl_guard(disjunction, x=x, y=y) == expected
+                assert evaluate_candl_guard(offset, x=x, y=y) == expected
+
+    def test_grid_is_much_shorter(self):
+        g = nx.convert_node_labels_to_integers(nx.grid_2d_graph(50, 50))
+        assert len(graph_to_is_neighbour_offset_func(g)) * 10 < len(graph_to_is_neighbour_func(g))
+
+
+class TestGraphToAreBothNeighboursOffsetFunc(object):
+
+    def test_same_relation_as_disjunction(self):
+        g = nx.convert_node_labels_to_integers(nx.grid_2d_graph(3, 4))
+        disjunction = graph_to_are_both_neighbours_func(g)
+        offset = graph_to_are_both_neighbours_offset_func(g)
+        for u in g.nodes:
+            for n1 in g.nodes:
+                for n2 in g.nodes:
+                    colours = dict(u=u, n1=n1, n2=n2)
+                    assert evaluate_candl_guard(offset, **colours) == evaluate_candl_guard(disjunction, **colours)
+
+    def test_candl(self, medium_graph):
+        f = occ.model.colour_functions.AreBothNeighbours(encoding='offset')
+        assert f.to_candl(medium_graph) == (
+            'bool  are_both_neighbours(Unit u,Unit n1,Unit n2) { (n1!=n2) & '
+            '((n1=u-2 & (u=3)) | (n1=u-1 & ((u>=2 & u<=4))) | (n1=u+1 & ((u>=1 & u<=3))) | (n1=u+2 & (u=1))) & '
+            '((n2=u-2 & (u=3)) | (n2=u-1 & ((u>=2 & u<=4))) | (n2=u+1 & ((u>=1 & u<=3))) | (n2=u+2 & (u=1))) };')
+
+    def test_unknown_encoding(self):
+        with pytest.raises(ValueError):
+            occ.model.colour_functions.AreBothNeighbours(encoding='table')
+
+
+def test_cached_colour_functions_distinguish_encodings(medium_graph, place_a, place_b):
+    def candl(guard_encoding):
+        m = model.UnitModel('some name', [model.Unit], [model.u, model.n1])
+        m.add_transition(occ.model.transitions.FollowNeighbour(place_a, place_b, guard_encoding=guard_encoding))
+        return m._colorfunctions_chunk(medium_graph)
+    assert candl('disjunction') == 'colorfunctions:\n' + IS_NEIGHBOUR_CANDL + '\n'
+    assert candl('offset') != candl('disjunction')
+
+
+@pytest.mark.skipif(not pyspike.exe.spike_available(), reason='Spike is not installed')
+def test_spike_runs_both_guard_encodings_alike():
+    g = nx.convert_node_labels_to_integers(nx.grid_2d_graph(3, 4))
+
+    def simulate(guard_encoding):
+        a = model.Unit.place('a', '1`0')
+        b = model.Unit.place('b', '1`all')
+        c = model.Unit.place('c')
+        m = model.UnitModel(name='guard_encoding', colors=[model.Unit], variables=[model.u, model.n1, model.n2])
+        m.add_transitions_from([
+            model.follow1(b, a, rate='100', guard_encoding=guard_encoding),  # spreads over the whole grid
+            model.follow2(a, c, rate='0', guard_encoding=guard_encoding),  # only unfolded
+        ])
+        return occ.sim.run_in_tmp(model.SystemModel(m, g, 'grid', None), model.SimArgs(start=0, step=1, stop=10))
+
+    disjunction = simulate('disjunction')
+    offset = simulate('offset')
+    assert list(offset.raw_places.columns) == list(disjunction.raw_places.columns)
+    assert set(offset.raw_transitions.columns) == set(disjunction.raw_transitions.columns)
+    assert {c for c in offset.raw_transitions.columns if c.startswith('f1ba_')} == {
+        f"f1ba_{n1}_{u}" for u, n1 in g.to_directed().edges}
+    last = offset.raw_places.iloc[-1]
+    pd.testing.assert_series_equal(last, disjunction.raw_places.iloc[-1], check_names=False)
+    assert all(last[f"b_{unit}"] == 0 for unit in g.nodes)
+
+
+class TestAdjacency:
+
+    def test_matches_graph(self):
+        g = nx.convert_node_labels_to_integers(nx.grid_2d_graph(3, 4))
+        adjacency = Adjacency.from_graph(g)
+        for x in g.nodes:
+            assert list(adjacency.neighbours(x)) == sorted(g.adj[x])
+        assert list(adjacency.degree) == [d for _, d in g.degree]
+
+    def test_neighbour_pairs(self):
+        g = nx.Graph([(0, 1), (1, 2), (2, 3), (3, 0), (0, 2)])
+        units, first, second = Adjacency.from_graph(g).neighbour_pairs()
+        expected = [(x, y, z) for x in g.nodes for y in sorted(g.adj[x]) for z in sorted(g.adj[x]) if y != z]
+        assert list(zip(units, first, second)) == expected
+
+
+class TestModelIR:
+
+    @pytest.fixture()
+    def ir(self, place_a, place_b, place_e):
+        m = model.UnitModel('ir', [model.Unit], [model.u, model.n1, model.n2])
+        m.add_transitions_from([
+            model.follow1(place_a, place_b, 'MassAction(2)', use_read_arc=True),
+            model.follow2(place_a, place_b, 3, enabled_by_local=place_e),
+            model.ext(place_b, place_e, 0.5, [0, 2]),
+        ])
+        return compile_ir(model.SystemModel(m, nx.Graph([(0, 1), (1, 2)]), 'line', None))
+
+    def test_places_and_transitions(self, ir):
+        assert ir.place_names == ['a', 'b', 'e']
+        assert ir.transition_names == ['f1ab', 'f2Leab', 'extbe']
+        assert ir.initial_marking.tolist() == [[1, 1, 1], [0, 0, 0], [0, 0, 0]]
+
+    def test_stoichiometry(self, ir):
+        assert ir.stoichiometry.tolist() == [[0, 1, 0], [-1, 1, 0], [0, -1, 1]]
+        assert ir.test.tolist() == [[1, 0, 0], [0, 0, 1], [0, 0, 0]]
+        assert ir.neighbour_test.tolist() == [[0, 1, 0], [0, 1, 0], [0, 0, 0]]
+        assert list(ir.arity) == [1, 2, 0]
+
+    def test_rates(self, ir):
+        assert list(ir.rate) == [2., 3., .5]
+        assert list(ir.mass_action) == [True, False, False]
+        assert list(ir.stochastic) == [True, True, False]
+        assert list(ir.external_units[2]) == [0, 2]
+
+    def test_column_names(self, ir):
+        assert ir.column_names(0, *ir.bindings(0)) == ['f1ab_1_0', 'f1ab_0_1', 'f1ab_2_1', 'f1ab_1_2']
+        assert ir.column_names(1, *ir.bindings(1)) == ['f2Leab_0_2_1', 'f2Leab_2_0_1']
@@ -1,3 +1,4 @@
+import dataclasses
 import json
 import os
 from io import StringIO
@@ -6,6 +7,7 @@ import networkx as nx
 import pandas as pd
 import pytest
 
+from occ.export import Export
 from occ.model import Unit, UnitModel, ext, u, SystemModel
 from occ.sim import SimArgs, run_in_dir, run_in_tmp, run, save, load, _IncrementalDir
 import occ.sim
@@ -134,6 +136,164 @@ def test_load(model, sim_args, tmp_path):
     pd.testing.assert_frame_equal(expected.raw_transitions, actual.raw_transitions)
 
 
+def test_run_in_tmp_with_native_backend(model, sim_args):
+    sr = run_in_tmp(model, sim_args, backend='native', seed=0)
+    assert sr.sim_args == sim_args
+    assert sr.model == model
+    assert sr.run == {}
+    assert list(sr.raw_places['a_0']) == [1] * 6 + [0] * 4
+    assert list(sr.raw_places['b_0']) == [0] * 6 + [1] * 4
+    assert set(sr.places['name']) == {'a', 'b'}
+    assert list(sr.events['time']) == [0.5]
+
+
+def test_run_with_native_backend_and_load(model, sim_args, tmp_path):
+    expected = run(model, sim_args, tmp_path, backend='native', seed=0)
+    with open(os.path.join(tmp_path, '0', 'manifest.json'), "r") as read_file:
+        manifest = json.load(read_file)
+    assert manifest['backend'] == 'native'
+    assert manifest['native']['output'] == {
+        'places': ['output/places.csv'],
+        'transitions': ['output/transitions.csv'],
+        'events': ['output/events.csv']
+    }
+    assert not os.path.exists(os.path.join(tmp_path, '0', 'spike'))
+
+    actual = load(0, tmp_path)
+    assert expected.sim_args == actual.sim_args
+    pd.testing.assert_frame_equal(expected.places, actual.places)
+    pd.testing.assert_frame_equal(expected.transitions, actual.transitions)
+    pd.testing.assert_frame_equal(expected.raw_places, actual.raw_places)
+    pd.testing.assert_frame_equal(expected.events, actual.events)
+    assert list(actual.events['unit']) == [0]
+
+
+def test_run_uses_cached_run_with_same_fingerprint(model, sim_args, tmp_path):
+    first = run(model, sim_args, tmp_path, backend='native', seed=0, cache=True)
+    again = run(model, sim_args, tmp_path, backend='native', seed=0, cache=True)
+    assert again.run == first.run == {'dir': os.path.join(tmp_path, '0'), 'num': 0}
+    pd.testing.assert_frame_equal(first.raw_places, again.raw_places)
+
+    assert run(model, sim_args, tmp_path, backend='native', seed=1, cache=True).run['num'] == 1
+    assert run(model, sim_args, tmp_path, backend='native', seed=0).run['num'] == 2
+
+
+def test_find_run_indexes_fingerprints(model, sim_args, tmp_path):
+    first = run(model, sim_args, tmp_path, backend='native', seed=0)
+    fingerprint = occ.sim.fingerprint(model, sim_args, backend='native', seed=0)
+    with open(os.path.join(tmp_path, occ.sim.RUN_INDEX_FILE_NAME), 'r') as f:
+        assert json.load(f) == {'last_run': 0, 'fingerprints': {fingerprint: 0}}
+
+    # Runs from before the index, or written by write_run_dir, are indexed when next looked up
+    os.remove(os.path.join(tmp_path, occ.sim.RUN_INDEX_FILE_NAME))
+    os.makedirs(os.path.join(tmp_path, '1'))  # a failed run
+    os.makedirs(os.path.join(tmp_path, '2'))
+    occ.sim.write_run_dir(model, sim_args, os.path.join(tmp_path, '2'), backend='native', seed=0)
+    assert occ.sim.find_run(fingerprint, tmp_path) == 2
+    assert occ.sim.find_run(occ.sim.fingerprint(model, sim_args, backend='native', seed=1), tmp_path) is None
+    assert first.run['num'] == 0
+
+
+def test_run_without_seed_is_never_cached(model, sim_args, tmp_path):
+    assert run(model, sim_args, tmp_path, backend='native').run['num'] == 0
+    assert run(model, sim_args, tmp_path, backend='native', cache=True).run['num'] == 1
+    assert run(model, sim_args, tmp_path, backend='native', cache=True).run['num'] == 2
+
+
+def test_run_with_export(model, sim_args, tmp_path):
+    export = Export(places='coloured', place_names=['b'])
+    sr = run(model, sim_args, tmp_path, backend='native', seed=0, export=export)
+    assert list(sr.raw_places.columns) == ['Time', 'b_0', 'b_1', 'b_2']
+    assert set(sr.places['name']) == {'b'}
+    with open(os.path.join(tmp_path, '0', 'manifest.json'), "r") as read_file:
+        manifest = json.load(read_file)
+    assert manifest['export'] == export.to_dict()
+    assert load(0, tmp_path).export == export
+    assert run(model, sim_args, tmp_path, backend='native', seed=0).run['num'] == 1
+
+
+def test_load_reads_cached_frames(model, sim_args, tmp_path):
+    pytest.importorskip('pyarrow')
+    sr = run(model, sim_args, tmp_path, backend='native', seed=0)
+    assert os.path.exists(os.path.join(tmp_path, '0', 'native', 'output', 'places.arrow'))
+    loaded = load(0, tmp_path)
+    pd.testing.assert_frame_equal(loaded.places, sr.places)
+    pd.testing.assert_frame_equal(loaded.transitions, sr.transitions)
+    pd.testing.assert_frame_equal(loaded.raw_places, sr.raw_places)
+
+
+def test_load_lazily(model, sim_args, tmp_path):
+    sr = run(model, sim_args, tmp_path, backend='native', seed=0)
+    lazy = load(0, tmp_path, lazy=True)
+    assert lazy.sim_args == sim_args
+    assert 'places' not in vars(lazy) and 'raw_places' not in vars(lazy)
+    pd.testing.assert_frame_equal(lazy.places, sr.places)
+    assert 'raw_places' in vars(lazy) and 'transitions' not in vars(lazy)
+    assert lazy.places is lazy.places
+    pd.testing.assert_frame_equal(lazy.events, sr.events)
+    lazy.release_frames()
+    assert 'places' not in vars(lazy)
+    pd.testing.assert_frame_equal(lazy.transitions, sr.transitions)
+    with pytest.raises(AttributeError):
+        lazy.place
+
+
+def test_release_frames_of_temporary_run_keeps_them(model, sim_args):
+    sr = run_in_tmp(model, sim_args, backend='native')
+    sr.release_frames()
+    assert sr.places is not None
+
+
+def test_open_store(model, sim_args, tmp_path):
+    sr = run(model, sim_args, tmp_path, backend='native', seed=0)
+    store = sr.open_store('places')
+    pd.testing.assert_frame_equal(store.frame(), sr.raw_places)
+    assert store.frame(columns=['b_1'])['b_1'].tolist() == sr.raw_places['b_1'].tolist()
+    with pytest.raises(ValueError):
+        dataclasses.replace(sr, run={}).open_store()
+
+
+def test_place_tensor(model, sim_args, tmp_path):
+    sr = run(model, sim_args, tmp_path, backend='native', seed=0)
+    tensor = sr.place_tensor
+    assert tensor is sr.place_tensor
+    assert tensor.counts.shape == (sr.places['tstep'].nunique(), sr.places['name'].nunique(), 3)
+    b = sr.places[sr.places['name'] == 'b']
+    assert list(tensor.state('b')[:, 1]) == list(b[b['num'] == 1]['count'])
+
+
+def test_fingerprint(model, sim_args):
+    same_graph = nx.Graph([(2, 1), (1, 0)])
+    assert occ.sim.fingerprint(model, sim_args) == occ.sim.fingerprint(
+        SystemModel(model.unit, same_graph, 'other name', None), dataclasses.replace(sim_args, stop=1.))
+    assert occ.sim.fingerprint(model, sim_args) != occ.sim.fingerprint(
+        model, dataclasses.replace(sim_args, runs=2))
+    assert occ.sim.fingerprint(model, sim_args) != occ.sim.fingerprint(model, sim_args, backend='native')
+
+    repeats = dataclasses.replace(sim_args, repeat_sim=2)
+    assert occ.sim.fingerprint(model, repeats, backend='native', seed=0) != occ.sim.fingerprint(
+        model, repeats, backend='native', seed=0, workers=2)
+    assert occ.sim.fingerprint(model, sim_args, backend='native', seed=0) == occ.sim.fingerprint(
+        model, sim_args, backend='native', seed=0, workers=2)
+
+
+def test_run_repeats_on_worker_processes(model, sim_args, tmp_path):
+    sim_args = dataclasses.replace(sim_args, repeat_sim=3)
+    sr = run(model, sim_args, tmp_path, backend='native', seed=0, workers=2)
+    with open(os.path.join(tmp_path, '0', 'manifest.json'), "r") as read_file:
+        manifest = json.load(read_file)
+    # Laid out as for a serial run
+    assert manifest['native']['output'] == {
+        'places': ['output/places.csv'] + [f"output/places_000{i}.csv" for i in range(3)],
+        'transitions': ['output/transitions.csv'] + [f"output/transitions_000{i}.csv" for i in range(3)],
+        'events': ['output/events.csv'] + [f"output/events_000{i}.csv" for i in range(3)],
+    }
+    for path_list in manifest['native']['output'].values():
+        for path in path_list:
+            assert os.path.isfile(os.path.join(tmp_path, '0', 'native', path))
+    assert list(sr.raw_places['b_0']) == [0] * 6 + [1] * 4
+
+
 class TestArchiveInNextDir:
 
     @pytest.fixture(autouse=True)
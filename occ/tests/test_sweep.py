@@ -0,0 +1,73 @@
+import os
+
+import networkx as nx
+import pytest
+
+import occ.sim
+import occ.sweep
+from occ.model import Unit, UnitModel, ext, u, SystemModel
+from occ.sim import SimArgs
+
+
+def make_point(delay, stop):
+    a = Unit.place('a', '1`all')
+    b = Unit.place('b')
+    m = UnitModel(name='external_transition', colors=[Unit], variables=[u], places=[a, b])
+    m.add_transitions_from([ext(a, b, delay, [0])])
+    model = SystemModel(m, nx.Graph([(0, 1), (1, 2)]), 'two graph', None)
+    return model, SimArgs(start=0, stop=stop, step=.1)
+
+
+@pytest.fixture
+def points():
+    return occ.sweep.points_from_params(make_point, occ.sweep.grid(delay=[0.25, 0.55], stop=[1]))
+
+
+def test_grid():
+    assert occ.sweep.grid(rate=[1, 2], seed=[3]) == [{'rate': 1, 'seed': 3}, {'rate': 2, 'seed': 3}]
+
+
+def test_run_sweep(points, tmp_path):
+    index = occ.sweep.run_sweep(points, tmp_path, workers=2, backend='native', seed=0)
+    assert list(index['status']) == ['done', 'done']
+    assert list(index['delay']) == [0.25, 0.55]
+    for point, delay in zip(index['point'], index['delay']):
+        sr = occ.sim.load(point, tmp_path)
+        assert list(sr.events['time']) == [delay]
+
+
+def test_run_sweep_does_not_load_points(points, tmp_path, monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError('loaded a sweep point')
+
+    monkeypatch.setattr(occ.sim, 'create_simulation_result', fail)
+    index = occ.sweep.run_sweep(points, tmp_path, backend='native')
+    assert list(index['status']) == ['done', 'done']
+
+
+def test_rerun_sweep_retries_failed_points_only(points, tmp_path, monkeypatch):
+    write_run_dir = occ.sim.write_run_dir
+    calls = []
+
+    def fail_second_point(model, sim_args, run_dir, **kwargs):
+        calls.append(run_dir)
+        if run_dir == os.path.join(tmp_path, '1'):
+            raise RuntimeError('simulated failure')
+        return write_run_dir(model, sim_args, run_dir, **kwargs)
+
+    monkeypatch.setattr(occ.sim, 'write_run_dir', fail_second_point)
+    index = occ.sweep.run_sweep(points, tmp_path, backend='native')
+    assert list(index['status']) == ['done', 'failed']
+    assert 'simulated failure' in index['error'][1]
+
+    monkeypatch.setattr(occ.sim, 'write_run_dir', write_run_dir)
+    index = occ.sweep.run_sweep(points, tmp_path, backend='native')
+    assert list(index['status']) == ['done', 'done']
+    assert calls == [os.path.join(tmp_path, '0'), os.path.join(tmp_path, '1')]
+    assert occ.sim.load(1, tmp_path).events is not None
+
+
+def test_run_sweep_with_different_points_raises(points, tmp_path):
+    occ.sweep.run_sweep(points[:1], tmp_path, backend='native')
+    with pytest.raises(ValueError):
+        occ.sweep.run_sweep(points, tmp_path, backend='native')
@@ -161,8 +161,10 @@ def update_run_info(pathname):
 
     try:
         run_id = run_id_from_url(pathname)
+        sr = occ.sim.load(run_path(run_id), lazy=True)  # reads only the manifest and network
         return html.Div([
-            html.P(f"Run {run_id} at path {run_path(run_id)}")
+            html.P(f"Run {run_id} at path {run_path(run_id)}"),
+            html.P(f"{sr.model.network.number_of_nodes()} units. {sr.sim_args}")
         ])
     except ValueError:
         return None
@@ -0,0 +1,50 @@
+"""Time .spc generation against repeat_sim, comparing write_spc with od_to_spc(args_to_od(...)).
+
+    python benchmarks/spc_generation.py
+"""
+import io
+import time
+
+import pyspike.spcconf
+
+SIM_ARGS = {
+    "name": "Diffusion",
+    "type": "stochastic",
+    "solver": "direct",
+    "threads": 0,
+    "interval": {"start": 0, "step": 0.1, "stop": 10},
+    "runs": 1,
+    "export": [
+        {"places": [], "to": "output/places.csv"},
+        {"transitions": [], "to": "output/transitions.csv"}
+    ]
+}
+
+
+def od_to_spc(repeat_sim):
+    return pyspike.spcconf.od_to_spc(pyspike.spcconf.args_to_od('input/m.candl', {}, SIM_ARGS, repeat_sim), repeat_sim)
+
+
+def write_spc(repeat_sim):
+    f = io.StringIO()
+    pyspike.spcconf.write_spc(f, 'input/m.candl', {}, SIM_ARGS, repeat_sim)
+    return f.getvalue()
+
+
+def timed(function, repeat_sim):
+    t = time.perf_counter()
+    result = function(repeat_sim)
+    return result, time.perf_counter() - t
+
+
+def main():
+    print(f"{'repeat_sim':>10} {'od_to_spc':>10} {'write_spc':>10}")
+    for repeat_sim in (1, 10, 100, 1000, 2500, 5000, 10000):
+        expected, od_time = timed(od_to_spc, repeat_sim)
+        spc, write_time = timed(write_spc, repeat_sim)
+        assert spc == expected
+        print(f"{repeat_sim:>10} {od_time:>9.4f}s {write_time:>9.4f}s")
+
+
+if __name__ == '__main__':
+    main()
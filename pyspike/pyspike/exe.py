@@ -1,14 +1,26 @@
+import dataclasses
 import logging
 import os
+import shutil
 import subprocess
 from dataclasses import dataclass
 
+import pandas as pd
+
 import pyspike.spcconf
 
 logging.basicConfig(level=logging.INFO)
 
 CANDL_FILE_NAME = 'system_model.candl'
 
+# Spike executable. Can be set with the SPIKE environment variable, e.g. to a local stand-in for testing.
+SPIKE_COMMAND = os.environ.get('SPIKE', '~/bin/spike')
+
+
+def spike_available():
+    """Return True if the Spike executable SPIKE_COMMAND is found."""
+    return shutil.which(os.path.expanduser(SPIKE_COMMAND.split()[0])) is not None
+
 
 @dataclass
 class SimArgs:
@@ -19,20 +31,42 @@ class SimArgs:
     repeat_sim: int = 1
 
 
-def run_in_dir(candl_str: str, sim_args: SimArgs, spike_run_dir, skip_call=False):
+def run_in_dir(candl_str, sim_args: SimArgs, spike_run_dir, skip_call=False, processes=1,
+               export_places=None, export_transitions=None):
     """Run spike in a given directory returning a manifest dictionary.
 
+    candl_str is either the candl as a string or a callable writing it to an
+    open text file, such as:
+
+        lambda f: unit_model.write_candl(f, medium_graph, graph_name)
+
+    so that the candl of a large model need never be held in memory.
+
     Creates:
 
         input/conf.spc
         input/system_model.candl
         output/... (places and transitions csv files)
+
+    If processes > 1 the sim_args.runs are split between that many concurrent
+    Spike processes, each run in its own chunks/NNNN directory, and their
+    outputs combined into output/ as a single Spike call would have written them.
+
+    export_places and export_transitions list the columns Spike should write
+    to places.csv and transitions.csv, such as 'a' (a place's sum over
+    units), 'a_3' or 'f1ab_2_3'. None (the default) exports every column.
+    An empty list raises ValueError (see check_export_columns).
     """
+    check_export_columns(export_places, export_transitions)
 
     places_path_list, transitions_path_list, relative_spc_path, candl_path = \
-        _prep_for_spike_call(candl_str, sim_args, spike_run_dir)
+        _prep_for_spike_call(candl_str, sim_args, spike_run_dir, export_places, export_transitions)
     if not skip_call:
-        call_spike(spike_run_dir, relative_spc_path)
+        if processes > 1 and sim_args.runs > 1:
+            _call_spike_split(sim_args, spike_run_dir, processes,
+                              places_path_list + transitions_path_list, export_places, export_transitions)
+        else:
+            call_spike(spike_run_dir, relative_spc_path)
         # Spike 1.0.1 always returns an error code. Check it worked:
         if not os.path.exists(os.path.join(spike_run_dir, transitions_path_list[0])):
             raise AssertionError(
@@ -53,7 +87,18 @@ def run_in_dir(candl_str: str, sim_args: SimArgs, spike_run_dir, skip_call=False
     return spike_manifest
 
 
-def _prep_for_spike_call(candl_string: str, sim_args: SimArgs, spike_run_dir):
+def check_export_columns(export_places, export_transitions):
+    """Raise ValueError if either list of columns to export is empty.
+
+    Spike reads an empty export list as every column, so an empty selection
+    cannot be written as the export of no columns.
+    """
+    for kind, columns in (('places', export_places), ('transitions', export_transitions)):
+        if columns is not None and len(columns) == 0:
+            raise ValueError(f"No {kind} columns selected to export. Use None to export every column")
+
+
+def _prep_for_spike_call(candl_string, sim_args: SimArgs, spike_run_dir, export_places=None, export_transitions=None):
     """
     Creates `run_dir/input` containing the .candl and .spc files required to call Spike. Spike will write to created `run_dir/output`.
     :param candl_string:
@@ -72,7 +117,10 @@ def _prep_for_spike_call(candl_string: str, sim_args: SimArgs, spike_run_dir):
 
 
     with open(os.path.join(run_dir_input, CANDL_FILE_NAME), 'w') as f:
-        f.write(candl_string)
+        if callable(candl_string):
+            candl_string(f)
+        else:
+            f.write(candl_string)
 
     # Create spc conf file for Spike
 
@@ -90,32 +138,27 @@ def _prep_for_spike_call(candl_string: str, sim_args: SimArgs, spike_run_dir):
         "runs": sim_args.runs,
         "export": [
             {
-                "places": [],
+                "places": list(export_places or []),
                 "to": "output/places.csv"
             },
             {
-                "transitions": [],
+                "transitions": list(export_transitions or []),
                 "to": "output/transitions.csv"
             }
         ]
     }
-    places_path_list, transitions_path_list, spc_string = pyspike.spcconf.create_conf_file(
-        CANDL_FILE_NAME, spike_model_args, spike_sim_args, sim_args.repeat_sim)
-
     # Write conf file
     spc_path = os.path.join(run_dir_input, 'conf.spc')
     with open(spc_path, 'w') as f:
-        f.write(spc_string)
+        places_path_list, transitions_path_list = pyspike.spcconf.write_conf_file(
+            f, CANDL_FILE_NAME, spike_model_args, spike_sim_args, sim_args.repeat_sim)
 
     return (places_path_list, transitions_path_list,
             'input/conf.spc', os.path.join('input', CANDL_FILE_NAME))
 
 
 def call_spike(working_dir, spc_path):
-    assert os.path.isfile(os.path.join(working_dir, spc_path))
-    args = ["~/bin/spike exe -f {}".format(spc_path)]
-    logging.info(f"Calling: '{str(args)}' from cwd: {working_dir}")
-    subprocess.run(args, cwd=working_dir, shell=True)  # check=True)
+    spawn_spike(working_dir, spc_path).wait()
     logging.info(f"Call to Spike complete")
 
     # spike 1.0.1 always returns error code 1. Reported on 2018/11/2.
@@ -129,4 +172,71 @@ def call_spike(working_dir, spc_path):
     #     print('stderr: ' + (e.stderr if e.stderr else 'NONE'))
     #     print('output: ' + (e.output if e.output else 'NONE'))
     #     print('!' * 10)
-    #     raise e
\ No newline at end of file
+    #     raise e
+
+
+def spawn_spike(working_dir, spc_path) -> subprocess.Popen:
+    """Start Spike on spc_path from working_dir without waiting for it to finish."""
+    assert os.path.isfile(os.path.join(working_dir, spc_path))
+    args = ["{} exe -f {}".format(SPIKE_COMMAND, spc_path)]
+    logging.info(f"Calling: '{str(args)}' from cwd: {working_dir}")
+    return subprocess.Popen(args, cwd=working_dir, shell=True)
+
+
+def split_runs(runs, processes):
+    """Split runs into at most processes near equal chunks, largest first."""
+    processes = min(processes, runs)
+    base, extra = divmod(runs, processes)
+    return [base + 1] * extra + [base] * (processes - extra)
+
+
+def combine_averaged_csvs(path_list, run_count_list, combined_path):
+    """Combine csv files of Spike output, each averaged over run_count_list runs, into one at combined_path.
+
+    Each column but Time is averaged weighted by run count, in the column
+    order of the first file. Columns which come out whole are written as
+    integers, as Spike writes them. Time is copied as written in the first
+    file.
+    """
+    frames = [pd.read_csv(path, sep=';', dtype={'Time': str}) for path in path_list]
+    columns = frames[0].columns[1:]
+    combined = sum(frame.reindex(columns=columns) * runs
+                   for frame, runs in zip(frames, run_count_list)) / sum(run_count_list)
+    combined.insert(0, 'Time', frames[0]['Time'])
+    for column in combined.columns[1:]:
+        if (combined[column] % 1 == 0).all():
+            combined[column] = combined[column].astype(int)
+    combined.to_csv(combined_path, sep=';', index=False)
+
+
+def candl_file_copier(candl_path):
+    """Return a callable writing the candl file at candl_path to an open file (see run_in_dir)."""
+    def copy_candl_file(f):
+        with open(candl_path, 'r') as candl_file:
+            shutil.copyfileobj(candl_file, f)
+    return copy_candl_file
+
+
+def _call_spike_split(sim_args, spike_run_dir, processes, output_path_list, export_places=None,
+                      export_transitions=None):
+    run_count_list = split_runs(sim_args.runs, processes)
+    chunk_dir_list = [os.path.join(spike_run_dir, 'chunks', f"{i:04d}") for i in range(len(run_count_list))]
+
+    spawned = []
+    for chunk_dir, runs in zip(chunk_dir_list, run_count_list):
+        os.makedirs(chunk_dir)
+        _, _, relative_spc_path, _ = _prep_for_spike_call(
+            candl_file_copier(os.path.join(spike_run_dir, 'input', CANDL_FILE_NAME)),
+            dataclasses.replace(sim_args, runs=runs), chunk_dir, export_places, export_transitions)
+        spawned.append(spawn_spike(chunk_dir, relative_spc_path))
+    for process in spawned:
+        process.wait()
+    logging.info(f"Calls to {len(spawned)} Spike processes complete")
+
+    for path in output_path_list:
+        chunk_path_list = [os.path.join(chunk_dir, path) for chunk_dir in chunk_dir_list]
+        missing = [p for p in chunk_path_list if not os.path.exists(p)]
+        if missing:
+            raise AssertionError(
+                f"Check Jupyter server log for Spike output.\nSpike failed to produce: {missing}")
+        combine_averaged_csvs(chunk_path_list, run_count_list, os.path.join(spike_run_dir, path))
\ No newline at end of file
@@ -1,5 +1,9 @@
+import hashlib
+import io
+import itertools
 import os
 import random
+from collections import OrderedDict
 from dataclasses import dataclass
 from enum import Enum
 from pathlib import Path
@@ -7,6 +11,7 @@ from abc import ABC, abstractmethod
 from typing import Sequence
 
 import networkx as nx
+import numpy as np
 
 
 @dataclass(frozen=True)
@@ -42,9 +47,14 @@ class ColorFunction(ABC):
         self.variables = variable_list
 
     def to_candl(self, medium_graph):
+        return ''.join(self.iter_candl(medium_graph))
+
+    def iter_candl(self, medium_graph):
+        """Yield the candl of to_candl in pieces, so that it need not all be held in memory."""
         sig = ','.join(f'{v.color.name} {v.name}' for v in self.variables)
-        func = self._graph_to_func(medium_graph)
-        return f'bool  {self.name}({sig}) {{ {func} }};'
+        yield f'bool  {self.name}({sig}) {{ '
+        yield from self._iter_graph_to_func(medium_graph)
+        yield ' };'
 
     def __eq__(self, other):
         if type(self) != type(other):
@@ -57,10 +67,73 @@ class ColorFunction(ABC):
     def _graph_to_func(self, medium_graph):
         pass
 
+    def _iter_graph_to_func(self, medium_graph):
+        """Yield _graph_to_func in pieces. Override for functions which grow with medium_graph."""
+        yield self._graph_to_func(medium_graph)
+
+    def _cache_key(self):
+        """Return a hashable key which, with the medium graph, determines to_candl. Extend in subclasses with
+        other state affecting it."""
+        return type(self), self.name, tuple(self.variables)
+
 
 NO_TOKENS_MARKING = "0`0"
 
 
+def graph_fingerprint(medium_graph: nx.Graph) -> str:
+    """Return a hex digest of medium_graph's (integer) nodes and edges which does not depend on the order they were
+    added."""
+    g = medium_graph
+    nodes = np.sort(np.fromiter(g.nodes, dtype=np.int64, count=g.number_of_nodes()))
+    edges = np.fromiter(itertools.chain.from_iterable(g.edges), dtype=np.int64, count=2 * g.number_of_edges())
+    edges = np.sort(edges.reshape(-1, 2), axis=1)
+    edges = edges[np.lexsort((edges[:, 1], edges[:, 0]))]
+    return hashlib.sha256(nodes.tobytes() + b'|' + edges.tobytes()).hexdigest()
+
+
+class CandlCache:
+    """A least recently used cache of generated candl, such as the colour functions of a medium graph.
+
+    Holds at most maxbytes characters of candl (candl is ASCII), evicting the
+    least recently used entries first. Candl longer than maxbytes is not
+    cached. Set maxbytes to 0 to disable caching.
+    """
+
+    def __init__(self, maxbytes=0):
+        self.maxbytes = maxbytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, key, generate):
+        """Return the candl cached under key, calling generate() to create it if missing."""
+        if self.maxbytes <= 0:
+            return generate()
+        if key in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+        self.misses += 1
+        candl = generate()
+        if len(candl) <= self.maxbytes:
+            self._entries[key] = candl
+            self.nbytes += len(candl)
+            while self.nbytes > self.maxbytes:
+                self.nbytes -= len(self._entries.popitem(last=False)[1])
+        return candl
+
+    def clear(self):
+        self._entries.clear()
+        self.nbytes = 0
+
+
+# Colour function candl keyed by medium graph fingerprint and ColorFunction._cache_key(). Disabled by default,
+# so functions are streamed to file without being held in memory (see UnitModel.write_candl). Setting
+# CANDL_CACHE.maxbytes speeds up sweeps on one medium graph at the cost of holding that much candl in memory.
+CANDL_CACHE = CandlCache(maxbytes=0)
+
+
 def randomly_allocate_range_of_integers_between_lists(list_of_lists, number_nodes):
     for i in range(number_nodes):
         random.choice(list_of_lists).append(i)
@@ -178,30 +251,53 @@ class UnitModel:
         self.transitions.append(t)
 
     def to_candl_string(self, graph_medium: nx.Graph, graph_name='') -> str:
-        chunks = [
-            self._title_chunk(graph_name) + '\n{',
-            self._colorsets_chunk(graph_medium),
-            self._variables_chunk(),
-            self._colorfunctions_chunk(graph_medium),
-            self._places_chunk(),
-            self._transitions_chunk(),
-            '}'
-        ]
-        return '\n'.join(chunks) + '\n'
+        f = io.StringIO()
+        self.write_candl(f, graph_medium, graph_name)
+        return f.getvalue()
+
+    def write_candl(self, f, graph_medium: nx.Graph, graph_name=''):
+        """Write the candl of to_candl_string to the open text file f a section at a time.
+
+        Colour functions, which grow with graph_medium, are written in pieces
+        so the full candl is never held in memory.
+        """
+        f.write(self._title_chunk(graph_name) + '\n{\n')
+        f.write(self._colorsets_chunk(graph_medium) + '\n')
+        f.write(self._variables_chunk() + '\n')
+        self._write_colorfunctions_chunk(f, graph_medium)
+        f.write('\n')
+        f.write(self._places_chunk() + '\n')
+        f.write(self._transitions_chunk() + '\n')
+        f.write('}\n')
 
     def to_candl_file(self, graph_medium: nx.Graph, graph_name, dir_path) -> Path:
         """Create .candl file by embeding this UnitModel onto a graph described by graph_medium.
         Return a Path to the created file.
 
         """
-        candl_string = self.to_candl_string(graph_medium, graph_name)
         file_name = self._full_name(graph_name) + '.candl'
         file_name = file_name.replace(' ', '-')
         file_path = os.path.join(dir_path, file_name)
         with open(file_path, 'w') as f:
-            f.write(candl_string)
+            self.write_candl(f, graph_medium, graph_name)
         return Path(file_path)
 
+    def fingerprint(self) -> str:
+        """Return a hex digest which is the same for UnitModels defining the same places and transitions.
+
+        Covers colours, variables, place markings and each transition's candl
+        (so its type, places, read arcs and rate) but not pos_offsets, which
+        only affect plotting.
+        """
+        chunks = [
+            self.name,
+            ','.join(c.name for c in self.colors),
+            self._variables_chunk(),
+            self._places_chunk(),
+            self._transitions_chunk()
+        ]
+        return hashlib.sha256('\n'.join(chunks).encode()).hexdigest()
+
     def _full_name(self, graph_name):
         return self.name + ' on ' + graph_name
 
@@ -211,6 +307,9 @@ class UnitModel:
     def _add_function(self, function: ColorFunction):
         f = function
         assert f not in self.functions
+        for existing in self.functions:
+            if existing.name == f.name:
+                raise ValueError(f"Function '{f.name}' is already defined differently in this model")
         # if f.guard_function:  # TODO: turn inside out: instead ask function if it is okay with self.variables
         for v in f.variables:
             if v not in self.variables:
@@ -240,10 +339,20 @@ class UnitModel:
         return '\n'.join(lines) + '\n'
 
     def _colorfunctions_chunk(self, graph_medium):
-        lines = ['colorfunctions:']
-        for f in self.functions:
-            lines.append(f.to_candl(graph_medium))
-        return '\n'.join(lines) + '\n'
+        f = io.StringIO()
+        self._write_colorfunctions_chunk(f, graph_medium)
+        return f.getvalue()
+
+    def _write_colorfunctions_chunk(self, f, graph_medium):
+        f.write('colorfunctions:\n')
+        graph_key = graph_fingerprint(graph_medium) if (CANDL_CACHE.maxbytes > 0 and self.functions) else None
+        for function in self.functions:
+            if graph_key is None:
+                f.writelines(function.iter_candl(graph_medium))
+            else:
+                f.write(CANDL_CACHE.get((graph_key,) + function._cache_key(),
+                                        lambda: function.to_candl(graph_medium)))
+            f.write('\n')
 
     def _places_chunk(self):
         lines = ['places:',
@@ -1,3 +1,5 @@
+import io
+import itertools
 import os
 import json
 import re
@@ -51,17 +53,18 @@ def create_conf_file(model_file_name, model_args, sim_args, repeat_sim):
     :param repeat_sim: number of times to run the same simulation. Each run resulting a new file.
     :return: a list of absolute file paths (as string) which would be written and contents of .spc file to execute with Spike
     """
+    f = io.StringIO()
+    places_path_list, transitions_path_list = write_conf_file(f, model_file_name, model_args, sim_args, repeat_sim)
+    return places_path_list, transitions_path_list, f.getvalue()
 
-    sim_args = deepcopy(sim_args)
 
-    # Make simulation output paths absolute
-
-    export_list = []
+def write_conf_file(f, model_file_name, model_args, sim_args, repeat_sim):
+    """Write the .spc of create_conf_file to the open text file f, returning (places_path_list,
+    transitions_path_list).
+    """
     places_path_list = []
     transitions_path_list = []
     for export_item in sim_args['export']:
-        export_item = dict(export_item)
-        export_list.append(export_item)
         if 'places' in export_item:
             places_path_list.append(export_item['to'])
         elif 'transitions' in export_item:
@@ -69,16 +72,12 @@ def create_conf_file(model_file_name, model_args, sim_args, repeat_sim):
         else:
             raise ValueError(f"neither places nor tranistions key in item: '{export_item}'")
 
-    
-    sim_args['export'] = export_list
-
-    od = args_to_od(os.path.join('input', model_file_name), model_args, sim_args, repeat_sim)
-    spc_string = od_to_spc(od, repeat_sim)
+    write_spc(f, os.path.join('input', model_file_name), model_args, sim_args, repeat_sim)
 
     if repeat_sim > 1:
         places_path_list = expand_export_path_list(places_path_list, repeat_sim)
         transitions_path_list = expand_export_path_list(transitions_path_list, repeat_sim)
-    return places_path_list, transitions_path_list,  spc_string
+    return places_path_list, transitions_path_list
 
 
 def expand_export_path_list(export_path_list, repeat_sim):
@@ -118,41 +117,44 @@ def args_to_od(model_path, model_args, sim_args, repeat_sim=1):
     # will run 11, but meas the existing pipelin will work as is. TODO: Fix pipeline to run with numbered files.
 
     # configuration : simulation
-    od['configuration']['simulation'] = OD(
+    od['configuration']['simulation'] = _simulation_od(sim_args, sim_args['export'])
+    if repeat_sim > 1:
+        assert repeat_sim <= 10000  # we will hard code the number of digits to 4 (but start at 0)
+        for i in range(repeat_sim):
+            export_dict_list = add_repeat_sim_index_export_dict_list(sim_args['export'], i)
+            od['configuration'][sim_key(i)] = _simulation_od(sim_args, export_dict_list)
+
+    return od
+
+def _simulation_od(sim_args, export_dict_list):
+    return OD(
         name=sim_args['name'],
         type=sim_args['type'],
         solver=sim_args['solver'],
         threads=sim_args['threads'],
         interval=sim_args['interval'],
         runs=sim_args['runs'],
-        export=sim_args['export']
+        export=export_dict_list
     )
-    if repeat_sim > 1:
-        assert repeat_sim <= 10000  # we will hard code the number of digits to 4 (but start at 0)
-        for i in range(repeat_sim):
-            export_dict_list = deepcopy(sim_args['export'])
-            export_dict_list = add_repeat_sim_index_export_dict_list(export_dict_list, i)
-            od['configuration'][sim_key(i)] = OD(
-                name=sim_args['name'],
-                type=sim_args['type'],
-                solver=sim_args['solver'],
-                threads=sim_args['threads'],
-                interval=sim_args['interval'],
-                runs=sim_args['runs'],
-                export=export_dict_list
-            )
 
-    return od
 
 def add_repeat_sim_index_export_dict_list(edl, i):
+    return _number_export_dict_list(edl, f"{i:04d}")
+
+
+def _number_export_dict_list(edl, number):
     numbered_edl = []
     for d in edl:
         d_numbered = deepcopy(d)
-        d_numbered['to'] = d_numbered['to'].replace('.csv', f"_{i:04d}.csv")
+        d_numbered['to'] = d_numbered['to'].replace('.csv', f"_{number}.csv")
         numbered_edl.append(d_numbered)
     return numbered_edl
 
 
+# Stands in for the number of a repeated simulation in write_spc
+_REPEAT_PLACEHOLDER = 'REPEATSIMNUMBER'
+
+
 def sim_key(sim_index):
     return "<{:04d}>simulation".format(sim_index)
 
@@ -165,92 +167,112 @@ def _walk(node, f):
 
 
 def od_to_spc(od, repeat_sim):
+    """Return the .spc of od (see args_to_od). Simulations of repeat_sim > 1 are found by sim_key."""
+    f = io.StringIO()
+    _write_od(f, od, repeat_sim)
+    return f.getvalue()
 
-    od = deepcopy(od)
-
-    # ---Prepossess dict---
-
-    # Put ' around certain keys (to later restore with " after all " removed)
-
-    if 'import' in od:
-        if 'from' in od['import']:
-            od['import']['from'] = "'" + od['import']['from'] + "'"
-
-    if 'configuration' in od:
-        if 'model' in od['configuration']:
-            _walk(od['configuration']['model'], lambda val: "'" + str(val) + "'")
-
-    if 'configuration' in od:
-        if 'simulation' in od['configuration']:
-            if 'name' in od['configuration']['simulation']:
-                od['configuration']['simulation']['name'] = "'" + od['configuration']['simulation']['name'] + "'"
-        if repeat_sim > 1:
-            for i in range(repeat_sim):
-                if sim_key(i) in od['configuration']:
-                    if 'name' in od['configuration'][sim_key(i)]:
-                        od['configuration'][sim_key(i)]['name'] = "'" + od['configuration'][sim_key(i)][
-                            'name'] + "'"
 
-    # Collapse interval:
+def write_spc(f, model_path, model_args, sim_args, repeat_sim=1):
+    """Write od_to_spc(args_to_od(model_path, model_args, sim_args, repeat_sim), repeat_sim) to the open text file f.
 
-    def collapse_interval(sk):
-        if 'interval' in od['configuration'][sk]:
-            interval_dict = od['configuration'][sk]['interval']
-            collapsed = '{start}:{step}:{stop}'.format(**interval_dict)
-            od['configuration'][sk]['interval'] = collapsed
-
-    if 'configuration' in od:
-        if 'simulation' in od['configuration']:
-            collapse_interval('simulation')
-        if repeat_sim > 1:
-            for i in range(repeat_sim):
-                collapse_interval(sim_key(i))
-
-
-
-
-    # Replace export list with export_1, export_2 and so on
-    def expand_export_list(sk):
-        if 'export' in od['configuration'][sk]:
-            export_list = od['configuration'][sk].pop('export')
-            for i, anexport in enumerate(export_list):
-                anexport['to'] = "'" + anexport['to'] + "'"
-                if 'places' in anexport:
-                    anexport['places'] = '[' + ', '.join(["'" + p + "'" for p in anexport['places']]) + ']'
-                if 'transitions' in anexport:
-                    anexport['transitions'] = '[' + ', '.join(["'" + p + "'" for p in anexport['transitions']]) + ']'
-                od['configuration'][sk]['export<' + str(i) + '>'] = anexport
-
-    if 'configuration' in od:
-        if 'simulation' in od['configuration']:
-            expand_export_list('simulation')
-        if repeat_sim > 1:
-            for ri in range(repeat_sim):
-                expand_export_list(sim_key(ri))
-
-
-    # ---Create and further process json string---
-
-    jrep = json.dumps(od, indent=4)
-
-    # Remove front { and last } and 4 spaces of indent to remainder
-    lines = jrep.splitlines()
-    lines.pop(0)
-    lines.pop(-1)
-    for i in range(len(lines)):
-        lines[i] = lines[i][4:]
-    jrep = '\n'.join(lines)
-
-    # Remove all "
-    jrep = jrep.replace('"', '')
-
-    # Remove commas on line ends
-    jrep = jrep.replace(',\n', '\n')
-
-    # Replace ' with " (these were placed above)
-    jrep = jrep.replace("'", '"')
-
-    # Remove any <#> added during expansion of exports above
-    jrep = re.sub('<.+>', '', jrep)
-
-    return jrep
+    Each section, and each repeated simulation, is converted and written in
+    turn, so the time taken is linear in repeat_sim and only one simulation
+    is held in memory at a time. The output is the same byte for byte.
+    """
+    if repeat_sim > 1:
+        assert repeat_sim <= 10000  # we will hard code the number of digits to 4 (but start at 0)
+    _write_od(f, args_to_od(model_path, model_args, sim_args), 1, _repeated_simulations(sim_args, repeat_sim))
+
+
+def _repeated_simulations(sim_args, repeat_sim):
+    """Yield the .spc configuration entry of each repeated simulation of args_to_od(..., repeat_sim)."""
+    if repeat_sim <= 1:
+        return
+    # Repeated simulations differ only in their numbered export paths, as the <####> of their keys is
+    # removed, so one is converted with a placeholder for the number and copied for the others.
+    simulation = _spc_entry('simulation', _spc_simulation(_simulation_od(sim_args, sim_args['export'])))
+    numbered = _spc_entry(sim_key(0), _spc_simulation(
+        _simulation_od(sim_args, _number_export_dict_list(sim_args['export'], _REPEAT_PLACEHOLDER))))
+    clashes = _REPEAT_PLACEHOLDER in simulation  # placeholder clashes with sim_args, so convert each one
+    for i in range(repeat_sim):
+        if clashes:
+            yield _spc_entry(sim_key(i), _spc_simulation(
+                _simulation_od(sim_args, add_repeat_sim_index_export_dict_list(sim_args['export'], i))))
+        else:
+            yield numbered.replace(_REPEAT_PLACEHOLDER, f"{i:04d}")
+
+
+def _write_od(f, od, repeat_sim, extra_configuration=()):
+    """Write od as .spc to the open text file f, followed in its configuration by the converted entries of
+    extra_configuration."""
+    for n, (key, value) in enumerate(od.items()):
+        if n:
+            f.write('\n')
+        if key == 'configuration' and value:
+            f.write('configuration: {\n')
+            simulation_keys = {'simulation'} | ({sim_key(i) for i in range(repeat_sim)} if repeat_sim > 1 else set())
+            entries = (_spc_entry(k, _spc_configuration_value(k, v, simulation_keys)) for k, v in value.items())
+            for m, entry in enumerate(itertools.chain(entries, extra_configuration)):
+                if m:
+                    f.write('\n')
+                f.write(entry)
+            f.write('\n}')
+        else:
+            if key == 'import' and 'from' in value:
+                value = dict(value, **{'from': "'" + value['from'] + "'"})
+            f.write(_spc_entry(key, value, top_level=True))
+
+
+def _spc_configuration_value(key, value, simulation_keys):
+    """Return a configuration entry with the values which are quoted in .spc marked with ' (see _spc_line)."""
+    if key == 'model':
+        value = deepcopy(value)
+        _walk(value, lambda val: "'" + str(val) + "'")
+        return value
+    if key in simulation_keys:
+        return _spc_simulation(value)
+    return value
+
+
+def _spc_simulation(simulation):
+    """Return a simulation with its name marked for quoting, its interval collapsed to start:step:stop and its
+    exports moved to the end as numbered keys, which _spc_line writes as repeated 'export' keys."""
+    converted = OD()
+    for key, value in simulation.items():
+        if key == 'name':
+            value = "'" + value + "'"
+        elif key == 'interval':
+            value = '{start}:{step}:{stop}'.format(**value)
+        elif key == 'export':
+            continue
+        converted[key] = value
+    for i, anexport in enumerate(simulation.get('export', [])):
+        anexport = deepcopy(anexport)
+        anexport['to'] = "'" + anexport['to'] + "'"
+        if 'places' in anexport:
+            anexport['places'] = '[' + ', '.join(["'" + p + "'" for p in anexport['places']]) + ']'
+        if 'transitions' in anexport:
+            anexport['transitions'] = '[' + ', '.join(["'" + p + "'" for p in anexport['transitions']]) + ']'
+        converted['export<' + str(i) + '>'] = anexport
+    return converted
+
+
+def _spc_entry(key, value, top_level=False):
+    """Return one key of a converted dict as written to .spc, without a final newline.
+
+    The dict is dumped as json and each line stripped of json's quotes and
+    commas (see _spc_line).
+    """
+    lines = json.dumps(OD([(key, value)]), indent=4).splitlines()[1:-1]
+    if top_level:
+        lines = [line[4:] for line in lines]
+    return '\n'.join(_spc_line(line) for line in lines)
+
+
+def _spc_line(line):
+    line = line.replace('"', '')
+    if line.endswith(','):
+        line = line[:-1]
+    line = line.replace("'", '"')
+    return re.sub('<.+>', '', line)
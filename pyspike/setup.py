@@ -15,6 +15,7 @@ setup(
     install_requires=[
         'colorlover',
         'networkx',
+        'numpy',
         'pandas'
     ],  # external packages as dependencies
 
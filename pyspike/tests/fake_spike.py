@@ -0,0 +1,28 @@
+"""A stand-in for Spike for tests. Called as: fake_spike.py exe -f <spc>
+
+Writes each exported places and transitions csv with one column, 'a', whose
+value is the number of runs in the simulation which exports it.
+"""
+import os
+import re
+import sys
+
+
+def main(spc_path):
+    with open(spc_path) as f:
+        spc = f.read()
+    for simulation in re.findall(r'simulation: \{(.*?)\n    \}', spc, re.DOTALL):
+        start, step, stop = (float(v) for v in re.search(r'interval: (\S+)', simulation).group(1).split(':'))
+        runs = int(re.search(r'runs: (\d+)', simulation).group(1))
+        times = [start + i * step for i in range(round((stop - start) / step))]
+        for to in re.findall(r'to: "(.*?)"', simulation):
+            os.makedirs(os.path.dirname(to), exist_ok=True)
+            with open(to, 'w') as f:
+                f.write('Time;a\n')
+                for t in times:
+                    f.write(f"{t:g};{runs}\n")
+
+
+if __name__ == '__main__':
+    assert sys.argv[1:3] == ['exe', '-f']
+    main(sys.argv[3])
@@ -1,8 +1,19 @@
 import os
+import sys
 import tempfile
 
+import pandas as pd
+import pytest
+
 import pyspike.exe
 
+FAKE_SPIKE_PATH = os.path.join(os.path.dirname(__file__), 'fake_spike.py')
+
+
+@pytest.fixture
+def fake_spike(monkeypatch):
+    monkeypatch.setattr(pyspike.exe, 'SPIKE_COMMAND', f"{sys.executable} {FAKE_SPIKE_PATH}")
+
 
 def test_run_in_dir_without_separate_marking():  # m, medium_graph):
     sim_args = pyspike.exe.SimArgs(start=0, stop=1, step=.1, runs=1, repeat_sim=1)
@@ -38,6 +49,51 @@ def test_run_in_dir_without_separate_marking_with_repeat_sim():
         assert places_str == SIMPLE_CANDLE_PLACES_STR
 
 
+def test_run_in_dir_with_candl_writer(tmp_path):
+    sim_args = pyspike.exe.SimArgs(start=0, stop=1, step=.1)
+    d = pyspike.exe.run_in_dir(lambda f: f.write(SIMPLE_CANDL_STR), sim_args, tmp_path, skip_call=True)
+    assert (tmp_path / d['input']['candl']).read_text() == SIMPLE_CANDL_STR
+
+
+def test_run_in_dir_with_export_lists(tmp_path):
+    sim_args = pyspike.exe.SimArgs(start=0, stop=1, step=.1)
+    d = pyspike.exe.run_in_dir(SIMPLE_CANDL_STR, sim_args, tmp_path, skip_call=True,
+                               export_places=['a_0', 'a_1'], export_transitions=['f1ab_0_1'])
+    spc = (tmp_path / d['input']['spc']).read_text()
+    assert 'places: ["a_0", "a_1"]' in spc
+    assert 'transitions: ["f1ab_0_1"]' in spc
+
+
+def test_split_runs():
+    assert pyspike.exe.split_runs(10, 3) == [4, 3, 3]
+    assert pyspike.exe.split_runs(2, 4) == [1, 1]
+
+
+def test_combine_averaged_csvs(tmp_path):
+    (tmp_path / 'a.csv').write_text('Time;a;b\n0;1;2\n0.1;3;2\n')
+    (tmp_path / 'b.csv').write_text('Time;b;a\n0;2;3\n0.1;2;3\n')
+    pyspike.exe.combine_averaged_csvs([tmp_path / 'a.csv', tmp_path / 'b.csv'], [3, 1], tmp_path / 'c.csv')
+    assert (tmp_path / 'c.csv').read_text() == 'Time;a;b\n0;1.5;2\n0.1;3.0;2\n'
+
+    (tmp_path / 'd.csv').write_text('Time;a\n0;1\n1;2\n2;4\n')
+    pyspike.exe.combine_averaged_csvs([tmp_path / 'd.csv', tmp_path / 'd.csv'], [1, 2], tmp_path / 'e.csv')
+    assert (tmp_path / 'e.csv').read_text() == 'Time;a\n0;1\n1;2\n2;4\n'
+
+
+def test_run_in_dir_with_runs_split_between_processes(fake_spike, tmp_path):
+    sim_args = pyspike.exe.SimArgs(start=0, stop=1, step=.1, runs=4, repeat_sim=2)
+    d = pyspike.exe.run_in_dir(SIMPLE_CANDL_STR, sim_args, tmp_path, processes=3)
+
+    os.makedirs(tmp_path / 'serial')
+    assert d == pyspike.exe.run_in_dir(SIMPLE_CANDL_STR, sim_args, tmp_path / 'serial', skip_call=True)
+    for path in d['output']['places'] + d['output']['transitions']:
+        df = pd.read_csv(tmp_path / path, sep=';')
+        assert list(df.columns) == ['Time', 'a']
+        assert len(df) == 10
+        assert list(df['a']) == [(2 * 2 + 1 + 1) / 4] * 10
+    assert sorted(os.listdir(tmp_path / 'chunks')) == ['0000', '0001', '0002']
+
+
 SIMPLE_CANDLE_PLACES_STR = """Time;b;a;b_0;a_0
 0;0;1;0;1
 0.1;0;1;0;1
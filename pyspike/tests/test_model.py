@@ -108,5 +108,49 @@ class TestUnitModel:
     # TODO: many tests moved to occ/tests/test_model for speed. Move back here
 
 
-
-
+def test_graph_fingerprint_ignores_edge_order():
+    g1 = nx.Graph([(0, 1), (1, 2)])
+    g2 = nx.Graph([(2, 1), (1, 0)])
+    assert model.graph_fingerprint(g1) == model.graph_fingerprint(g2)
+    assert model.graph_fingerprint(g1) != model.graph_fingerprint(nx.Graph([(0, 1), (0, 2)]))
+
+
+def test_unit_model_fingerprint(place_b):
+    def build(marking):
+        m = model.UnitModel('some name', [model.Unit], [model.u, model.n1])
+        m.add_places_from([model.Place(model.Unit, 'a', marking), place_b])
+        return m
+    assert build('1`all').fingerprint() == build('1`all').fingerprint()
+    assert build('1`all').fingerprint() != build('1`0').fingerprint()
+
+
+def test_candl_cache_reuses_colour_functions(monkeypatch):
+    calls = []
+
+    class CountingFunction(ColorFunction):
+        def _graph_to_func(self, medium_graph):
+            calls.append(medium_graph)
+            return 'u=n1'
+
+    m = model.UnitModel('some name', [model.Unit], [model.u, model.n1])
+    m.functions = [CountingFunction('f', [model.u, model.n1])]
+    candl = m.to_candl_string(nx.Graph([(0, 1)]))
+    m.to_candl_string(nx.Graph([(0, 1)]))
+    assert len(calls) == 2  # disabled by default
+    function_bytes = len(m.functions[0].to_candl(nx.Graph([(0, 1)])))
+    calls.clear()
+
+    # Room for one function's candl
+    monkeypatch.setattr(model, 'CANDL_CACHE', model.CandlCache(maxbytes=function_bytes))
+    m.to_candl_string(nx.Graph([(0, 1)]))
+    assert m.to_candl_string(nx.Graph([(1, 0)])) == candl
+    assert len(calls) == 1
+    m.to_candl_string(nx.Graph([(0, 1), (1, 2)]))
+    m.to_candl_string(nx.Graph([(0, 1)]))  # evicted
+    assert len(calls) == 3
+    assert (model.CANDL_CACHE.hits, model.CANDL_CACHE.misses) == (1, 3)
+    assert model.CANDL_CACHE.nbytes <= model.CANDL_CACHE.maxbytes
+
+    model.CANDL_CACHE.maxbytes = 0
+    assert m.to_candl_string(nx.Graph([(0, 1)])) == candl
+    assert len(calls) == 4
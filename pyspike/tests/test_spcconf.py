@@ -1,3 +1,4 @@
+import io
 import json
 import os
 import tempfile
@@ -259,3 +260,12 @@ def test_create_conf_file_with_multiple_runs():
     assert transitions_path_list == ['output/transitions.csv', 'output/transitions_0000.csv', 'output/transitions_0001.csv']
 
 
+
+
+def test_write_spc_matches_od_to_spc():
+    model_args = {'constants': {'all': {'D': 3, 'M': 'D/2'}}, 'places': {'P': '1000`(M,M)'}}
+    for args in [({}, 1), (model_args, 1), ({}, 3), (model_args, 12)]:
+        f = io.StringIO()
+        pyspike.spcconf.write_spc(f, 'input/empty.candl', args[0], SIMULATION, args[1])
+        assert f.getvalue() == od_to_spc(pyspike.spcconf.args_to_od('input/empty.candl', *args[:1], SIMULATION,
+                                                                       args[1]), args[1])